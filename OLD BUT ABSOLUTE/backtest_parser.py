@@ -1,13 +1,19 @@
 # --- backtest_parser.py ---
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from loader import read_orderbook_csv
+
 sns.set(style="darkgrid")
 
-def load_orderbook_csv(file_path):
-    df = pd.read_csv(file_path, names=["timestamp", "side", "price", "volume"])
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
+def load_orderbook_csv(file_path, start=None, end=None):
+    # start/end (inclusive) seek through the log's .tidx sidecar, so an
+    # hour of a daily file is read without parsing the rest.
+    df = read_orderbook_csv(file_path, start, end)
     df["price"] = df["price"].astype(float)
     df["volume"] = df["volume"].astype(float)
     return df
@@ -1,106 +1,229 @@
 # --- app.py ---
 import dash
-from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash import dcc, html, Patch
+from dash.dependencies import Input, Output, State
 import plotly.graph_objs as go
-from client_shared import shared_state, state_lock
+from client_shared import feature_stream, latest_snapshot, strategy_signals_since
 from kraken_client import KrakenClient
+from collections import deque
+import argparse
+from datetime import datetime
+from flask import Response
+from itertools import accumulate, islice
+import threading
 import time
 
+from metrics import histogram, render
+from shm_books import SIGNAL_RING_FIELDS, ShmBook, ShmRing, decode_signal, ring_name
+from strategies import ImbalanceStrategy
+
 from data_logger import start_logger
 
 app = dash.Dash(__name__)
 app.title = "Kraken Order Book"
 
 pairs = ["XBT/USD"]
-
-# Store rolling mid-price + signal history
-price_history = []
-
-app.layout = html.Div([
-    html.H1("📊 Real-Time Kraken Order Book"),
-    dcc.Graph(id='depth-chart'),
-    dcc.Graph(id='signal-chart'),
-    dcc.Interval(id='interval', interval=1000, n_intervals=0)
-])
-
-def make_depth_chart(data):
-    bids = data.get("bids", [])
-    asks = data.get("asks", [])
-
-    bid_prices = [price for price, _ in bids]
-    bid_volumes = [volume for _, volume in bids]
-    bid_cum = [sum(bid_volumes[:i+1]) for i in range(len(bid_volumes))]
-
-    ask_prices = [price for price, _ in asks]
-    ask_volumes = [volume for _, volume in asks]
-    ask_cum = [sum(ask_volumes[:i+1]) for i in range(len(ask_volumes))]
-
+# Runs live inside KrakenClient; the same object backtests through
+# BacktestEngine(strategy_fn=strategy).
+strategy = ImbalanceStrategy(threshold=0.6)
+
+REFRESH_MS = 1000
+HISTORY_POINTS = 100
+
+
+class LocalSource:
+    # Book, features and strategy signals published by a KrakenClient
+    # running in this process.
+    def __init__(self, pair):
+        self.pair = pair
+
+    def latest_snapshot(self):
+        return latest_snapshot(self.pair)
+
+    def latest_features(self):
+        return feature_stream(self.pair).latest()
+
+    def signals_since(self, seen):
+        return strategy_signals_since(self.pair, seen)
+
+
+class ShmSource:
+    # The same reads from the shared memory written by ingest.py in another
+    # process (app.py --shm). Restart the dashboard if ingest.py restarts.
+    def __init__(self, pair, prefix="kraken"):
+        self.pair = pair
+        self.book = ShmBook.attach(pair, prefix)
+        self.signals = ShmRing.attach(ring_name(pair, "signals", prefix), SIGNAL_RING_FIELDS)
+
+    def latest_snapshot(self):
+        return self.book.read()
+
+    def latest_features(self):
+        seq, snapshot = self.book.read()
+        return seq, snapshot["features"] if snapshot is not None else None
+
+    def signals_since(self, seen):
+        cursor, rows = self.signals.since(seen)
+        return cursor, [decode_signal(row) for row in rows]
+
+
+class PriceHistory:
+    # Ring buffer of mid-price + signal points shared by all browser tabs.
+    # Points get monotonically increasing indices, so each tab only pulls
+    # what it has not drawn yet and extends its chart with that.
+    def __init__(self, source, maxlen=HISTORY_POINTS):
+        self.source = source
+        self.points = deque(maxlen=maxlen)
+        self.next_index = 0
+        self.feature_seen = 0
+        self.signal_seen = 0
+        self.last_signal = None
+        self.lock = threading.Lock()
+
+    def append(self, record, signal=None):
+        self.points.append({
+            "time": datetime.fromtimestamp(record["timestamp"]).isoformat(sep=" ", timespec="milliseconds"),
+            "mid": record["mid"],
+            "signal": signal
+        })
+        self.next_index += 1
+
+    def ingest(self):
+        # Every LONG/SHORT onset from the live strategy since the last poll
+        # (so none is lost between refreshes), then the newest mid from the
+        # FeatureEngine stream. Several tabs poll; each record is taken once.
+        with self.lock:
+            self.signal_seen, signals = self.source.signals_since(self.signal_seen)
+            for record in signals:
+                if record["signal"] != self.last_signal:
+                    self.last_signal = record["signal"]
+                    if record["signal"] is not None:
+                        self.append(record, record["signal"])
+            count, latest = self.source.latest_features()
+            if count > self.feature_seen and latest is not None:
+                self.feature_seen = count
+                self.append(latest)
+
+    def since(self, seen_index):
+        # (last index, points after seen_index still held in the buffer)
+        with self.lock:
+            first = self.next_index - len(self.points)
+            skip = max(seen_index + 1 - first, 0)
+            return self.next_index - 1, list(islice(self.points, skip, None))
+
+
+source = LocalSource(pairs[0])
+price_history = PriceHistory(source)
+# How old the published book is when the dashboard reads it, and what the
+# refresh callback itself costs.
+snapshot_age = histogram("dashboard_snapshot_age_seconds", "Age of the book snapshot when the dashboard reads it")
+callback_seconds = histogram("dashboard_callback_seconds", "Time spent in the chart refresh callback")
+# (book seq, depth traces): cumulative depth is computed once per book version.
+depth_cache = (0, None)
+
+def make_depth_chart():
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=bid_prices, y=bid_cum, fill='tozeroy', mode='lines', name='Bids', line=dict(color='green')))
-    fig.add_trace(go.Scatter(x=ask_prices, y=ask_cum, fill='tozeroy', mode='lines', name='Asks', line=dict(color='red')))
+    fig.add_trace(go.Scatter(x=[], y=[], fill='tozeroy', mode='lines', name='Bids', line=dict(color='green')))
+    fig.add_trace(go.Scatter(x=[], y=[], fill='tozeroy', mode='lines', name='Asks', line=dict(color='red')))
     fig.update_layout(title=f"{pairs[0]} Depth Chart", xaxis_title="Price", yaxis_title="Cumulative Volume")
     return fig
 
-def make_signal_chart():
-    if not price_history:
-        return go.Figure()
-
-    timestamps = [p["time"] for p in price_history]
-    mid_prices = [p["mid"] for p in price_history]
-    buy_signals = [p["mid"] if p["signal"] == "BUY" else None for p in price_history]
-    sell_signals = [p["mid"] if p["signal"] == "SELL" else None for p in price_history]
+def depth_traces(seq, data):
+    global depth_cache
+    cached_seq, traces = depth_cache
+    if cached_seq != seq:
+        bids = data.get("bids", [])
+        asks = data.get("asks", [])
+        traces = (
+            [price for price, _ in bids], list(accumulate(volume for _, volume in bids)),
+            [price for price, _ in asks], list(accumulate(volume for _, volume in asks)),
+        )
+        depth_cache = (seq, traces)
+    return traces
+
+def depth_patch(seq, data):
+    # Only the trace arrays go over the wire; layout stays in the browser.
+    bid_prices, bid_cum, ask_prices, ask_cum = depth_traces(seq, data)
+    patch = Patch()
+    patch["data"][0]["x"] = bid_prices
+    patch["data"][0]["y"] = bid_cum
+    patch["data"][1]["x"] = ask_prices
+    patch["data"][1]["y"] = ask_cum
+    return patch
 
+def make_signal_chart():
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=timestamps, y=mid_prices, mode='lines', name='Mid-Price'))
-    fig.add_trace(go.Scatter(x=timestamps, y=buy_signals, mode='markers', name='Buy Signal', marker=dict(color='green', symbol='triangle-up', size=10)))
-    fig.add_trace(go.Scatter(x=timestamps, y=sell_signals, mode='markers', name='Sell Signal', marker=dict(color='red', symbol='triangle-down', size=10)))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Mid-Price'))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='markers', name='Long Signal', marker=dict(color='green', symbol='triangle-up', size=10)))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='markers', name='Short Signal', marker=dict(color='red', symbol='triangle-down', size=10)))
     fig.update_layout(title="Mid-Price with Trade Signals", xaxis_title="Time", yaxis_title="Mid Price")
     return fig
 
-@app.callback(
-    [Output('depth-chart', 'figure'), Output('signal-chart', 'figure')],
-    [Input('interval', 'n_intervals')]
-)
-def update_charts(n):
-    with state_lock:
-        data = shared_state.get(pairs[0], {})
-
-    depth_fig = make_depth_chart(data)
-
-    # --- Signal logic ---
-    bid_price = data.get("bid_price")
-    bid_size = data.get("bid_size")
-    ask_price = data.get("ask_price")
-    ask_size = data.get("ask_size")
-
-    if bid_price and ask_price and bid_size and ask_size:
-        mid = (bid_price + ask_price) / 2
-        imbalance = (bid_size - ask_size) / (bid_size + ask_size + 1e-9)  # Avoid division by zero
-
-        signal = None
-        if imbalance > 0.6:
-            signal = "BUY"
-        elif imbalance < -0.6:
-            signal = "SELL"
-
-        price_history.append({
-            "time": time.strftime('%H:%M:%S'),
-            "mid": mid,
-            "signal": signal
-        })
+def signal_extension(points):
+    # extendData payload for the three signal traces, capped at the buffer size.
+    times = [p["time"] for p in points]
+    mids = [p["mid"] for p in points]
+    buys = [p["mid"] if p["signal"] == "LONG" else None for p in points]
+    sells = [p["mid"] if p["signal"] == "SHORT" else None for p in points]
+    return dict(x=[times, times, times], y=[mids, buys, sells]), [0, 1, 2], HISTORY_POINTS
 
-        # Keep last 100 points
-        if len(price_history) > 100:
-            price_history.pop(0)
+app.layout = html.Div([
+    html.H1("📊 Real-Time Kraken Order Book"),
+    dcc.Graph(id='depth-chart', figure=make_depth_chart()),
+    dcc.Graph(id='signal-chart', figure=make_signal_chart()),
+    # What this tab has drawn: book version and last history index.
+    dcc.Store(id='chart-seen', data={"seq": 0, "index": -1}),
+    dcc.Interval(id='interval', interval=REFRESH_MS, n_intervals=0)
+])
 
-    signal_fig = make_signal_chart()
-    return depth_fig, signal_fig
+@app.callback(
+    [Output('depth-chart', 'figure'), Output('signal-chart', 'extendData'), Output('chart-seen', 'data')],
+    [Input('interval', 'n_intervals')],
+    [State('chart-seen', 'data')]
+)
+def update_charts(n, seen):
+    with callback_seconds.time():
+        depth_update = dash.no_update
+        seq, data = source.latest_snapshot()
+        if data is not None:
+            snapshot_age.observe(time.time() - data["timestamp"])
+        book_changed = seq > seen["seq"]
+        if book_changed:
+            depth_update = depth_patch(seq, data)
+            seen = {**seen, "seq": seq}
+
+        price_history.ingest()
+        last_index, points = price_history.since(seen["index"])
+        if not points and not book_changed:
+            return dash.no_update, dash.no_update, dash.no_update
+        signal_update = signal_extension(points) if points else dash.no_update
+        return depth_update, signal_update, {**seen, "index": last_index}
+
+@app.server.route("/metrics")
+def metrics_endpoint():
+    return Response(render(), mimetype="text/plain; version=0.0.4")
+
+def attach_shm(pair, prefix):
+    while True:
+        try:
+            return ShmSource(pair, prefix)
+        except FileNotFoundError:
+            print(f"⏳ Waiting for ingest.py to create the {pair} segments...")
+            time.sleep(1)
 
 if __name__ == '__main__':
-    kraken_client = KrakenClient(pairs=pairs)
-    kraken_client.start()
-    
-    start_logger(interval=1.0)  # <-- Start snapshot logging
+    parser = argparse.ArgumentParser(description="Real-time Kraken order book dashboard")
+    parser.add_argument("--shm", action="store_true",
+                        help="dashboard only; read from a separate ingest.py process through shared memory")
+    parser.add_argument("--prefix", default="kraken", help="shared memory segment name prefix (with --shm)")
+    args = parser.parse_args()
+
+    if args.shm:
+        source = price_history.source = attach_shm(pairs[0], args.prefix)
+    else:
+        kraken_client = KrakenClient(pairs=pairs, strategy=strategy)
+        kraken_client.start()
+
+        start_logger(interval=1.0, pairs=pairs)  # <-- Start snapshot logging
 
     app.run(debug=True, use_reloader=False)
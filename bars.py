@@ -0,0 +1,272 @@
+# --- bars.py ---
+# Time bars over logged snapshots: OHLC of the mid, spread statistics,
+# mean depth per side and the depth-weighted price (notional / volume over
+# every logged level of both sides), at any fixed pandas frequency
+# ("1s", "1min", "1h", ...). One vectorized pass per side builds per-
+# snapshot stats, one groupby turns them into bars. Bars exist only where
+# snapshots do; gaps are not filled.
+#
+# BarEngine keeps bars per (log file, frequency) as additive partials
+# (sums and counts rather than means), so bars from several daily files
+# merge exactly, and a log that data_logger is appending to is extended
+# from the start of its last bar instead of being re-read: that bar may
+# have been incomplete, every earlier one is final. Partials are stored in
+# the FrameCache, so strategies on 1 h bars load a few hundred rows and
+# never parse the tick-level log again. Wide and Parquet stores are not
+# appended in place; their bars are cached by source fingerprint instead.
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import FrameCache, fingerprint, source_files
+from loader import log_pair_date, parse_orderbook_csv, resolve_paths
+from parquet_store import is_parquet_path, load_parquet
+from time_index import csv_byte_range
+from wide_store import WideSnapshots, is_wide_path, open_wide
+
+BAR_COLUMNS = ["timestamp", "open", "high", "low", "close", "spread_mean", "spread_min", "spread_max",
+               "depth_weighted", "bid_depth", "ask_depth", "snapshots"]
+PARTIAL_AGGS = {
+    "open": "first", "high": "max", "low": "min", "close": "last",
+    "spread_min": "min", "spread_max": "max", "spread_sum": "sum", "depth_weighted_sum": "sum",
+    "bid_depth_sum": "sum", "ask_depth_sum": "sum", "snapshots": "sum", "quoted": "sum",
+}
+HEAD_BYTES = 4096
+
+
+def side_stats(rows, best):
+    rows = rows.dropna(subset=["price", "volume"])
+    grouped = rows.assign(notional=rows["price"] * rows["volume"]).groupby("timestamp")
+    return grouped.agg(best=("price", best), depth=("volume", "sum"), notional=("notional", "sum"))
+
+
+def snapshot_stats(df):
+    # One row per snapshot: timestamp, mid, spread, bid/ask depth and the
+    # depth-weighted price. mid, spread and depth_weighted are NaN when a
+    # side is empty.
+    if isinstance(df, WideSnapshots):
+        best_bid = np.fmax.reduce(df.bid_price, axis=1) if df.levels else np.full(len(df), np.nan)
+        best_ask = np.fmin.reduce(df.ask_price, axis=1) if df.levels else np.full(len(df), np.nan)
+        bid_depth = np.nansum(df.bid_volume, axis=1)
+        ask_depth = np.nansum(df.ask_volume, axis=1)
+        notional = np.nansum(df.bid_price * df.bid_volume, axis=1) + np.nansum(df.ask_price * df.ask_volume, axis=1)
+        timestamps = df.time_index()
+    else:
+        bids = side_stats(df[df["side"] == "bid"], "max")
+        asks = side_stats(df[df["side"] == "ask"], "min")
+        timestamps = pd.DatetimeIndex(df["timestamp"].unique())
+        bids, asks = bids.reindex(timestamps), asks.reindex(timestamps)
+        best_bid, best_ask = bids["best"].to_numpy(), asks["best"].to_numpy()
+        bid_depth = bids["depth"].fillna(0.0).to_numpy()
+        ask_depth = asks["depth"].fillna(0.0).to_numpy()
+        notional = bids["notional"].fillna(0.0).to_numpy() + asks["notional"].fillna(0.0).to_numpy()
+
+    mid = (best_bid + best_ask) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        depth_weighted = np.where(mid == mid, notional / (bid_depth + ask_depth), np.nan)
+    return pd.DataFrame({
+        "timestamp": timestamps,
+        "mid": mid,
+        "spread": best_ask - best_bid,
+        "bid_depth": bid_depth,
+        "ask_depth": ask_depth,
+        "depth_weighted": depth_weighted,
+    })
+
+
+def bar_partials(stats, freq):
+    # Additive per-bar aggregates of snapshot_stats rows.
+    quoted = stats["mid"].notna()
+    grouped = stats.assign(
+        bar=stats["timestamp"].dt.floor(freq),
+        spread_sum=stats["spread"].where(quoted, 0.0),
+        depth_weighted_sum=stats["depth_weighted"].where(quoted, 0.0),
+        quoted=quoted.astype("int64"),
+    ).groupby("bar", sort=True)
+    partials = grouped.agg(
+        open=("mid", "first"), high=("mid", "max"), low=("mid", "min"), close=("mid", "last"),
+        spread_min=("spread", "min"), spread_max=("spread", "max"), spread_sum=("spread_sum", "sum"),
+        depth_weighted_sum=("depth_weighted_sum", "sum"), bid_depth_sum=("bid_depth", "sum"),
+        ask_depth_sum=("ask_depth", "sum"), snapshots=("mid", "size"), quoted=("quoted", "sum"),
+    )
+    return partials.rename_axis("timestamp").reset_index()
+
+
+def merge_partials(frames):
+    # Frames in time order; bars present in more than one (e.g. a bar that
+    # spans midnight across two daily files) are combined.
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return bar_partials(snapshot_stats(parse_orderbook_csv(b"")), "1s")
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    if df["timestamp"].is_unique:
+        return df
+    return df.groupby("timestamp", sort=True).agg(PARTIAL_AGGS).reset_index()
+
+
+def finalize(partials):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.DataFrame({
+            "timestamp": partials["timestamp"],
+            "open": partials["open"],
+            "high": partials["high"],
+            "low": partials["low"],
+            "close": partials["close"],
+            "spread_mean": partials["spread_sum"] / partials["quoted"],
+            "spread_min": partials["spread_min"],
+            "spread_max": partials["spread_max"],
+            "depth_weighted": partials["depth_weighted_sum"] / partials["quoted"],
+            "bid_depth": partials["bid_depth_sum"] / partials["snapshots"],
+            "ask_depth": partials["ask_depth_sum"] / partials["snapshots"],
+            "snapshots": partials["snapshots"],
+        }, columns=BAR_COLUMNS).reset_index(drop=True)
+
+
+def compute_bars(df, freq):
+    # Bars for an in-memory long frame or WideSnapshots.
+    return finalize(bar_partials(snapshot_stats(df), freq))
+
+
+def head_hash(path, size):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read(min(size, HEAD_BYTES))).hexdigest()
+
+
+class BarEngine:
+    def __init__(self, data_path, pair=None, cache=True):
+        self.data_path = data_path
+        self.pair = pair
+        # cache: True for the default FrameCache, a FrameCache, or False/None
+        # to keep partials in this process only.
+        self.cache = FrameCache() if cache is True else (cache or None)
+        # (abs path, freq) -> (state, partials) of the CSV logs seen so far.
+        self.files = {}
+
+    def bars(self, freq, start=None, end=None):
+        # Every bar overlapping [start, end]; the first may hold snapshots
+        # from before start.
+        if is_wide_path(self.data_path) or is_parquet_path(self.data_path):
+            bars = self.stored_bars(freq, start, end)
+        else:
+            paths = resolve_paths(self.data_path, self.pair, start, end)
+            if not paths:
+                raise FileNotFoundError(f"No order book logs match {self.data_path!r}")
+            pairs = {log_pair_date(p)[0] for p in paths}
+            if len(pairs) > 1:
+                raise ValueError(f"{self.data_path!r} holds several pairs ({', '.join(sorted(pairs))}); pass pair=")
+            bars = finalize(merge_partials([self.file_partials(path, freq) for path in paths]))
+        if start is not None:
+            bars = bars[bars["timestamp"] >= pd.Timestamp(start).floor(freq)]
+        if end is not None:
+            bars = bars[bars["timestamp"] <= pd.Timestamp(end)]
+        return bars.reset_index(drop=True)
+
+    def stored_bars(self, freq, start, end):
+        def compute():
+            if is_wide_path(self.data_path):
+                return compute_bars(open_wide(self.data_path, start, end), freq)
+            return compute_bars(load_parquet(self.data_path, pair=self.pair, start=start, end=end), freq)
+
+        if self.cache is None:
+            return compute()
+        source = fingerprint(source_files(self.data_path, self.pair, start, end))
+        params = {"freq": freq, "pair": self.pair, "start": start, "end": end}
+        return self.cache.cached("bars", source, params, compute)
+
+    def file_partials(self, path, freq):
+        path = os.path.abspath(path)
+        size = os.path.getsize(path)
+        state, partials = self.files.get((path, freq)) or self.load_state(path, freq)
+        if state is not None and (size < state["consumed"]
+                                  or head_hash(path, state["consumed"]) != state["head"]):
+            # Rewritten rather than appended to.
+            state = partials = None
+        if state is not None and size == state["consumed"]:
+            return partials
+
+        tail = pd.Timestamp(state["tail"]) if state is not None and state["tail"] else None
+        lo = csv_byte_range(path, start=tail)[0] if tail is not None else 0
+        with open(path, "rb") as f:
+            f.seek(lo)
+            data = f.read(size - lo)
+        # A row may be half written at the end of a live log.
+        data = data[:data.rfind(b"\n") + 1]
+        df = parse_orderbook_csv(data)
+        if tail is not None:
+            df = df[df["timestamp"] >= tail]
+            partials = partials[partials["timestamp"] < tail]
+        new = bar_partials(snapshot_stats(df), freq)
+        partials = merge_partials([partials, new]) if partials is not None else new
+
+        consumed = lo + len(data)
+        state = {
+            "consumed": consumed,
+            "head": head_hash(path, consumed),
+            "tail": str(partials["timestamp"].iloc[-1]) if len(partials) else None,
+        }
+        self.files[(path, freq)] = (state, partials)
+        self.save_state(path, freq, state, partials)
+        return partials
+
+    def cache_key(self, path, freq):
+        return self.cache.key("bars", path, {"freq": freq})
+
+    def load_state(self, path, freq):
+        if self.cache is None:
+            return None, None
+        key = self.cache_key(path, freq)
+        try:
+            with open(self.cache.path(key) + ".json") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None, None
+        partials = self.cache.get(key)
+        return (state, partials) if partials is not None else (None, None)
+
+    def save_state(self, path, freq, state, partials):
+        if self.cache is None:
+            return
+        key = self.cache_key(path, freq)
+        self.cache.put(key, partials)
+        meta_path = self.cache.path(key) + ".json"
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mid OHLC, spread and depth bars from logged order books")
+    parser.add_argument("data", nargs="?", default="l2_data_logs",
+                        help="CSV log, directory or glob of daily logs, Parquet store or wide store")
+    parser.add_argument("--freq", nargs="+", default=["1min"], help="pandas frequencies, e.g. 1s 1min 1h")
+    parser.add_argument("--pair")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--follow", type=float, metavar="SECONDS",
+                        help="keep extending the bars as the logs grow, every SECONDS")
+    args = parser.parse_args()
+
+    engine = BarEngine(args.data, args.pair, cache=not args.no_cache)
+    while True:
+        for freq in args.freq:
+            started = time.perf_counter()
+            bars = engine.bars(freq, args.start, args.end)
+            elapsed = time.perf_counter() - started
+            print(f"📊 {freq}: {len(bars):,} bars in {elapsed:.3f}s")
+            if len(bars):
+                print(bars.tail(5 if args.follow is None else 1).to_string(index=False))
+        if args.follow is None:
+            break
+        time.sleep(args.follow)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,24 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from bars import BarEngine
+from exit_engine import simulate_tp_sl_trades
+from frame_cache import FrameCache, callable_key, fingerprint, source_files
+from parquet_store import is_parquet_path, load_parquet
+from replay import RunningSummary, StreamingTradeSimulator, iter_snapshots, replay_trades
+from strategies import Strategy
+from loader import PeakMemory, load_orderbook
+from metrics import StageTimer
+from wide_store import WideSnapshots, is_wide_path, open_wide
 
 class BacktestEngine:
     def __init__(self, strategy_fn, data_path, capital=20, risk_pct=100, TP=50, SL=50,
-                 maker_fee=0.0016, taker_fee=0.0026, slippage=1.0):
+                 maker_fee=0.0016, taker_fee=0.0026, slippage=1.0, pair=None, start=None, end=None,
+                 cache=True):
         self.strategy_fn = strategy_fn
         self.data_path = data_path
+        self.pair = pair
+        self.start = start
+        self.end = end
         self.capital = capital
         self.risk_pct = risk_pct
         self.TP = TP
@@ -13,14 +26,34 @@ class BacktestEngine:
         self.maker_fee = maker_fee
         self.taker_fee = taker_fee
         self.slippage = slippage
+        # cache: True for the default on-disk FrameCache, a FrameCache, or
+        # False/None to always recompute mid prices and signals.
+        self.cache = FrameCache() if cache is True else (cache or None)
+        # Per-stage wall time (load, mid_prices, strategy, simulate) of the
+        # last run(); cache hits show up as the time to read the cached frame.
+        self.timings = StageTimer()
 
     def load_data(self):
-        cols = ["timestamp", "side", "price", "volume"]
-        df = pd.read_csv(self.data_path, names=cols, header=None, parse_dates=[0])
-        df.columns = cols
+        # A wide store is opened lazily: the returned WideSnapshots are
+        # memory-mapped views over [start, end], nothing else is read.
+        if is_wide_path(self.data_path):
+            return open_wide(self.data_path, self.start, self.end)
+        if is_parquet_path(self.data_path):
+            return load_parquet(self.data_path, pair=self.pair, start=self.start, end=self.end)
+        # CSV logs: data_path may be one file, a directory, a glob or a list of
+        # daily files; they are parsed in parallel and seek to [start, end]
+        # through their .tidx sidecars.
+        with PeakMemory() as memory:
+            df = load_orderbook(self.data_path, self.pair, self.start, self.end)
+        if "pair" in df:
+            raise ValueError(f"{self.data_path!r} holds several pairs "
+                             f"({', '.join(df['pair'].cat.categories)}); pass pair=")
+        print(f"📂 Loaded {len(df):,} rows, peak RSS {memory.peak / 2**20:,.0f} MB")
         return df
 
     def compute_mid_prices(self, df):
+        if isinstance(df, WideSnapshots):
+            return df.mid_prices()
         bids = df[df["side"] == "bid"]
         asks = df[df["side"] == "ask"]
         best_bids = bids.groupby("timestamp")["price"].max()
@@ -34,75 +67,79 @@ class BacktestEngine:
         mid_price_df.reset_index(inplace=True)
         return mid_price_df
 
-    def simulate_trades(self, signal_df, mid_price_df):
-        trades = []
-        for _, signal in signal_df.iterrows():
-            ts, direction, entry_price = signal["timestamp"], signal["signal"], signal["price"]
-            risk_amount = self.capital * (self.risk_pct / 100)
-            position_size = risk_amount / self.SL
-            position_value = entry_price * position_size
+    def bars(self, freq):
+        # Mid OHLC, spread and depth bars over [start, end], cached per
+        # frequency; see bars.py.
+        return BarEngine(self.data_path, self.pair, cache=self.cache).bars(freq, self.start, self.end)
 
-            future = mid_price_df[mid_price_df["timestamp"] > ts].copy()
-            if future.empty:
-                break
+    def simulate_trades(self, signal_df, mid_price_df):
+        return simulate_tp_sl_trades(signal_df, mid_price_df, self.capital, self.risk_pct,
+                                     self.TP, self.SL, self.maker_fee, self.taker_fee, self.slippage)
 
-            exit_price = None
-            pnl, exit_time = 0, None
+    def prepare(self):
+        # (mid_price_df, signal_df). Both are cached by source fingerprint,
+        # stage and parameters; when both hit, the raw data is never loaded.
+        timings = self.timings
+        if self.cache is None:
+            with timings.stage("load"):
+                df = self.load_data()
+            with timings.stage("mid_prices"):
+                mid_price_df = self.compute_mid_prices(df)
+            with timings.stage("strategy"):
+                return mid_price_df, self.strategy_fn(df, mid_price_df)
 
-            for _, frow in future.iterrows():
-                price = frow["mid_price"]
-                if direction == "LONG":
-                    if price >= entry_price + self.TP:
-                        exit_price = entry_price + self.TP - self.slippage
-                        pnl = (exit_price - entry_price) * position_size
-                        exit_time = frow["timestamp"]
-                        break
-                    elif price <= entry_price - self.SL:
-                        exit_price = entry_price - self.SL - self.slippage
-                        pnl = (exit_price - entry_price) * position_size
-                        exit_time = frow["timestamp"]
-                        break
-                elif direction == "SHORT":
-                    if price <= entry_price - self.TP:
-                        exit_price = entry_price - self.TP + self.slippage
-                        pnl = (entry_price - exit_price) * position_size
-                        exit_time = frow["timestamp"]
-                        break
-                    elif price >= entry_price + self.SL:
-                        exit_price = entry_price + self.SL + self.slippage
-                        pnl = (entry_price - exit_price) * position_size
-                        exit_time = frow["timestamp"]
-                        break
+        source = fingerprint(source_files(self.data_path, self.pair, self.start, self.end))
+        params = {"pair": self.pair, "start": self.start, "end": self.end}
+        data = []
 
-            if exit_price:
-                fees = position_value * (self.maker_fee + self.taker_fee)
-                net_pnl = pnl - fees
-                trades.append({
-                    "entry_time": ts,
-                    "exit_time": exit_time,
-                    "entry_price": entry_price,
-                    "exit_price": exit_price,
-                    "direction": direction,
-                    "position_size": position_size,
-                    "gross_pnl": pnl,
-                    "fees": fees,
-                    "net_pnl": net_pnl
-                })
+        def load():
+            if not data:
+                with timings.stage("load"):
+                    data.append(self.load_data())
+            return data[0]
 
-        trade_df = pd.DataFrame(trades)
-        if not trade_df.empty:
-            trade_df["cumulative_pnl"] = trade_df["net_pnl"].cumsum()
-            trade_df["equity"] = self.capital + trade_df["cumulative_pnl"]
-        return trade_df
+        with timings.stage("mid_prices"):
+            mid_price_df = self.cache.cached("mid_prices", source, params,
+                                             lambda: self.compute_mid_prices(load()))
+        with timings.stage("strategy"):
+            signal_df = self.cache.cached("signals", source, {**params, "strategy": callable_key(self.strategy_fn)},
+                                          lambda: self.strategy_fn(load(), mid_price_df))
+        if not data:
+            print("⚡ Mid prices and signals loaded from cache")
+        return mid_price_df, signal_df
 
     def run(self):
-        df = self.load_data()
-        mid_price_df = self.compute_mid_prices(df)
-        signal_df = self.strategy_fn(df, mid_price_df)
-        trade_df = self.simulate_trades(signal_df, mid_price_df)
+        self.timings = StageTimer()
+        mid_price_df, signal_df = self.prepare()
+        with self.timings.stage("simulate"):
+            trade_df = self.simulate_trades(signal_df, mid_price_df)
         self.print_summary(trade_df)
+        self.timings.report()
         self.plot_equity_curve(trade_df)
 
+    def run_streaming(self):
+        # Replay over the logged snapshots through the strategy's streaming
+        # path (on_snapshot), in memory bounded by the open positions. Trades
+        # are the same as run()'s but summarized in exit order as they close,
+        # so the final balance and trade count match run() while the max
+        # drawdown is that of the exit-time equity curve. Needs a
+        # strategies.Strategy: a plain batch function has no streaming path.
+        if not isinstance(self.strategy_fn, Strategy):
+            raise TypeError(f"run_streaming needs a strategies.Strategy, got {self.strategy_fn!r}")
+        simulator = StreamingTradeSimulator(self.capital, self.risk_pct, self.TP, self.SL,
+                                            self.maker_fee, self.taker_fee, self.slippage, ordered=False)
+        snapshots = iter_snapshots(self.data_path, self.pair, self.start, self.end)
+        summary = RunningSummary(self.capital)
+        for trade in replay_trades(snapshots, simulator, strategy=self.strategy_fn):
+            summary.add(trade)
+        if summary.trades == 0:
+            print("💤 No trades were executed. Check signal logic or data range.")
+        else:
+            print("🧾 Trades:", summary.trades)
+            print("🔥 Final Balance:", summary.final_equity)
+            print("📉 Max Drawdown:", summary.max_drawdown)
+        return summary
+
     def print_summary(self, trade_df):
         if trade_df.empty:
             print("💤 No trades were executed. Check signal logic or data range.")
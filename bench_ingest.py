@@ -0,0 +1,103 @@
+# --- bench_ingest.py ---
+# End-to-end ingest benchmark against the local Kraken stand-in: sustained
+# message throughput of KrakenClient plus recv -> publish and
+# send -> publish latency percentiles. send -> publish needs the synthetic
+# book's send-time stamps, so it is not reported for --source replays
+# (their level timestamps are from the recording).
+import argparse
+import json
+import time
+
+import numpy as np
+import websockets
+
+from kraken_client import KrakenClient
+from kraken_stub_server import KrakenStubServer
+
+
+class TimedKrakenClient(KrakenClient):
+    def __init__(self, pairs, uri, depth=10, capacity=5_000_000):
+        super().__init__(pairs=pairs, uri=uri, depth=depth)
+        self.count = 0
+        self.recv_latency = np.zeros(capacity)
+        self.send_latency = np.zeros(capacity)
+
+    def on_message(self, message):
+        recv = time.perf_counter()
+        msg = json.loads(message)
+        self.handle(msg)
+        publish = time.perf_counter()
+        if not isinstance(msg, list) or self.count >= len(self.recv_latency):
+            return
+        self.recv_latency[self.count] = publish - recv
+        # The synthetic stand-in stamps every level with its send time.
+        levels = next(iter(msg[1].values()))
+        self.send_latency[self.count] = time.time() - float(levels[-1][2])
+        self.count += 1
+
+    def run(self):
+        # The benchmark ends by stopping the server.
+        try:
+            super().run()
+        except (websockets.ConnectionClosed, OSError):
+            pass
+
+
+def percentiles(values):
+    if len(values) == 0:
+        return {}
+    return {p: np.percentile(values, p) * 1e6 for p in (50, 90, 99, 99.9)} | {"max": values.max() * 1e6}
+
+
+def run(rate, duration, pairs, depth=10, source=None, port=8765, warmup=1.0):
+    server = KrakenStubServer(port=port, rate=rate, depth=depth, source=source)
+    server.start()
+    # Same depth as the server, or the books truncate differently and every
+    # checksum fails.
+    client = TimedKrakenClient(pairs, server.uri, depth)
+    client.start()
+
+    time.sleep(warmup)
+    start_count = client.count
+    time.sleep(duration)
+    end_count = client.count
+    server.stop()
+    client.thread.join(5)
+
+    measured = slice(start_count, end_count)
+    result = {
+        "messages": end_count - start_count,
+        "throughput": (end_count - start_count) / duration,
+        "sent": server.sent,
+        "resyncs": sum(client.checksum_failures.values()),
+        "recv_to_publish_us": percentiles(client.recv_latency[measured]),
+    }
+    if source is None:
+        result["send_to_publish_us"] = percentiles(client.send_latency[measured])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KrakenClient ingest benchmark against a local stand-in")
+    parser.add_argument("--rate", type=float, default=0, help="server messages per second, 0 = unthrottled")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--pairs", nargs="+", default=["XBT/USD"])
+    parser.add_argument("--depth", type=int, default=10)
+    parser.add_argument("--source", help="JSONL file of recorded raw book messages")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    result = run(args.rate, args.duration, args.pairs, args.depth, args.source, args.port)
+    print(f"📨 {result['messages']} messages in {args.duration:.0f}s "
+          f"-> {result['throughput']:,.0f} msg/s (server sent {result['sent']})")
+    if result["resyncs"]:
+        print(f"⚠️ {result['resyncs']} checksum resyncs during the run")
+    for name in ("recv_to_publish_us", "send_to_publish_us"):
+        if name not in result:
+            continue
+        stats = "  ".join(f"p{k}={v:,.0f}" if k != "max" else f"max={v:,.0f}" for k, v in result[name].items())
+        print(f"⏱️ {name}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
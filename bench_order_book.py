@@ -0,0 +1,77 @@
+# --- bench_order_book.py ---
+# Micro-benchmark: SortedDict-backed LocalOrderBook vs the old full re-sort.
+import random
+import time
+from collections import OrderedDict
+
+from kraken_client import LocalOrderBook
+
+
+class ResortOrderBook:
+    # Previous implementation, kept here only as the benchmark reference.
+    def __init__(self):
+        self.bids = OrderedDict()
+        self.asks = OrderedDict()
+
+    def update(self, updates, side):
+        book = self.bids if side == "b" else self.asks
+        for update in updates:
+            price, volume = float(update[0]), float(update[1])
+            if volume == 0:
+                book.pop(price, None)
+            else:
+                book[price] = volume
+
+        sorted_items = sorted(book.items(), reverse=(side == "b"))
+        if side == "b":
+            self.bids = OrderedDict(sorted_items)
+        else:
+            self.asks = OrderedDict(sorted_items)
+
+    def top(self):
+        bid = next(iter(self.bids.items()), (None, None))
+        ask = next(iter(self.asks.items()), (None, None))
+        return bid, ask
+
+    def get_depth(self, depth=20):
+        bids = list(self.bids.items())[:depth]
+        asks = list(self.asks.items())[:depth]
+        return bids, asks
+
+
+def make_messages(n_messages, n_levels, seed=42):
+    rng = random.Random(seed)
+    mid = 100_000.0
+    snapshot_b = [[f"{mid - 0.1 * (i + 1):.5f}", f"{rng.uniform(0.01, 5):.8f}"] for i in range(n_levels)]
+    snapshot_a = [[f"{mid + 0.1 * (i + 1):.5f}", f"{rng.uniform(0.01, 5):.8f}"] for i in range(n_levels)]
+    messages = [("b", snapshot_b), ("a", snapshot_a)]
+    for _ in range(n_messages):
+        side = rng.choice("ab")
+        sign = -1 if side == "b" else 1
+        updates = []
+        for _ in range(rng.randint(1, 3)):
+            price = mid + sign * 0.1 * rng.randint(1, n_levels)
+            volume = 0.0 if rng.random() < 0.3 else rng.uniform(0.01, 5)
+            updates.append([f"{price:.5f}", f"{volume:.8f}"])
+        messages.append((side, updates))
+    return messages
+
+
+def bench(book_cls, messages, depth=20):
+    book = book_cls()
+    start = time.perf_counter()
+    for side, updates in messages:
+        book.update(updates, side)
+        book.top()
+        book.get_depth(depth)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    n_messages = 50_000
+    for n_levels in (25, 100, 500, 1000):
+        messages = make_messages(n_messages, n_levels)
+        old = bench(ResortOrderBook, messages)
+        new = bench(LocalOrderBook, messages)
+        print(f"levels={n_levels:>5}  resort={old * 1e6 / len(messages):7.2f} us/msg  "
+              f"sorted={new * 1e6 / len(messages):7.2f} us/msg  speedup={old / new:5.1f}x")
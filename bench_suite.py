@@ -0,0 +1,169 @@
+# --- bench_suite.py ---
+# Regression benchmarks for the hot paths across data sizes, on synthetic
+# logs (synthetic_data.py) so every machine times the same input:
+#   order_book_update   LocalOrderBook.update per book message
+#   load_data           BacktestEngine.load_data (CSV logs)
+#   compute_mid_prices  BacktestEngine.compute_mid_prices
+#   strategy            liquidity_wall_strategy
+#   simulate_trades     BacktestEngine.simulate_trades
+# Each case reports the best of --repeat runs. Results are written as JSON;
+# with a baseline (e.g. one saved with --save-baseline on the same machine)
+# any case slower than baseline * (1 + tolerance) is flagged and the run
+# exits non-zero.
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from base_engine import BacktestEngine
+from bench_order_book import make_messages
+from kraken_client import LocalOrderBook
+from strategy_liquidity import liquidity_wall_strategy
+from synthetic_data import generate
+
+SIZES = (3_600, 21_600, 86_400)
+
+
+def best_of(repeat, fn):
+    # (best seconds, last result)
+    best = math.inf
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def synthetic_logs(data_dir, snapshots, seed=0):
+    # One directory of daily logs per size, reused across runs.
+    out_dir = os.path.join(data_dir, f"snapshots_{snapshots}_seed_{seed}")
+    days = max(1, math.ceil(snapshots / 86_400))
+    if not os.path.isdir(out_dir):
+        generate(out_dir, days=days, hours=snapshots / 3_600 / days, seed=seed)
+    return out_dir
+
+
+def bench_size(data_dir, snapshots, repeat=5, book_levels=100, seed=0):
+    results = {}
+
+    messages = make_messages(snapshots, book_levels, seed)
+
+    def replay_book():
+        book = LocalOrderBook()
+        for side, updates in messages:
+            book.update(updates, side)
+
+    seconds, _ = best_of(repeat, replay_book)
+    results["order_book_update"] = (seconds, len(messages))
+
+    engine = BacktestEngine(liquidity_wall_strategy, synthetic_logs(data_dir, snapshots, seed), cache=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds, df = best_of(repeat, engine.load_data)
+    results["load_data"] = (seconds, len(df))
+    seconds, mid_price_df = best_of(repeat, lambda: engine.compute_mid_prices(df))
+    results["compute_mid_prices"] = (seconds, len(mid_price_df))
+    seconds, signal_df = best_of(repeat, lambda: liquidity_wall_strategy(df, mid_price_df))
+    results["strategy"] = (seconds, len(mid_price_df))
+    seconds, _ = best_of(repeat, lambda: engine.simulate_trades(signal_df, mid_price_df))
+    results["simulate_trades"] = (seconds, len(signal_df))
+
+    return {f"{case}/{snapshots}": {"seconds": seconds, "items": items,
+                                     "per_item_us": seconds / items * 1e6 if items else None}
+            for case, (seconds, items) in results.items()}
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def run(sizes=SIZES, repeat=5, data_dir=None, seed=0):
+    results = {}
+    with contextlib.ExitStack() as stack:
+        if data_dir is None:
+            data_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="bench_suite_"))
+        for snapshots in sizes:
+            print(f"🧪 {snapshots:,} snapshots")
+            for key, result in bench_size(data_dir, snapshots, repeat, seed=seed).items():
+                results[key] = result
+                print(f"   {key:<28} {result['seconds']:9.4f}s  {result['per_item_us'] or 0:9.3f} us/item")
+    return {"environment": environment(), "repeat": repeat, "results": results}
+
+
+def compare(results, baseline, tolerance=0.25, min_seconds=5e-3):
+    # [(key, baseline seconds, seconds, ratio)] for cases slower than
+    # baseline * (1 + tolerance); cases under min_seconds are too noisy.
+    regressions = []
+    for key, result in results["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        ratio = result["seconds"] / base["seconds"] if base["seconds"] else math.inf
+        if ratio > 1 + tolerance and result["seconds"] - base["seconds"] > min_seconds:
+            regressions.append((key, base["seconds"], result["seconds"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite with baseline regression checks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="snapshots per case")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="keep the synthetic logs here between runs (default: temp dir)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default="bench_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat, args.data_dir, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if not regressions:
+        print(f"✅ No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+        return
+    for key, before, after, ratio in regressions:
+        print(f"❌ {key}: {before:.4f}s -> {after:.4f}s ({ratio:.2f}x)")
+    raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
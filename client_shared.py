@@ -3,4 +3,84 @@ from collections import defaultdict
 import threading
 
 shared_state = defaultdict(dict)
-state_lock = threading.Lock()
\ No newline at end of file
+state_lock = threading.Lock()
+
+
+class SnapshotChannel:
+    # Single-writer, many-reader publication of one pair's book. Each
+    # snapshot is immutable and is swapped in together with its sequence
+    # number by a single reference assignment, which is atomic under the
+    # GIL, so neither side ever takes a lock.
+    def __init__(self):
+        self.latest = (0, None)
+
+    def publish(self, snapshot):
+        seq = self.latest[0] + 1
+        self.latest = (seq, snapshot)
+        return seq
+
+    def read(self):
+        return self.latest
+
+
+channels = {}
+
+
+def channel(pair):
+    return channels.get(pair) or channels.setdefault(pair, SnapshotChannel())
+
+
+def latest_snapshot(pair):
+    return channel(pair).read()
+
+
+class RecordStream:
+    # Single-writer ring of immutable records (e.g. per-update features).
+    # The writer fills a slot and only then advances `count`; readers keep
+    # their own cursor (records consumed so far) and copy what is new.
+    # Readers that fall more than `capacity` behind lose the oldest records.
+    def __init__(self, capacity=16_384):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.count = 0
+
+    def publish(self, record):
+        self.slots[self.count % self.capacity] = record
+        self.count += 1
+        return self.count
+
+    def latest(self):
+        # (cursor, newest record) without copying the backlog.
+        count = self.count
+        return count, self.slots[(count - 1) % self.capacity] if count else None
+
+    def since(self, seen):
+        # (new cursor, records after `seen` still held in the ring)
+        count = self.count
+        start = max(seen, count - self.capacity)
+        records = [self.slots[i % self.capacity] for i in range(start, count)]
+        # Slots overwritten while copying belong to a later lap; drop them.
+        overrun = self.count - self.capacity - start
+        if overrun > 0:
+            records = records[overrun:]
+        return count, records
+
+
+feature_streams = {}
+strategy_streams = {}
+
+
+def feature_stream(pair):
+    return feature_streams.get(pair) or feature_streams.setdefault(pair, RecordStream())
+
+
+def strategy_stream(pair):
+    return strategy_streams.get(pair) or strategy_streams.setdefault(pair, RecordStream(4_096))
+
+
+def features_since(pair, seen):
+    return feature_stream(pair).since(seen)
+
+
+def strategy_signals_since(pair, seen):
+    return strategy_stream(pair).since(seen)
@@ -1,48 +1,239 @@
 # --- data_logger.py ---
+import atexit
 import csv
+import json
 import os
+import queue
 import time
 from datetime import datetime
-from client_shared import shared_state, state_lock
+from client_shared import features_since, latest_snapshot
+from fixed_point import format_price, format_volume
+from metrics import counter, gauge, histogram
+from parquet_store import ParquetSnapshotWriter
+from time_index import append_index, build_csv_index, index_path
+from wide_store import WideSnapshotWriter
 import threading
 
 PAIR = "XBT/USD"
 SAVE_DIR = "l2_data_logs"
+PARQUET_DIR = os.path.join(SAVE_DIR, "parquet")
+WIDE_DIR = os.path.join(SAVE_DIR, "wide")
+DIFF_DIR = os.path.join(SAVE_DIR, "diffs")
 os.makedirs(SAVE_DIR, exist_ok=True)
 
-def get_log_path():
+def get_log_path(pair=PAIR):
     date_str = datetime.utcnow().strftime("%Y-%m-%d")
-    filename = f"{PAIR.replace('/', '-')}_orderbook_{date_str}.csv"
+    filename = f"{pair.replace('/', '-')}_orderbook_{date_str}.csv"
     return os.path.join(SAVE_DIR, filename)
 
-def write_snapshot():
-    with state_lock:
-        data = shared_state.get(PAIR, {})
+FEATURE_COLS = ["timestamp", "mid", "spread", "microprice", "imbalance", "depth_imbalance",
+                 "bid_wall_price", "bid_wall_volume", "ask_wall_price", "ask_wall_volume"]
 
+def get_features_path(pair=PAIR):
+    date_str = datetime.utcnow().strftime("%Y-%m-%d")
+    filename = f"{pair.replace('/', '-')}_features_{date_str}.csv"
+    return os.path.join(SAVE_DIR, filename)
+
+def write_features(seen, pair=PAIR):
+    # Appends every FeatureEngine record published since `seen` (not just
+    # one per interval) and returns the new cursor.
+    seen, records = features_since(pair, seen)
+    if not records:
+        return seen
+
+    rows = []
+    for r in records:
+        bid_wall = r["bid_wall"] or ("", "")
+        ask_wall = r["ask_wall"] or ("", "")
+        rows.append([
+            datetime.utcfromtimestamp(r["timestamp"]).strftime("%Y-%m-%d %H:%M:%S.%f"),
+            r["mid"], r["spread"], r["microprice"], r["imbalance"], r["depth_imbalance"],
+            *bid_wall, *ask_wall,
+        ])
+
+    with open(get_features_path(pair), "a", newline="") as f:
+        csv.writer(f).writerows(rows)
+    return seen
+
+def write_snapshot(store=None, pair=PAIR):
+    _, data = latest_snapshot(pair)
     if not data:
         return
 
-    timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    now = datetime.utcnow().replace(microsecond=0)
     bids = data.get("bids", [])[:10]
     asks = data.get("asks", [])[:10]
 
+    if store is not None:
+        store.append(pair, now, bids, asks)
+        return
+
+    timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
     rows = []
     for price, volume in bids:
         rows.append([timestamp, "bid", price, volume])
     for price, volume in asks:
         rows.append([timestamp, "ask", price, volume])
 
-    filepath = get_log_path()
+    filepath = get_log_path(pair)
+    offset = os.path.getsize(filepath) if os.path.exists(filepath) else 0
+    if offset and not os.path.exists(index_path(filepath)):
+        # Log started before the sidecar existed: index its rows first, or
+        # the sidecar would begin here and loads would seek past them.
+        build_csv_index(filepath)
     with open(filepath, "a", newline="") as f:
         writer = csv.writer(f)
         writer.writerows(rows)
+    # Sidecar (timestamp, byte offset) entry so loads can seek by time.
+    append_index(filepath, now, offset)
+
+def get_diff_path(pair, recv_time):
+    date_str = datetime.utcfromtimestamp(recv_time).strftime("%Y-%m-%d")
+    filename = f"{pair.replace('/', '-')}_diffs_{date_str}.jsonl"
+    return os.path.join(DIFF_DIR, filename)
+
+def exchange_time(payload):
+    # Newest Kraken level timestamp in a book payload, None if it has none.
+    stamps = [float(level[2]) for key in ("as", "bs", "a", "b")
+              for level in payload.get(key, ()) if len(level) > 2]
+    return max(stamps, default=None)
+
+class DiffRecorder:
+    # Event-level capture of every book message KrakenClient applies, one
+    # JSON line each under DIFF_DIR/<pair>_diffs_<date>.jsonl:
+    #   {"t": local recv time, "x": exchange time, "kind": ..., "data": {...}}
+    # kind is "snapshot" (as/bs), "diff" (a/b/c), "reset" (checksum resync)
+    # or "checkpoint" (full book every checkpoint_interval seconds, so
+    # replays can start mid-file). The websocket thread only enqueues; a
+    # writer thread serializes and writes in batches. When the queue is full
+    # records are dropped and counted rather than blocking ingest.
+    def __init__(self, maxsize=100_000, batch_size=5_000, flush_interval=1.0, checkpoint_interval=60.0):
+        self.queue = queue.Queue(maxsize)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.last_checkpoint = {}
+        self.dropped = 0
+        self.written = 0
+        self.closed = False
+        gauge("diff_recorder_queue_depth", "Book messages waiting to be written", fn=self.queue.qsize)
+        self.dropped_total = counter("diff_recorder_dropped_total", "Book messages dropped on a full queue")
+        self.flush_seconds = histogram("logger_flush_seconds", "Time to write one batch", {"log": "diffs"})
+        os.makedirs(DIFF_DIR, exist_ok=True)
+        self.thread = threading.Thread(target=self.drain)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def record(self, pair, recv_time, kind, payload):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait((pair, recv_time, kind, payload))
+        except queue.Full:
+            self.dropped += 1
+            self.dropped_total.inc()
+
+    def maybe_checkpoint(self, pair, book, now):
+        if now - self.last_checkpoint.get(pair, 0.0) < self.checkpoint_interval:
+            return
+        self.last_checkpoint[pair] = now
+        # Tick copies taken on the websocket thread; formatting happens in drain().
+        bids, asks = book.get_depth_ticks(len(book.bids) + len(book.asks))
+        self.record(pair, now, "checkpoint", (bids, asks))
+
+    def encode(self, pair, recv_time, kind, payload):
+        if kind == "checkpoint":
+            bids, asks = payload
+            payload = {
+                "as": [[format_price(p), format_volume(v)] for p, v in asks],
+                "bs": [[format_price(p), format_volume(v)] for p, v in bids],
+            }
+        return json.dumps({"t": recv_time, "x": exchange_time(payload), "kind": kind, "data": payload},
+                          separators=(",", ":"))
+
+    def write(self, batch):
+        lines = {}
+        for record in batch:
+            pair, recv_time = record[0], record[1]
+            lines.setdefault(get_diff_path(pair, recv_time), []).append(self.encode(*record))
+        for path, chunk in lines.items():
+            with open(path, "a") as f:
+                f.write("\n".join(chunk) + "\n")
+        self.written += len(batch)
+
+    def drain(self):
+        while True:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Records that raced past close() behind the sentinel are dropped.
+            closing = None in batch
+            if closing:
+                batch = batch[:batch.index(None)]
+            if batch:
+                with self.flush_seconds.time():
+                    self.write(batch)
+            if closing:
+                return
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+
+def start_capture(client, **kwargs):
+    # Attach a DiffRecorder to a KrakenClient; every applied book message is
+    # captured from then on.
+    recorder = DiffRecorder(**kwargs)
+    client.recorder = recorder
+    atexit.register(recorder.close)
+    return recorder
+
+def start_logger(interval=1.0, backend="csv", features=False, pairs=(PAIR,)):
+    # Logs every pair in pairs. backend="parquet" buffers snapshots in
+    # memory and flushes row groups under PARQUET_DIR, partitioned by pair
+    # and date. backend="wide" appends fixed-width memory-mappable arrays
+    # under WIDE_DIR/<pair>. features=True also logs the per-update feature
+    # stream (FEATURE_COLS). Returns {pair: store} (None for csv).
+    pairs = list(pairs)
+    stores = dict.fromkeys(pairs)
+    if backend == "parquet":
+        writer = ParquetSnapshotWriter(PARQUET_DIR)
+        atexit.register(writer.close)
+        stores = dict.fromkeys(pairs, writer)
+    elif backend == "wide":
+        for pair in pairs:
+            stores[pair] = WideSnapshotWriter(os.path.join(WIDE_DIR, pair.replace('/', '-')))
+            atexit.register(stores[pair].close)
+
+    snapshot_seconds = histogram("logger_flush_seconds", "Time to write one batch", {"log": "snapshots"})
+    feature_seconds = histogram("logger_flush_seconds", "Time to write one batch", {"log": "features"})
 
-def start_logger(interval=1.0):
     def loop():
+        seen = dict.fromkeys(pairs, 0)
+        # Sleep until the next slot on a fixed schedule so write time does
+        # not accumulate into drift.
+        next_tick = time.monotonic()
         while True:
-            write_snapshot()
-            time.sleep(interval)
+            with snapshot_seconds.time():
+                for pair in pairs:
+                    write_snapshot(stores[pair], pair)
+            if features:
+                with feature_seconds.time():
+                    for pair in pairs:
+                        seen[pair] = write_features(seen[pair], pair)
+            next_tick += interval
+            time.sleep(max(next_tick - time.monotonic(), 0))
 
     thread = threading.Thread(target=loop)
     thread.daemon = True
     thread.start()
+    return stores
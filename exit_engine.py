@@ -0,0 +1,137 @@
+# --- exit_engine.py ---
+# Bulk TP/SL first-passage search. Instead of scanning the future mid prices
+# of every signal row by row, we build sparse tables of forward max/min
+# (block extremes of length 2^k) once, then binary-lift all signals at the
+# same time: O((ticks + signals) * log ticks).
+# Crossings are decided on exact int64 half ticks (2 * price * PRICE_SCALE),
+# so "mid >= entry + TP" has no float rounding at the boundary.
+import numpy as np
+import pandas as pd
+
+from fixed_point import NO_HIGH, NO_LOW, to_ticks
+
+
+def half_ticks(prices):
+    prices = np.asarray(prices, dtype=float)
+    quoted = ~np.isnan(prices)
+    return to_ticks(np.where(quoted, prices, 0) * 2), quoted
+
+
+def build_extreme_tables(prices):
+    # NaN mids never trigger an exit, so they are neutral in both tables.
+    ticks, quoted = half_ticks(prices)
+    highs = [np.where(quoted, ticks, NO_HIGH)]
+    lows = [np.where(quoted, ticks, NO_LOW)]
+    width = 1
+    while 2 * width <= len(prices):
+        highs.append(np.maximum(highs[-1][:-width], highs[-1][width:]))
+        lows.append(np.minimum(lows[-1][:-width], lows[-1][width:]))
+        width *= 2
+    return highs, lows
+
+
+def first_crossing(tables, start, level, above, stop=None):
+    # First index j in [start, stop) with price >= level (above) or
+    # price <= level (below); stop when there is no crossing.
+    n = len(tables[0])
+    start = np.asarray(start, dtype=np.int64)
+    level = np.asarray(level, dtype=np.int64)
+    stop = np.full(start.shape, n, dtype=np.int64) if stop is None else np.asarray(stop, dtype=np.int64)
+
+    pos = start.copy()
+    for k in range(len(tables) - 1, -1, -1):
+        width = 1 << k
+        table = tables[k]
+        fits = pos + width <= stop
+        block = table[np.minimum(pos, len(table) - 1)]
+        clear = block < level if above else block > level
+        pos += width * (fits & clear)
+
+    inside = pos < stop
+    value = tables[0][np.minimum(pos, n - 1)]
+    hit = inside & ((value >= level) if above else (value <= level))
+    return np.where(hit, pos, stop)
+
+
+def first_passage_exits(mid_prices, start, entry_prices, directions, TP, SL, tables=None, stop=None):
+    # Returns (exit_index, is_take_profit, has_exit) per signal. TP is
+    # checked before SL on the same tick, matching the row-by-row loop.
+    # TP/SL may be per-signal arrays; stop bounds each search (e.g. to its
+    # own pair's row when several pairs share one flattened price array).
+    highs, lows = tables if tables is not None else build_extreme_tables(mid_prices)
+    entry, quoted = half_ticks(entry_prices)
+    tp, sl = 2 * to_ticks(TP), 2 * to_ticks(SL)
+    is_long = np.asarray(directions) == "LONG"
+    is_short = np.asarray(directions) == "SHORT"
+    stop = np.full(np.shape(start), len(highs[0]), dtype=np.int64) if stop is None else stop
+
+    long_tp = first_crossing(highs, start, entry + tp, above=True, stop=stop)
+    long_sl = first_crossing(lows, start, entry - sl, above=False, stop=stop)
+    short_tp = first_crossing(lows, start, entry - tp, above=False, stop=stop)
+    short_sl = first_crossing(highs, start, entry + sl, above=True, stop=stop)
+
+    tp_idx = np.where(is_long, long_tp, short_tp)
+    sl_idx = np.where(is_long, long_sl, short_sl)
+    is_tp = tp_idx <= sl_idx
+    exit_idx = np.where(is_tp, tp_idx, sl_idx)
+    has_exit = (is_long | is_short) & quoted & (exit_idx < stop)
+    return exit_idx, is_tp, has_exit
+
+
+def simulate_tp_sl_trades(signal_df, mid_price_df, capital, risk_pct, TP, SL,
+                          maker_fee, taker_fee, slippage, tables=None):
+    # Every signal opens an independent position at its price and exits on
+    # the first later mid that crosses TP or SL; same output as the old
+    # per-signal iterrows loop. Pass tables (build_extreme_tables of the
+    # time-ordered mids) to reuse them across calls on the same data.
+    mid_price_df = mid_price_df.sort_values("timestamp", kind="mergesort")
+    mid_ts = mid_price_df["timestamp"].to_numpy()
+    mid_prices = mid_price_df["mid_price"].to_numpy(dtype=float)
+
+    sig_ts = signal_df["timestamp"].to_numpy()
+    start = np.searchsorted(mid_ts, sig_ts, side="right")
+    # The loop stopped at the first signal with no future ticks.
+    no_future = np.flatnonzero(start >= len(mid_ts))
+    keep = no_future[0] if len(no_future) else len(signal_df)
+    signal_df = signal_df.iloc[:keep]
+    start = start[:keep]
+    if signal_df.empty:
+        return pd.DataFrame([])
+
+    entry_prices = signal_df["price"].to_numpy(dtype=float)
+    directions = signal_df["signal"].to_numpy()
+    exit_idx, is_tp, has_exit = first_passage_exits(mid_prices, start, entry_prices, directions, TP, SL,
+                                                    tables=tables)
+
+    is_long = directions == "LONG"
+    exit_prices = np.where(
+        is_long,
+        np.where(is_tp, entry_prices + TP - slippage, entry_prices - SL - slippage),
+        np.where(is_tp, entry_prices - TP + slippage, entry_prices + SL + slippage),
+    )
+    # A zero exit price was treated as "no exit" by the old truthiness check.
+    has_exit &= exit_prices != 0
+    if not has_exit.any():
+        return pd.DataFrame([])
+
+    risk_amount = capital * (risk_pct / 100)
+    position_size = risk_amount / SL
+    entry_prices, exit_prices, is_long = entry_prices[has_exit], exit_prices[has_exit], is_long[has_exit]
+    gross_pnl = np.where(is_long, (exit_prices - entry_prices) * position_size,
+                         (entry_prices - exit_prices) * position_size)
+    fees = entry_prices * position_size * (maker_fee + taker_fee)
+
+    trade_df = pd.DataFrame({
+        "entry_time": sig_ts[:keep][has_exit],
+        "exit_time": mid_ts[exit_idx[has_exit]],
+        "entry_price": entry_prices,
+        "exit_price": exit_prices,
+        "direction": directions[has_exit],
+        "position_size": position_size,
+        "gross_pnl": gross_pnl,
+        "fees": fees,
+        "net_pnl": gross_pnl - fees,
+    })
+    trade_df["cumulative_pnl"] = trade_df["net_pnl"].cumsum()
+    trade_df["equity"] = capital + trade_df["cumulative_pnl"]
+    return trade_df
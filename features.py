@@ -0,0 +1,67 @@
+# --- features.py ---
+# Microstructure features maintained per book update inside KrakenClient.
+# The engine listens to LocalOrderBook level changes, so depth totals and
+# wall levels move by O(changed levels); top-of-book features are O(1).
+# Every update is published to feature_stream(pair). Trading signals are
+# not decided here; they come from a strategies.Strategy run by the client.
+from types import MappingProxyType
+
+from client_shared import feature_stream
+from fixed_point import PRICE_SCALE, VOLUME_SCALE, to_tick, volume_limit
+
+
+class FeatureEngine:
+    def __init__(self, pair, wall_threshold=15, proximity_ticks=20):
+        self.pair = pair
+        # Walls as in strategy_liquidity: lots > limit within proximity_ticks
+        # of mid, compared in half ticks.
+        self.wall_limit = int(volume_limit(wall_threshold))
+        self.reach = 2 * to_tick(proximity_ticks)
+        self.totals = {"b": 0, "a": 0}
+        # Levels above the wall limit, price -> lots; usually a handful.
+        self.walls = {"b": {}, "a": {}}
+        self.features = feature_stream(pair)
+
+    def level(self, side, price, old, volume):
+        self.totals[side] += volume - old
+        if volume > self.wall_limit:
+            self.walls[side][price] = volume
+        elif old > self.wall_limit:
+            self.walls[side].pop(price, None)
+
+    def cleared(self):
+        self.totals = {"b": 0, "a": 0}
+        self.walls = {"b": {}, "a": {}}
+
+    def largest_wall(self, side, half):
+        if side == "b":
+            near = [(v, p) for p, v in self.walls["b"].items() if 2 * p >= half - self.reach]
+        else:
+            near = [(v, p) for p, v in self.walls["a"].items() if 2 * p <= half + self.reach]
+        return max(near, default=None)
+
+    def publish(self, book, timestamp):
+        (bid, bid_size), (ask, ask_size) = book.top_ticks()
+        if bid is None or ask is None:
+            return None
+
+        half = bid + ask
+        top_size = bid_size + ask_size
+        depth_size = self.totals["b"] + self.totals["a"]
+        imbalance = (bid_size - ask_size) / top_size
+        depth_imbalance = (self.totals["b"] - self.totals["a"]) / depth_size if depth_size else 0.0
+
+        bid_wall = self.largest_wall("b", half)
+        ask_wall = self.largest_wall("a", half)
+        record = MappingProxyType({
+            "timestamp": timestamp,
+            "mid": half / (2 * PRICE_SCALE),
+            "spread": (ask - bid) / PRICE_SCALE,
+            "microprice": (bid * ask_size + ask * bid_size) / top_size / PRICE_SCALE,
+            "imbalance": imbalance,
+            "depth_imbalance": depth_imbalance,
+            "bid_wall": None if bid_wall is None else (bid_wall[1] / PRICE_SCALE, bid_wall[0] / VOLUME_SCALE),
+            "ask_wall": None if ask_wall is None else (ask_wall[1] / PRICE_SCALE, ask_wall[0] / VOLUME_SCALE),
+        })
+        self.features.publish(record)
+        return record
@@ -0,0 +1,173 @@
+# --- feed.py ---
+# asyncio fan-out of every KrakenClient update to any number of
+# subscribers, as an async iterator each:
+#
+#     async with client.subscribe(["XBT/USD"], kinds=("book",)) as updates:
+#         async for pair, kind, data in updates:
+#             ...
+#
+# Updates are queued by the publisher itself, under the subscription's
+# lock, whichever thread it runs on. A subscriber in the same event loop
+# (await client.connect()) is woken directly; one in another loop (e.g.
+# client.start() runs its own thread) gets at most one pending
+# call_soon_threadsafe wake-up, so a stalled loop never accumulates
+# callbacks and its queue stays bounded by the policy below.
+# Each subscriber has its own bounded queue, so a slow consumer never
+# blocks ingest or the other subscribers. When it falls behind:
+#   "drop"      the oldest queued update is dropped once maxsize is reached
+#   "conflate"  only the newest update per (pair, kind) is kept; a queued
+#               update is replaced in place, so ordering across keys holds
+import asyncio
+import threading
+from collections import deque, namedtuple
+
+from metrics import counter
+
+# kind: "book" (snapshot mapping), "features" (FeatureEngine record) or
+# "signal" (strategy signal change).
+Update = namedtuple("Update", "pair kind data")
+POLICIES = ("drop", "conflate")
+
+
+class Subscription:
+    def __init__(self, feed, pairs=None, kinds=None, maxsize=1024, policy="drop"):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, got {policy!r}")
+        self.feed = feed
+        self.pairs = None if pairs is None else frozenset(pairs)
+        self.kinds = None if kinds is None else frozenset(kinds)
+        self.maxsize = maxsize
+        self.policy = policy
+        self.loop = asyncio.get_running_loop()
+        self.lock = threading.Lock()
+        self.queue = deque()
+        # conflate: queue holds (pair, kind) keys, pending the newest update.
+        self.pending = {}
+        self.waiter = None
+        self.wake_pending = False
+        self.closed = False
+        self.dropped = 0
+        self.dropped_total = counter("feed_dropped_total", "Updates dropped or conflated for slow subscribers",
+                                     {"policy": policy})
+
+    def wants(self, pair, kind):
+        return ((self.pairs is None or pair in self.pairs)
+                and (self.kinds is None or kind in self.kinds))
+
+    def put(self, update, running=None):
+        # Runs on the publisher's thread; running is its event loop, if any.
+        # Raises RuntimeError when self.loop has been closed.
+        if self.closed:
+            return
+        with self.lock:
+            if self.policy == "conflate":
+                key = (update.pair, update.kind)
+                if key in self.pending:
+                    self.dropped += 1
+                    self.dropped_total.inc()
+                else:
+                    self.queue.append(key)
+                self.pending[key] = update
+            else:
+                if len(self.queue) >= self.maxsize:
+                    self.queue.popleft()
+                    self.dropped += 1
+                    self.dropped_total.inc()
+                self.queue.append(update)
+            if running is not self.loop:
+                if self.loop.is_closed():
+                    raise RuntimeError("subscriber's event loop is closed")
+                if self.wake_pending:
+                    return
+                self.wake_pending = True
+        if running is self.loop:
+            self.wake()
+        else:
+            self.loop.call_soon_threadsafe(self.wake)
+
+    def wake(self):
+        # Runs on self.loop.
+        with self.lock:
+            self.wake_pending = False
+        waiter = self.waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def qsize(self):
+        return len(self.queue)
+
+    def get_nowait(self):
+        with self.lock:
+            item = self.queue.popleft()
+            return self.pending.pop(item) if self.policy == "conflate" else item
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.queue:
+            if self.closed:
+                raise StopAsyncIteration
+            self.waiter = self.loop.create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+        return self.get_nowait()
+
+    def close(self):
+        # Stops delivery; the iterator ends once the queue is drained.
+        self.feed.unsubscribe(self)
+        self.closed = True
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.wake()
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.wake)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+class Feed:
+    def __init__(self):
+        # Replaced, never mutated, so publish() can iterate it from the
+        # websocket thread while subscribers come and go.
+        self.subscribers = ()
+
+    def subscribe(self, pairs=None, kinds=None, maxsize=1024, policy="drop"):
+        # Must be called from inside the consuming event loop.
+        subscription = Subscription(self, pairs, kinds, maxsize, policy)
+        self.subscribers = self.subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers = tuple(s for s in self.subscribers if s is not subscription)
+
+    def publish(self, pair, kind, data):
+        subscribers = self.subscribers
+        if not subscribers:
+            return
+        update = Update(pair, kind, data)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for subscription in subscribers:
+            if not subscription.wants(pair, kind):
+                continue
+            try:
+                subscription.put(update, running)
+            except RuntimeError:
+                # Its loop has shut down.
+                self.unsubscribe(subscription)
+
+    def close(self):
+        for subscription in self.subscribers:
+            subscription.close()
@@ -0,0 +1,70 @@
+# --- fixed_point.py ---
+# Tick-scaled int64 prices and volumes. Kraken v1 book levels arrive as
+# decimal strings with 5 (price) and 8 (volume) decimals, so both map onto
+# exact integers: no float keys in the book and exact comparisons in the
+# strategy/backtest arithmetic. Mid prices are kept as "half ticks"
+# (best_bid + best_ask) so they stay integral too. A live level finer than
+# the scale is rejected by parse_fixed and KrakenClient resyncs that pair
+# only; float CSV columns go through to_ticks and are rounded to it.
+import numpy as np
+
+PRICE_DECIMALS = 5
+VOLUME_DECIMALS = 8
+PRICE_SCALE = 10 ** PRICE_DECIMALS
+VOLUME_SCALE = 10 ** VOLUME_DECIMALS
+
+# Sentinels for "no level" in int64 arrays.
+NO_HIGH = np.iinfo(np.int64).min
+NO_LOW = np.iinfo(np.int64).max
+
+
+def parse_fixed(text, decimals):
+    # "5541.30000" -> 554130000 (decimals=5) without going through float.
+    # Extra non-zero digits would merge distinct levels into one key, so
+    # they are an error rather than being cut off.
+    whole, _, frac = text.partition(".")
+    if len(frac) > decimals:
+        if frac[decimals:].strip("0"):
+            raise ValueError(f"{text!r} has more than {decimals} decimals")
+        frac = frac[:decimals]
+    return int(whole + frac.ljust(decimals, "0"))
+
+
+def parse_price(text):
+    return parse_fixed(text, PRICE_DECIMALS)
+
+
+def parse_volume(text):
+    return parse_fixed(text, VOLUME_DECIMALS)
+
+
+def to_ticks(values, scale=PRICE_SCALE):
+    # Float values (e.g. parsed CSV columns) -> nearest int64 ticks.
+    return np.rint(np.asarray(values, dtype=float) * scale).astype(np.int64)
+
+
+def to_tick(value, scale=PRICE_SCALE):
+    return int(round(value * scale))
+
+
+def volume_limit(threshold):
+    # volume > threshold  <=>  lots > threshold in lots; the threshold goes
+    # through its decimal text so e.g. 0.29 is not floored to 0.28999999.
+    threshold = np.asarray(threshold, dtype=float)
+    lots = [parse_fixed(f"{t:.{VOLUME_DECIMALS}f}", VOLUME_DECIMALS) for t in threshold.ravel()]
+    return np.array(lots, dtype=np.int64).reshape(threshold.shape)
+
+
+def format_fixed(value, decimals):
+    # Inverse of parse_fixed: 554130000 -> "5541.30000" (decimals=5).
+    sign = "-" if value < 0 else ""
+    whole, frac = divmod(abs(int(value)), 10 ** decimals)
+    return f"{sign}{whole}.{frac:0{decimals}d}"
+
+
+def format_price(ticks):
+    return format_fixed(ticks, PRICE_DECIMALS)
+
+
+def format_volume(lots):
+    return format_fixed(lots, VOLUME_DECIMALS)
@@ -0,0 +1,138 @@
+# --- frame_cache.py ---
+# Content-addressed on-disk cache for derived backtest frames (mid prices,
+# signals). A key hashes the stage name, the parameters and a fingerprint
+# of the source files (path, size, mtime), so a log that grows or is
+# rewritten gets new keys and its old entries simply age out. Frames are
+# stored as Feather files; the total size is bounded with LRU eviction by
+# last use (the file mtime is bumped on every hit).
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sys
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from loader import resolve_paths
+from parquet_store import is_parquet_path
+from wide_store import is_wide_path
+
+DEFAULT_CACHE_DIR = ".backtest_cache"
+# (path, size, mtime) -> sha256 of a module source file.
+MODULE_HASHES = {}
+
+
+def source_files(data_path, pair=None, start=None, end=None):
+    # The files a BacktestEngine load would read for these arguments.
+    if is_wide_path(data_path) or (is_parquet_path(data_path) and os.path.isdir(data_path)):
+        files = []
+        for root, dirs, names in os.walk(data_path):
+            dirs.sort()
+            # "_"-prefixed Parquet parts are still being written.
+            files.extend(os.path.join(root, n) for n in sorted(names) if not n.startswith((".", "_part")))
+        return files
+    if is_parquet_path(data_path):
+        return [data_path]
+    return resolve_paths(data_path, pair, start, end)
+
+
+def fingerprint(files):
+    entries = []
+    for path in files:
+        stat = os.stat(path)
+        entries.append((os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+    return hashlib.sha256(json.dumps(entries).encode()).hexdigest()
+
+
+def module_hash(module_name):
+    # sha256 of the module's source file, or None when it has none.
+    path = getattr(sys.modules.get(module_name), "__file__", None)
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        if key not in MODULE_HASHES:
+            with open(path, "rb") as f:
+                MODULE_HASHES[key] = hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+    return MODULE_HASHES[key]
+
+
+def callable_key(fn):
+    # Strategy identity for cache keys: qualified name, partial arguments,
+    # a hash of its own source and of its whole defining module (so editing
+    # a helper it calls invalidates it too), and its cache_version attribute
+    # if any, to bump by hand when it depends on code in other modules.
+    if isinstance(fn, functools.partial):
+        return [callable_key(fn.func), repr(fn.args), repr(sorted(fn.keywords.items()))]
+    if not (inspect.isroutine(fn) or inspect.isclass(fn)):
+        # Strategy objects: their class source plus their repr (parameters).
+        return [callable_key(type(fn)), repr(fn)]
+    try:
+        source = hashlib.sha256(inspect.getsource(fn).encode()).hexdigest()
+    except (OSError, TypeError):
+        source = None
+    module = getattr(fn, "__module__", None)
+    return [module, getattr(fn, "__qualname__", repr(fn)), source, module_hash(module),
+            getattr(fn, "cache_version", None)]
+
+
+class FrameCache:
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=2 * 2**30):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, stage, source, params):
+        blob = json.dumps([stage, source, params], sort_keys=True, default=str)
+        return f"{stage}-{hashlib.sha256(blob.encode()).hexdigest()[:32]}"
+
+    def path(self, key):
+        return os.path.join(self.root, key + ".feather")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            df = feather.read_feather(path)
+        except (FileNotFoundError, OSError):
+            return None
+        os.utime(path)
+        return df
+
+    def put(self, key, df):
+        path = self.path(key)
+        tmp_path = path + ".tmp"
+        feather.write_feather(df.reset_index(drop=True), tmp_path, compression="lz4")
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def cached(self, stage, source, params, compute):
+        key = self.key(stage, source, params)
+        df = self.get(key)
+        if df is None:
+            df = compute()
+            if isinstance(df, pd.DataFrame):
+                self.put(key, df)
+        return df
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if name.endswith(".feather"):
+                stat = os.stat(os.path.join(self.root, name))
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.root, name))
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.root):
+            if name.endswith(".feather"):
+                os.remove(os.path.join(self.root, name))
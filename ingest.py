@@ -0,0 +1,64 @@
+# --- ingest.py ---
+# Ingest + logging process for the split deployment:
+#     python ingest.py --pairs XBT/USD          # websocket, books, logger
+#     python app.py --shm                       # dashboard, separate process
+# The client publishes in-process as usual (the logger reads that) and also
+# writes every book update to a ShmBook segment and every strategy signal
+# change to a ShmRing, which is all the dashboard reads. Figure building
+# and JSON serialization in the Dash process never touch this GIL.
+import argparse
+
+from data_logger import start_logger
+from kraken_client import KrakenClient
+from shm_books import SIGNAL_RING_FIELDS, ShmBook, ShmRing, encode_signal, ring_name
+from strategies import ImbalanceStrategy
+
+
+class ShmPublishingClient(KrakenClient):
+    def __init__(self, pairs, uri="wss://ws.kraken.com", depth=10, strategy=None, prefix="kraken",
+                 ring_size=4_096):
+        super().__init__(pairs=pairs, uri=uri, depth=depth, strategy=strategy)
+        self.shm_books = {pair: ShmBook.create(pair, depth, prefix) for pair in self.pairs}
+        self.shm_signals = {pair: ShmRing.create(ring_name(pair, "signals", prefix), SIGNAL_RING_FIELDS, ring_size)
+                            for pair in self.pairs}
+
+    def publish(self, pair, timestamp, bids, asks, record):
+        super().publish(pair, timestamp, bids, asks, record)
+        self.shm_books[pair].write(timestamp, bids, asks, record)
+
+    def publish_signal(self, pair, record):
+        super().publish_signal(pair, record)
+        self.shm_signals[pair].append(encode_signal(record))
+
+    def close(self):
+        for segment in (*self.shm_books.values(), *self.shm_signals.values()):
+            segment.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kraken ingest and logging process feeding the dashboard")
+    parser.add_argument("--pairs", nargs="+", default=["XBT/USD"])
+    parser.add_argument("--uri", default="wss://ws.kraken.com")
+    parser.add_argument("--depth", type=int, default=10)
+    parser.add_argument("--prefix", default="kraken", help="shared memory segment name prefix")
+    parser.add_argument("--imbalance-threshold", type=float, default=0.6)
+    parser.add_argument("--log-interval", type=float, default=1.0)
+    parser.add_argument("--backend", choices=("csv", "parquet", "wide"), default="csv")
+    parser.add_argument("--no-logger", action="store_true")
+    args = parser.parse_args()
+
+    client = ShmPublishingClient(args.pairs, args.uri, args.depth, ImbalanceStrategy(args.imbalance_threshold),
+                                 args.prefix)
+    if not args.no_logger:
+        start_logger(interval=args.log_interval, backend=args.backend, pairs=args.pairs)
+    print(f"📡 Ingesting {', '.join(args.pairs)}; dashboard: python app.py --shm --prefix {args.prefix}")
+    try:
+        client.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
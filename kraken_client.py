@@ -5,12 +5,22 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # --- kraken_client.py ---
 import asyncio
+import copy
 import websockets
 import json
 import threading
 import time
-from collections import OrderedDict
-from client_shared import shared_state, state_lock
+import zlib
+from itertools import islice
+from operator import neg
+from sortedcontainers import SortedDict
+from types import MappingProxyType
+from client_shared import channel, shared_state, strategy_stream
+from features import FeatureEngine
+from feed import Feed
+from fixed_point import PRICE_SCALE, VOLUME_SCALE, parse_price, parse_volume
+from metrics import counter, histogram
+from strategies import snapshot_mid
 
 import ssl
 import certifi
@@ -21,79 +31,265 @@ ssl_context = ssl._create_unverified_context()
 # ssl_context = ssl.create_default_context(cafile=certifi.where())
 
 class LocalOrderBook:
-    def __init__(self):
-        self.bids = OrderedDict()
-        self.asks = OrderedDict()
+    # Price levels live in SortedDicts: O(log n) insert/delete per level and
+    # O(k) top-k reads, instead of re-sorting the whole side on every message.
+    # Keys are int64 price ticks and values volume lots (see fixed_point), so
+    # deletes always hit the exact key the level was inserted with.
+    def __init__(self, depth=None, listener=None):
+        # depth: subscribed book depth. Kraken does not send deletes for
+        # levels pushed out of range, so the book is truncated to it.
+        # listener: optional object told about every level change
+        # (level(side, price, old, volume) / cleared()), e.g. FeatureEngine.
+        self.depth = depth
+        self.listener = listener
+        self.bids = SortedDict(neg)
+        self.asks = SortedDict()
+        # Per-level checksum fragments, built once when a level changes.
+        self.fragments = {"b": {}, "a": {}}
+
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.fragments["b"].clear()
+        self.fragments["a"].clear()
+        if self.listener is not None:
+            self.listener.cleared()
 
     def update(self, updates, side):
         book = self.bids if side == "b" else self.asks
+        fragments = self.fragments[side]
+        listener = self.listener
         for update in updates:
-            price, volume = float(update[0]), float(update[1])
+            price, volume = parse_price(update[0]), parse_volume(update[1])
             if volume == 0:
-                book.pop(price, None)
+                old = book.pop(price, 0)
+                fragments.pop(price, None)
             else:
+                old = book.get(price, 0)
                 book[price] = volume
+                fragments[price] = _checksum_fragment(update[0], update[1])
+            if listener is not None:
+                listener.level(side, price, old, volume)
+        if self.depth is not None:
+            while len(book) > self.depth:
+                price, old = book.popitem(-1)
+                fragments.pop(price, None)
+                if listener is not None:
+                    listener.level(side, price, old, 0)
 
-        sorted_items = sorted(book.items(), reverse=(side == "b"))
-        if side == "b":
-            self.bids = OrderedDict(sorted_items)
-        else:
-            self.asks = OrderedDict(sorted_items)
+    def checksum(self, levels=10):
+        # Kraken v1 book checksum: CRC32 over the top asks then bids, each
+        # level as price and volume digits without "." and leading zeros.
+        # Fragments are cached per level, so this is 2 * levels crc32 steps.
+        crc = 0
+        for side, book in (("a", self.asks), ("b", self.bids)):
+            fragments = self.fragments[side]
+            for price in islice(book.keys(), levels):
+                crc = zlib.crc32(fragments[price], crc)
+        return crc
 
-    def top(self):
-        bid = next(iter(self.bids.items()), (None, None))
-        ask = next(iter(self.asks.items()), (None, None))
+    def top_ticks(self):
+        bid = self.bids.peekitem(0) if self.bids else (None, None)
+        ask = self.asks.peekitem(0) if self.asks else (None, None)
         return bid, ask
 
+    def get_depth_ticks(self, depth=20):
+        bids = list(islice(self.bids.items(), depth))
+        asks = list(islice(self.asks.items(), depth))
+        return bids, asks
+
+    def top(self):
+        bid, ask = self.top_ticks()
+        return _level_to_float(bid), _level_to_float(ask)
+
     def get_depth(self, depth=20):
-        bids = list(self.bids.items())[:depth]
-        asks = list(self.asks.items())[:depth]
+        bids = [(p / PRICE_SCALE, v / VOLUME_SCALE) for p, v in islice(self.bids.items(), depth)]
+        asks = [(p / PRICE_SCALE, v / VOLUME_SCALE) for p, v in islice(self.asks.items(), depth)]
         return bids, asks
 
+
+def _checksum_fragment(price, volume):
+    return (price.replace(".", "").lstrip("0") + volume.replace(".", "").lstrip("0")).encode()
+
+
+def _level_to_float(level):
+    price, volume = level
+    if price is None:
+        return level
+    return price / PRICE_SCALE, volume / VOLUME_SCALE
+
 class KrakenClient:
-    def __init__(self, pairs=["XBT/USD"]):
+    def __init__(self, pairs=["XBT/USD"], uri="wss://ws.kraken.com", depth=10, strategy=None):
         self.pairs = pairs
-        self.uri = "wss://ws.kraken.com"
-        self.books = {pair: LocalOrderBook() for pair in self.pairs}
+        self.uri = uri
+        self.depth = depth
+        self.features = {pair: FeatureEngine(pair) for pair in self.pairs}
+        self.books = {pair: LocalOrderBook(depth, self.features[pair]) for pair in self.pairs}
+        self.channels = {pair: channel(pair) for pair in self.pairs}
+        # Optional strategies.Strategy run on every update through its
+        # streaming path (one copy per pair, as it may keep state); signal
+        # changes go to strategy_stream(pair).
+        self.strategies = {pair: copy.deepcopy(strategy) for pair in self.pairs} if strategy is not None else {}
+        self.strategy_signals = {pair: None for pair in self.pairs}
+        # asyncio fan-out of every book/feature/signal update (see feed.py).
+        self.feed = Feed()
+        # Pairs whose checksum failed: updates are ignored until the fresh
+        # snapshot from the resubscription arrives.
+        self.resyncing = set()
+        self.resync_queue = []
+        self.checksum_failures = {pair: 0 for pair in self.pairs}
+        # Optional data_logger.DiffRecorder: gets every applied book message.
+        self.recorder = None
+        self.messages = counter("kraken_messages_total", "Websocket messages received")
+        self.handle_seconds = histogram("kraken_handle_seconds", "Time to apply and publish one message")
         self.thread = threading.Thread(target=self.run)
         self.thread.daemon = True
 
+    def subscription(self):
+        return {"name": "book", "depth": self.depth}
+
+    def subscribe(self, pairs=None, kinds=None, maxsize=1024, policy="drop"):
+        # Async iterator of Update(pair, kind, data) for this client; call it
+        # inside the loop that consumes it. For no thread handoff, run the
+        # client in that loop too (await client.connect() instead of start()).
+        return self.feed.subscribe(pairs, kinds, maxsize, policy)
+
     async def connect(self):
-        async with websockets.connect(self.uri, ssl=ssl_context) as ws:
+        # ws:// URIs (e.g. the local stand-in server) must not get an SSL context.
+        ssl_arg = ssl_context if self.uri.startswith("wss://") else None
+        async with websockets.connect(self.uri, ssl=ssl_arg) as ws:
             await ws.send(json.dumps({
                 "event": "subscribe",
                 "pair": self.pairs,
-                "subscription": {"name": "book"}
+                "subscription": self.subscription()
             }))
             while True:
                 message = await ws.recv()
-                self.handle(json.loads(message))
+                self.on_message(message)
+                while self.resync_queue:
+                    await self.resubscribe(ws, self.resync_queue.pop())
+
+    async def resubscribe(self, ws, pair):
+        # Only the drifted pair is re-requested; Kraken answers with a new snapshot.
+        for event in ("unsubscribe", "subscribe"):
+            await ws.send(json.dumps({
+                "event": event,
+                "pair": [pair],
+                "subscription": self.subscription()
+            }))
 
-    def handle(self, msg):
+    def resync(self, pair, reason="Checksum mismatch"):
+        print(f"🔧 {reason} on {pair}, resubscribing...")
+        self.books[pair].clear()
+        self.resyncing.add(pair)
+        self.resync_queue.append(pair)
+        if self.recorder is not None:
+            self.recorder.record(pair, time.time(), "reset", {})
+
+    def on_message(self, message):
+        recv_time = time.time()
+        self.messages.inc()
+        msg = json.loads(message)
+        start = time.perf_counter()
+        self.handle(msg, recv_time)
+        self.handle_seconds.observe(time.perf_counter() - start)
+
+    def handle(self, msg, recv_time=None):
         if isinstance(msg, list) and len(msg) > 1:
-            data = msg[1]
             pair = msg[-1]
             book = self.books[pair]
 
-            if 'b' in data:
-                book.update(data['b'], 'b')
-            if 'a' in data:
-                book.update(data['a'], 'a')
+            # Book messages are [channelID, payload..., channelName, pair];
+            # an update touching both sides carries separate "a" and "b"
+            # payloads, and the initial snapshot uses "as"/"bs".
+            checksum = None
+            try:
+                for data in msg[1:-1]:
+                    if not isinstance(data, dict):
+                        continue
+                    if 'as' in data or 'bs' in data:
+                        book.clear()
+                        self.resyncing.discard(pair)
+                        book.update(data.get('bs', []), 'b')
+                        book.update(data.get('as', []), 'a')
+                    if pair in self.resyncing:
+                        return
+                    if 'b' in data:
+                        book.update(data['b'], 'b')
+                    if 'a' in data:
+                        book.update(data['a'], 'a')
+                    checksum = data.get('c', checksum)
+            except ValueError as exc:
+                # A level finer than the fixed-point scale (fixed_point.py):
+                # the book may be half updated, so drop it and re-request
+                # this pair only; the other pairs keep streaming.
+                counter("kraken_parse_errors_total", "Book levels that could not be parsed", {"pair": pair}).inc()
+                self.resync(pair, f"Unparseable level ({exc})")
+                return
+
+            recorder = self.recorder
+            if recorder is not None:
+                payload = {k: v for data in msg[1:-1] if isinstance(data, dict) for k, v in data.items()}
+                kind = "snapshot" if 'as' in payload or 'bs' in payload else "diff"
+                recorder.record(pair, recv_time or time.time(), kind, payload)
+
+            if checksum is not None and int(checksum) != book.checksum():
+                self.checksum_failures[pair] += 1
+                counter("kraken_checksum_failures_total", "Book checksum mismatches", {"pair": pair}).inc()
+                self.resync(pair)
+                return
 
-            bid, ask = book.top()
             bids, asks = book.get_depth()
+            timestamp = time.time()
+            # Imbalance/microprice/wall features for every update, not just
+            # whatever the dashboard happens to sample.
+            record = self.features[pair].publish(book, timestamp)
+            if recorder is not None:
+                recorder.maybe_checkpoint(pair, book, timestamp)
+            self.publish(pair, timestamp, bids, asks, record)
+            strategy = self.strategies.get(pair)
+            if strategy is not None:
+                self.run_strategy(pair, strategy, timestamp, bids, asks)
+
+    def publish(self, pair, timestamp, bids, asks, record):
+        # In-process publication of one applied update (shm_books.ShardClient
+        # publishes to shared memory instead).
+        bid = bids[0] if bids else (None, None)
+        ask = asks[0] if asks else (None, None)
+        snapshot = MappingProxyType({
+            "bid_price": bid[0],
+            "bid_size": bid[1],
+            "ask_price": ask[0],
+            "ask_size": ask[1],
+            "timestamp": timestamp,
+            "bids": tuple(bids),
+            "asks": tuple(asks)
+        })
+        # Lock-free: readers pick up whole snapshots via channel(pair).
+        self.channels[pair].publish(snapshot)
+        shared_state[pair] = snapshot
+        feed = self.feed
+        if feed.subscribers:
+            feed.publish(pair, "book", snapshot)
+            if record is not None:
+                feed.publish(pair, "features", record)
 
-            with state_lock:
-                shared_state[pair] = {
-                "bid_price": bid[0],
-                "bid_size": bid[1],
-                "ask_price": ask[0],
-                "ask_size": ask[1],
-                "timestamp": time.time(),
-                "bids": bids,
-                "asks": asks
-                }
+    def run_strategy(self, pair, strategy, timestamp, bids, asks):
+        result = strategy.on_snapshot(timestamp, bids, asks)
+        signal, price = result if result is not None else (None, None)
+        if signal == self.strategy_signals[pair]:
+            return
+        self.strategy_signals[pair] = signal
+        self.publish_signal(pair, MappingProxyType({
+            "timestamp": timestamp,
+            "mid": snapshot_mid(bids, asks),
+            "signal": signal,
+            "price": price,
+        }))
 
+    def publish_signal(self, pair, record):
+        strategy_stream(pair).publish(record)
+        self.feed.publish(pair, "signal", record)
 
     def run(self):
         asyncio.run(self.connect())
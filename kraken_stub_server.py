@@ -0,0 +1,243 @@
+# --- kraken_stub_server.py ---
+# Local stand-in for wss://ws.kraken.com speaking the v1 "book" channel:
+# subscribe -> subscriptionStatus -> snapshot ("as"/"bs") -> level updates
+# with checksums, plus heartbeats and per-pair unsubscribe/resubscribe.
+# Updates are synthetic (random walk around a mid) or replayed from a JSONL
+# file of recorded raw book messages, at a fixed rate.
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+import zlib
+
+import websockets
+
+HEARTBEAT_INTERVAL = 1.0
+
+
+def _text(price, volume):
+    return f"{price:.5f}", f"{volume:.8f}"
+
+
+def _checksum(asks, bids, levels=10):
+    parts = []
+    for book, reverse in ((asks, False), (bids, True)):
+        for price in sorted(book, reverse=reverse)[:levels]:
+            p, v = _text(price, book[price])
+            parts.append(p.replace(".", "").lstrip("0") + v.replace(".", "").lstrip("0"))
+    return zlib.crc32("".join(parts).encode())
+
+
+class SyntheticBook:
+    # Random-walk book for one pair. Prices/volumes use Kraken's v1 text
+    # format (5 and 8 decimals); every level is stamped with the send time,
+    # so clients can measure send -> publish latency.
+    def __init__(self, channel_id, pair, depth=10, seed=0, mid=100_000.0, tick=0.1):
+        self.channel_id = channel_id
+        self.pair = pair
+        self.depth = depth
+        self.rng = random.Random(seed)
+        self.mid = mid
+        self.tick = tick
+        self.bids = {round(mid - tick * (i + 1), 5): self.rng.uniform(0.01, 5) for i in range(depth)}
+        self.asks = {round(mid + tick * (i + 1), 5): self.rng.uniform(0.01, 5) for i in range(depth)}
+
+    def _level(self, price, volume, ts):
+        return [*_text(price, volume), f"{ts:.6f}"]
+
+    def snapshot(self, ts):
+        return json.dumps([
+            self.channel_id,
+            {"as": [self._level(p, self.asks[p], ts) for p in sorted(self.asks)],
+             "bs": [self._level(p, self.bids[p], ts) for p in sorted(self.bids, reverse=True)]},
+            f"book-{self.depth}", self.pair,
+        ])
+
+    def update(self, ts):
+        rng = self.rng
+        side = rng.choice("ab")
+        book = self.bids if side == "b" else self.asks
+        sign = -1 if side == "b" else 1
+        price = round(self.mid + sign * self.tick * rng.randint(1, self.depth), 5)
+        if price in book and rng.random() < 0.3:
+            volume = 0.0
+            del book[price]
+        else:
+            volume = rng.uniform(0.01, 5)
+            book[price] = volume
+            # Subscribers keep `depth` levels, so the stand-in does too;
+            # otherwise a deletion would surface a level they never saw.
+            if len(book) > self.depth:
+                del book[min(book) if side == "b" else max(book)]
+        if rng.random() < 0.01:
+            self.mid = round(self.mid + self.tick * rng.choice((-1, 1)), 5)
+        return json.dumps([
+            self.channel_id,
+            {side: [self._level(price, volume, ts)], "c": str(_checksum(self.asks, self.bids))},
+            f"book-{self.depth}", self.pair,
+        ])
+
+
+class RecordedBook:
+    # Raw book messages for one pair, one JSON array per line, replayed as
+    # recorded and restarted from the top on resubscribe.
+    def __init__(self, path, pair):
+        with open(path) as f:
+            lines = [line.strip() for line in f if line.strip()]
+        self.lines = [line for line in lines if json.loads(line)[-1] == pair]
+        self.cursor = iter(())
+
+    def snapshot(self, ts):
+        self.cursor = itertools.cycle(self.lines)
+        return next(self.cursor)
+
+    def update(self, ts):
+        return next(self.cursor)
+
+
+class KrakenStubServer:
+    def __init__(self, host="127.0.0.1", port=8765, rate=1000, depth=10, source=None,
+                 max_messages=None, seed=0, drop_every=None, drop_pairs=None):
+        # rate is messages per second across all subscribed pairs; 0 means
+        # send as fast as the socket allows. drop_every=N silently skips
+        # every Nth update of each pair in drop_pairs (default: every pair)
+        # so clients see a checksum mismatch.
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.depth = depth
+        self.source = source
+        self.max_messages = max_messages
+        self.seed = seed
+        self.drop_every = drop_every
+        self.drop_pairs = None if drop_pairs is None else set(drop_pairs)
+        self.sent = 0
+        self.ready = threading.Event()
+        self.loop = None
+        self.server = None
+
+    @property
+    def uri(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def make_book(self, channel_id, pair):
+        if self.source:
+            return RecordedBook(self.source, pair)
+        return SyntheticBook(channel_id, pair, self.depth, self.seed + channel_id)
+
+    async def handler(self, ws):
+        books, active = {}, {}
+        # One channel ID per pair for the whole connection, kept across
+        # unsubscribe/resubscribe as Kraken does.
+        channel_ids = {}
+        pump = None
+        heartbeat = asyncio.create_task(self._heartbeat(ws))
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                event = msg.get("event")
+                for pair in msg.get("pair", []):
+                    if event == "subscribe":
+                        channel_id = channel_ids.setdefault(pair, len(channel_ids) + 1)
+                        book = books.get(pair) or books.setdefault(pair, self.make_book(channel_id, pair))
+                        await ws.send(json.dumps({
+                            "channelID": channel_id, "channelName": f"book-{self.depth}",
+                            "event": "subscriptionStatus", "pair": pair, "status": "subscribed",
+                            "subscription": {"depth": self.depth, "name": "book"},
+                        }))
+                        await ws.send(book.snapshot(time.time()))
+                        active[pair] = book
+                    elif event == "unsubscribe":
+                        active.pop(pair, None)
+                        await ws.send(json.dumps({
+                            "event": "subscriptionStatus", "pair": pair, "status": "unsubscribed",
+                            "subscription": {"depth": self.depth, "name": "book"},
+                        }))
+                if pump is None and active:
+                    pump = asyncio.create_task(self._pump(ws, active))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            heartbeat.cancel()
+            if pump is not None:
+                pump.cancel()
+
+    async def _heartbeat(self, ws):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await ws.send('{"event":"heartbeat"}')
+
+    async def _pump(self, ws, active):
+        interval = 1.0 / self.rate if self.rate else 0.0
+        start = time.perf_counter()
+        sent = 0
+        per_pair = {}
+        while self.max_messages is None or sent < self.max_messages:
+            if not active:
+                # Every pair unsubscribed (e.g. mid-resync): idle without
+                # banking the gap as a backlog to catch up on.
+                await asyncio.sleep(0.001)
+                start = time.perf_counter() - sent * interval
+                continue
+            for pair, book in list(active.items()):
+                message = book.update(time.time())
+                sent += 1
+                per_pair[pair] = per_pair.get(pair, 0) + 1
+                if (self.drop_every and per_pair[pair] % self.drop_every == 0
+                        and (self.drop_pairs is None or pair in self.drop_pairs)):
+                    continue
+                await ws.send(message)
+                self.sent += 1
+            if interval:
+                # Pace against the schedule, not the previous send, so a
+                # slow moment is caught up instead of lowering the rate.
+                delay = start + sent * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif sent % 256 < len(active):
+                await asyncio.sleep(0)
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        async with websockets.serve(self.handler, self.host, self.port, max_queue=None) as server:
+            self.server = server
+            self.ready.set()
+            try:
+                await server.serve_forever()
+            except asyncio.CancelledError:
+                # stop() closed the server.
+                pass
+
+    def start(self):
+        thread = threading.Thread(target=lambda: asyncio.run(self.serve()), daemon=True)
+        thread.start()
+        self.ready.wait()
+        return thread
+
+    def stop(self):
+        if self.loop and self.server:
+            self.loop.call_soon_threadsafe(self.server.close)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Kraken v1 book websocket stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=1000, help="messages per second, 0 = unthrottled")
+    parser.add_argument("--depth", type=int, default=10)
+    parser.add_argument("--source", help="JSONL file of recorded raw book messages")
+    parser.add_argument("--drop-every", type=int, help="drop every Nth update to force checksum resyncs")
+    parser.add_argument("--drop-pairs", nargs="+", help="only drop updates of these pairs")
+    args = parser.parse_args()
+
+    server = KrakenStubServer(args.host, args.port, args.rate, args.depth, args.source,
+                              drop_every=args.drop_every, drop_pairs=args.drop_pairs)
+    print(f"📡 Serving Kraken book stand-in on {server.uri}")
+    asyncio.run(server.serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 # backtest_engine.py
 import pandas as pd
 import matplotlib.pyplot as plt
+from exit_engine import simulate_tp_sl_trades
+from strategies import LiquidityWallStrategy
 
 class LiquidityWallBacktester:
     def __init__(self, csv_path, wall_threshold=100, proximity_ticks=5, 
@@ -41,91 +43,12 @@ class LiquidityWallBacktester:
         self.mid_price_df.reset_index(inplace=True)
 
     def generate_signals(self):
-        signals = []
-        grouped = self.df.groupby("timestamp")
-        for timestamp, snapshot in grouped:
-            bids = snapshot[snapshot["side"] == "bid"][["price", "volume"]].values
-            asks = snapshot[snapshot["side"] == "ask"][["price", "volume"]].values
-            mid_row = self.mid_price_df[self.mid_price_df["timestamp"] == timestamp]
-            if mid_row.empty:
-                continue
-            mid = mid_row["mid_price"].values[0]
-
-            nearby_bids = [(p, v) for p, v in bids if p >= mid - self.proximity_ticks]
-            nearby_asks = [(p, v) for p, v in asks if p <= mid + self.proximity_ticks]
-            largest_bid = max(nearby_bids, key=lambda x: x[1], default=(None, 0))
-            largest_ask = max(nearby_asks, key=lambda x: x[1], default=(None, 0))
-
-            if largest_bid[1] > self.wall_threshold:
-                signals.append((timestamp, 'LONG', mid))
-            elif largest_ask[1] > self.wall_threshold:
-                signals.append((timestamp, 'SHORT', mid))
-
-        self.signal_df = pd.DataFrame(signals, columns=["timestamp", "signal", "price"])
+        strategy = LiquidityWallStrategy(self.wall_threshold, self.proximity_ticks)
+        self.signal_df = strategy.batch(self.df, self.mid_price_df)
 
     def simulate_trades(self):
-        trades = []
-        for _, signal in self.signal_df.iterrows():
-            ts = signal["timestamp"]
-            direction = signal["signal"]
-            entry_price = signal["price"]
-
-            risk_amount = self.capital * (self.risk_pct / 100)
-            position_size = risk_amount / self.SL
-            position_value = entry_price * position_size
-
-            future = self.mid_price_df[self.mid_price_df["timestamp"] > ts].copy()
-            if future.empty:
-                break
-
-            exit_price = None
-            pnl = 0
-            exit_time = None
-
-            for _, frow in future.iterrows():
-                price = frow["mid_price"]
-                if direction == "LONG":
-                    if price >= entry_price + self.TP:
-                        exit_price = entry_price + self.TP - self.slippage
-                        pnl = (exit_price - entry_price) * position_size
-                        exit_time = frow["timestamp"]
-                        break
-                    elif price <= entry_price - self.SL:
-                        exit_price = entry_price - self.SL - self.slippage
-                        pnl = (exit_price - entry_price) * position_size
-                        exit_time = frow["timestamp"]
-                        break
-                elif direction == "SHORT":
-                    if price <= entry_price - self.TP:
-                        exit_price = entry_price - self.TP + self.slippage
-                        pnl = (entry_price - exit_price) * position_size
-                        exit_time = frow["timestamp"]
-                        break
-                    elif price >= entry_price + self.SL:
-                        exit_price = entry_price + self.SL + self.slippage
-                        pnl = (entry_price - exit_price) * position_size
-                        exit_time = frow["timestamp"]
-                        break
-
-            if exit_price:
-                fees = position_value * (self.maker_fee + self.taker_fee)
-                net_pnl = pnl - fees
-                trades.append({
-                    "entry_time": ts,
-                    "exit_time": exit_time,
-                    "entry_price": entry_price,
-                    "exit_price": exit_price,
-                    "direction": direction,
-                    "position_size": position_size,
-                    "gross_pnl": pnl,
-                    "fees": fees,
-                    "net_pnl": net_pnl
-                })
-
-        self.trade_df = pd.DataFrame(trades)
-        if not self.trade_df.empty:
-            self.trade_df["cumulative_pnl"] = self.trade_df["net_pnl"].cumsum()
-            self.trade_df["equity"] = self.capital + self.trade_df["cumulative_pnl"]
+        self.trade_df = simulate_tp_sl_trades(self.signal_df, self.mid_price_df, self.capital, self.risk_pct,
+                                              self.TP, self.SL, self.maker_fee, self.taker_fee, self.slippage)
 
     def print_summary(self):
         if self.trade_df.empty:
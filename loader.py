@@ -0,0 +1,162 @@
+# --- loader.py ---
+# Loader for the long-format CSV logs. A single file, a directory, a glob or
+# a list of daily files (one or many pairs) is parsed concurrently with a
+# fixed schema (fixed-format timestamps, categorical side, float64 or int64
+# tick columns) and concatenated in time order. pyarrow's CSV reader
+# releases the GIL, so a thread pool parses files in parallel without
+# shipping frames back from worker processes.
+import glob
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import psutil
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from fixed_point import PRICE_SCALE, VOLUME_SCALE, to_ticks
+from time_index import CSV_COLS, csv_byte_range, filter_time
+
+# data_logger writes "%Y-%m-%d %H:%M:%S"; other ISO-8601 stamps still parse.
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+CSV_TYPES = {
+    "timestamp": pa.timestamp("ns"),
+    "side": pa.dictionary(pa.int32(), pa.string()),
+    "price": pa.float64(),
+    "volume": pa.float64(),
+}
+LOG_NAME = re.compile(r"(?P<pair>[A-Za-z0-9]+-[A-Za-z0-9]+)_orderbook_(?P<date>\d{4}-\d{2}-\d{2})\.csv$")
+
+
+def log_pair_date(path):
+    # ("XBT-USD", "2025-05-10") from a data_logger file name, else (None, None).
+    match = LOG_NAME.search(os.path.basename(path))
+    return (match["pair"], match["date"]) if match else (None, None)
+
+
+def is_multi_path(spec):
+    return (isinstance(spec, (list, tuple)) or os.path.isdir(spec)
+            or any(ch in str(spec) for ch in "*?["))
+
+
+def resolve_paths(spec, pair=None, start=None, end=None):
+    # Files for a path, directory (its *_orderbook_*.csv logs), glob or list,
+    # sorted by (date, pair). Files named like the logger's are pruned by
+    # pair and by date against [start, end] without opening them.
+    if isinstance(spec, (list, tuple)):
+        paths = list(spec)
+    elif os.path.isdir(spec):
+        paths = glob.glob(os.path.join(spec, "*_orderbook_*.csv"))
+    elif any(ch in str(spec) for ch in "*?["):
+        paths = glob.glob(spec)
+    else:
+        paths = [spec]
+
+    first = f"{pd.Timestamp(start):%Y-%m-%d}" if start is not None else None
+    last = f"{pd.Timestamp(end):%Y-%m-%d}" if end is not None else None
+    key = pair.replace("/", "-") if pair is not None else None
+    selected = []
+    for path in paths:
+        file_pair, date = log_pair_date(path)
+        if key is not None and file_pair is not None and file_pair != key:
+            continue
+        if date is not None and ((first and date < first) or (last and date > last)):
+            continue
+        selected.append(path)
+    return sorted(selected, key=lambda p: (log_pair_date(p)[1] or "", log_pair_date(p)[0] or "", p))
+
+
+def parse_orderbook_csv(data, use_threads=True):
+    # Whole CSV rows (bytes) with the fixed schema as a long frame.
+    if data:
+        table = pacsv.read_csv(
+            pa.py_buffer(data),
+            read_options=pacsv.ReadOptions(column_names=CSV_COLS, use_threads=use_threads),
+            convert_options=pacsv.ConvertOptions(column_types=CSV_TYPES,
+                                                 timestamp_parsers=[TIMESTAMP_FORMAT, pacsv.ISO8601]),
+        )
+    else:
+        table = pa.schema(CSV_TYPES.items()).empty_table()
+    return table.to_pandas()
+
+
+def read_orderbook_csv(path, start=None, end=None, ticks=False, use_threads=True):
+    # One log with the fixed schema; start/end (inclusive) seek through the
+    # .tidx sidecar. ticks=True returns price/volume as int64 ticks/lots.
+    lo, hi = csv_byte_range(path, start, end)
+    with open(path, "rb") as f:
+        f.seek(lo)
+        data = f.read(hi - lo)
+    df = parse_orderbook_csv(data, use_threads)
+    if start is not None or end is not None:
+        df = filter_time(df, start, end)
+    if ticks:
+        df["price"] = to_ticks(df["price"], PRICE_SCALE)
+        df["volume"] = to_ticks(df["volume"], VOLUME_SCALE)
+    return df
+
+
+def load_orderbook(spec, pair=None, start=None, end=None, workers=None, ticks=False, with_pair=False):
+    # All matching logs as one long frame in time order. When the files hold
+    # more than one pair (or with_pair=True) a categorical "pair" column is
+    # added.
+    paths = resolve_paths(spec, pair, start, end)
+    if not paths:
+        raise FileNotFoundError(f"No order book logs match {spec!r}")
+    workers = workers or min(len(paths), os.cpu_count() or 1)
+    single = len(paths) == 1
+
+    def read(path):
+        return read_orderbook_csv(path, start, end, ticks, use_threads=single)
+
+    with ThreadPoolExecutor(workers) as pool:
+        frames = list(pool.map(read, paths))
+
+    pairs = [log_pair_date(p)[0] for p in paths]
+    if with_pair or len(set(pairs)) > 1:
+        for frame, file_pair in zip(frames, pairs):
+            frame["pair"] = file_pair
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    if "pair" in df:
+        df["pair"] = df["pair"].astype("category")
+    # Daily files of one pair concatenate in order already; several pairs
+    # (or overlapping files) need a stable sort to interleave.
+    if not df["timestamp"].is_monotonic_increasing:
+        df = df.sort_values("timestamp", kind="mergesort", ignore_index=True)
+    return df
+
+
+class PeakMemory:
+    # Samples the RSS of this process (and any children) while the block
+    # runs; .peak is the largest value seen, in bytes.
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak = 0
+        self.process = psutil.Process()
+        self.done = threading.Event()
+
+    def sample(self):
+        rss = self.process.memory_info().rss
+        for child in self.process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                pass
+        self.peak = max(self.peak, rss)
+
+    def watch(self):
+        while not self.done.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self.thread = threading.Thread(target=self.watch, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.done.set()
+        self.thread.join()
+        self.sample()
@@ -0,0 +1,158 @@
+# --- metrics.py ---
+# In-process counters, gauges and latency histograms for the live and
+# backtest pipelines, rendered in the Prometheus text format (served by
+# app.py at /metrics). Updates are plain increments without locks: most
+# metrics have a single writer thread (websocket, logger), and a scrape
+# that sees a histogram's count one observation ahead of its sum, or a
+# rare lost update from concurrent dashboard requests, is fine for
+# monitoring.
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# 1us .. 10s in 1-2-5 steps, in seconds.
+LATENCY_BUCKETS = tuple(float(f"{m}e{e}") for e in range(-6, 1) for m in (1, 2, 5)) + (10.0,)
+
+registry = {}
+
+
+def label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, labels
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        yield self.name, self.labels, self.value
+
+
+class Gauge:
+    # Either set() by its writer or computed at scrape time by fn (e.g. a
+    # queue's qsize).
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), fn=None):
+        self.name, self.help, self.labels = name, help, labels
+        self.fn = fn
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self):
+        yield self.name, self.labels, self.fn() if self.fn is not None else self.value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        # Per-bucket (not cumulative) counts; the last slot is +Inf.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self):
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            yield self.name + "_bucket", self.labels + (("le", repr(bound)),), cumulative
+        yield self.name + "_bucket", self.labels + (("le", "+Inf"),), self.count
+        yield self.name + "_count", self.labels, self.count
+        yield self.name + "_sum", self.labels, self.sum
+
+
+def get_metric(cls, name, help, labels=None, **kwargs):
+    # One instance per (name, labels); repeated calls return the same metric.
+    labels = tuple(sorted((labels or {}).items()))
+    key = (name, labels)
+    metric = registry.get(key)
+    if metric is None:
+        metric = registry.setdefault(key, cls(name, help, labels, **kwargs))
+    return metric
+
+
+def counter(name, help="", labels=None):
+    return get_metric(Counter, name, help, labels)
+
+
+def gauge(name, help="", labels=None, fn=None):
+    metric = get_metric(Gauge, name, help, labels)
+    if fn is not None:
+        metric.fn = fn
+    return metric
+
+
+def histogram(name, help="", labels=None, buckets=LATENCY_BUCKETS):
+    return get_metric(Histogram, name, help, labels, buckets=buckets)
+
+
+def render():
+    lines = []
+    described = set()
+    for (name, _), metric in sorted(registry.items(), key=lambda item: item[0]):
+        if name not in described:
+            described.add(name)
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+        for sample, labels, value in metric.samples():
+            lines.append(f"{sample}{label_text(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    # Wall time per backtest stage. Stages may nest (e.g. a lazy load inside
+    # the mid-price stage); each stage is charged its own time only, so the
+    # report adds up to the total.
+    def __init__(self):
+        self.seconds = {}
+        self.stack = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        self.stack.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            own = elapsed - self.stack.pop()
+            if self.stack:
+                self.stack[-1] += elapsed
+            self.seconds[name] = self.seconds.get(name, 0.0) + own
+            histogram("backtest_stage_seconds", "Wall time of backtest stages",
+                      {"stage": name}).observe(own)
+
+    def report(self):
+        total = sum(self.seconds.values())
+        if not total:
+            return
+        print("⏱️ Stage timings:")
+        for name, seconds in self.seconds.items():
+            print(f"   {name:<12} {seconds:9.3f}s  {seconds / total:6.1%}")
+        print(f"   {'total':<12} {total:9.3f}s")
@@ -0,0 +1,207 @@
+# --- parquet_store.py ---
+# Columnar storage for logged L2 snapshots. Snapshots are buffered in memory
+# and flushed as one row group per part file, partitioned hive-style:
+#   <root>/pair=XBT-USD/date=2025-05-10/part-<flush time>-<n>.parquet
+# Every flushed file is complete on disk, so today's data is readable while
+# the logger keeps running. Each date directory also keeps an _index.csv of
+# its part files and their time span, so start/end loads open only the
+# parts they need instead of every footer in the store.
+import bisect
+import glob
+import os
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from fixed_point import PRICE_SCALE, VOLUME_SCALE, to_tick
+
+INDEX_NAME = "_index.csv"
+
+# price/volume are stored as int64 ticks/lots; the scales travel with the file.
+SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("s")),
+    ("side", pa.dictionary(pa.int8(), pa.string())),
+    ("price", pa.int64()),
+    ("volume", pa.int64()),
+], metadata={"price_scale": str(PRICE_SCALE), "volume_scale": str(VOLUME_SCALE)})
+
+# The hive partition columns, as a directory scan of the store infers them.
+PARTITIONING = ds.partitioning(pa.schema([("pair", pa.string()), ("date", pa.string())]), flavor="hive")
+DATASET_SCHEMA = pa.unify_schemas([SCHEMA, PARTITIONING.schema])
+
+
+def pair_key(pair):
+    return pair.replace("/", "-")
+
+
+class ParquetSnapshotWriter:
+    def __init__(self, root, flush_rows=50_000, flush_interval=60.0, compression="zstd"):
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.compression = compression
+        self.buffers = {}
+        self.buffered_rows = 0
+        self.last_flush = time.monotonic()
+        self.part = 0
+        self.lock = threading.Lock()
+
+    def append(self, pair, timestamp, bids, asks):
+        # timestamp is a datetime; bids/asks are lists of (price, volume).
+        key = (pair_key(pair), timestamp.strftime("%Y-%m-%d"))
+        with self.lock:
+            buf = self.buffers.setdefault(key, {"timestamp": [], "side": [], "price": [], "volume": []})
+            for side, levels in (("bid", bids), ("ask", asks)):
+                for price, volume in levels:
+                    buf["timestamp"].append(timestamp)
+                    buf["side"].append(side)
+                    buf["price"].append(to_tick(price, PRICE_SCALE))
+                    buf["volume"].append(to_tick(volume, VOLUME_SCALE))
+            self.buffered_rows += len(bids) + len(asks)
+            due = (self.buffered_rows >= self.flush_rows
+                   or time.monotonic() - self.last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            buffers, self.buffers = self.buffers, {}
+            self.buffered_rows = 0
+            self.last_flush = time.monotonic()
+            stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+            for (pair, date), buf in buffers.items():
+                if not buf["timestamp"]:
+                    continue
+                table = pa.Table.from_pydict(buf, schema=SCHEMA)
+                part_dir = os.path.join(self.root, f"pair={pair}", f"date={date}")
+                os.makedirs(part_dir, exist_ok=True)
+                name = f"part-{stamp}-{self.part:06d}.parquet"
+                self.part += 1
+                # Write under an ignored "_" name first so readers never see half a file.
+                tmp_path = os.path.join(part_dir, "_" + name)
+                pq.write_table(table, tmp_path, compression=self.compression,
+                               row_group_size=len(buf["timestamp"]))
+                os.replace(tmp_path, os.path.join(part_dir, name))
+                # Snapshots are appended in time order: first/last are min/max.
+                first, last = buf["timestamp"][0], buf["timestamp"][-1]
+                with open(os.path.join(part_dir, INDEX_NAME), "a") as f:
+                    f.write(f"{name},{first:%Y-%m-%dT%H:%M:%S},{last:%Y-%m-%dT%H:%M:%S},{len(buf['timestamp'])}\n")
+
+    def close(self):
+        self.flush()
+
+
+def from_stored(df):
+    # int64 ticks/lots -> the float prices/volumes the CSV path produces.
+    if "price" in df and df["price"].dtype.kind == "i":
+        df["price"] = df["price"] / PRICE_SCALE
+    if "volume" in df and df["volume"].dtype.kind == "i":
+        df["volume"] = df["volume"] / VOLUME_SCALE
+    return df
+
+
+def store_pairs(root):
+    # Pair keys of a pair=/date= store, e.g. ["ETH-USD", "XBT-USD"].
+    return sorted(os.path.basename(d).split("=", 1)[1] for d in glob.glob(os.path.join(root, "pair=*"))
+                  if os.path.isdir(d))
+
+
+def require_single_pair(root):
+    # Snapshots of several pairs must not be interleaved into one book.
+    pairs = store_pairs(root)
+    if len(pairs) > 1:
+        raise ValueError(f"{root!r} holds several pairs ({', '.join(pairs)}); pass pair=")
+
+
+def indexed_parts(root, pair=None, start=None, end=None):
+    # Part files whose [first, last] span overlaps [start, end], found from
+    # the date directory names and each directory's _index.csv. Returns None
+    # when root is not a pair=/date= store. Directories without an index
+    # (older data) contribute all their parts.
+    pair_dirs = [os.path.join(root, f"pair={pair_key(pair)}")] if pair is not None else \
+        sorted(glob.glob(os.path.join(root, "pair=*")))
+    pair_dirs = [d for d in pair_dirs if os.path.isdir(d)]
+    if not pair_dirs:
+        return None
+    lo = pd.Timestamp(start) if start is not None else None
+    hi = pd.Timestamp(end) if end is not None else None
+
+    parts = []
+    for pair_dir in pair_dirs:
+        for date_dir in sorted(glob.glob(os.path.join(pair_dir, "date=*"))):
+            date = date_dir.rsplit("date=", 1)[1]
+            if (lo is not None and date < f"{lo:%Y-%m-%d}") or (hi is not None and date > f"{hi:%Y-%m-%d}"):
+                continue
+            index_file = os.path.join(date_dir, INDEX_NAME)
+            if not os.path.exists(index_file):
+                parts.extend(p for p in sorted(glob.glob(os.path.join(date_dir, "*.parquet")))
+                             if not os.path.basename(p).startswith(("_", ".")))
+                continue
+            with open(index_file) as f:
+                entries = [line.rstrip("\n").split(",") for line in f if line.strip()]
+            # ISO strings sort like times; parts are listed in write order.
+            lasts = [e[2] for e in entries]
+            i = bisect.bisect_left(lasts, f"{lo:%Y-%m-%dT%H:%M:%S}") if lo is not None else 0
+            for name, first, last, _ in entries[i:]:
+                if hi is not None and first > f"{hi:%Y-%m-%dT%H:%M:%S}":
+                    break
+                parts.append(os.path.join(date_dir, name))
+    return parts
+
+
+def snapshot_dataset(root, pair=None, start=None, end=None):
+    # (dataset, filter) over the snapshot store, restricted to [start, end].
+    # With a time range, only the indexed part files that overlap it are
+    # opened; the filter still trims rows at the edges.
+    parts = indexed_parts(root, pair, start, end) if start is not None or end is not None else None
+    if parts is not None:
+        # Partition columns come from the paths below root, as in the
+        # directory scan.
+        dataset = ds.dataset(parts, schema=DATASET_SCHEMA, format="parquet",
+                             partitioning=PARTITIONING, partition_base_dir=root)
+    else:
+        dataset = ds.dataset(root, format="parquet", partitioning="hive", ignore_prefixes=[".", "_"])
+    filt = None
+    if pair is not None and "pair" in dataset.schema.names:
+        filt = ds.field("pair") == pair_key(pair)
+    if start is not None:
+        cond = ds.field("timestamp") >= pa.scalar(pd.Timestamp(start).to_pydatetime(), pa.timestamp("s"))
+        filt = cond if filt is None else filt & cond
+    if end is not None:
+        cond = ds.field("timestamp") <= pa.scalar(pd.Timestamp(end).to_pydatetime(), pa.timestamp("s"))
+        filt = cond if filt is None else filt & cond
+    return dataset, filt
+
+
+def load_parquet(root, pair=None, start=None, end=None, columns=("timestamp", "side", "price", "volume"),
+                 ticks=False):
+    # Column read of a partitioned snapshot store, in the same long format
+    # (timestamp, side, price, volume) as the CSV logs. start/end are
+    # inclusive; they select part files through the _index.csv sidecars and
+    # are pushed down to row-group statistics.
+    # ticks=True keeps price/volume as the stored int64 ticks/lots.
+    # Several pairs are only returned together with their "pair" column.
+    if pair is None and "pair" not in columns:
+        require_single_pair(root)
+    dataset, filt = snapshot_dataset(root, pair, start, end)
+    table = dataset.to_table(columns=list(columns), filter=filt)
+    df = table.to_pandas()
+    if not ticks:
+        df = from_stored(df)
+    if "timestamp" in df:
+        df["timestamp"] = df["timestamp"].astype("datetime64[ns]")
+        df = df.sort_values("timestamp", kind="mergesort", ignore_index=True)
+    return df
+
+
+def is_parquet_path(path):
+    # A directory of CSV logs is not a store; see loader.load_orderbook.
+    if isinstance(path, (list, tuple)):
+        return False
+    if os.path.isdir(path):
+        return not glob.glob(os.path.join(path, "*.csv"))
+    return str(path).endswith(".parquet")
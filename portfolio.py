@@ -0,0 +1,160 @@
+# --- portfolio.py ---
+# Multi-pair backtest against one shared capital pool. All pairs' snapshots
+# are put on a common clock (the union of their timestamps) and numbered
+#   snapshot = pair_index * len(clock) + clock_index
+# The strategy runs once over every pair with that id in its "timestamp"
+# column (strategies only group and order by it), and exits come from one
+# first-passage search over the flattened (pair, clock) mid-price grid,
+# each position bounded to its own pair's row. The only sequential step is
+# admitting positions against the capital pool and per-pair risk limits,
+# a single pass over entry/exit events for all pairs together.
+import numpy as np
+import pandas as pd
+
+from base_engine import BacktestEngine
+from exit_engine import build_extreme_tables, first_passage_exits
+from loader import load_orderbook, log_pair_date, resolve_paths
+from parquet_store import is_parquet_path, load_parquet, pair_key
+
+
+class PortfolioBacktest(BacktestEngine):
+    def __init__(self, strategy_fn, data_path, pairs, capital=100, risk_pct=10, TP=50, SL=50,
+                 maker_fee=0.0016, taker_fee=0.0026, slippage=1.0, start=None, end=None,
+                 max_pair_risk_pct=None, max_total_risk_pct=None):
+        # TP/SL: one value for every pair or a {pair: value} dict.
+        # max_pair_risk_pct: open risk allowed per pair, in % of capital.
+        # max_total_risk_pct: open risk allowed across pairs, in % of the
+        # current equity (capital + realized PnL). None means no limit.
+        super().__init__(strategy_fn, data_path, capital, risk_pct, TP, SL, maker_fee, taker_fee, slippage,
+                         start=start, end=end, cache=False)
+        self.pairs = list(pairs)
+        self.max_pair_risk_pct = max_pair_risk_pct
+        self.max_total_risk_pct = max_total_risk_pct
+        self.clock = None
+        self.rejected = 0
+
+    def per_pair(self, value):
+        if isinstance(value, dict):
+            return np.array([value[pair] for pair in self.pairs], dtype=float)
+        return np.full(len(self.pairs), float(value))
+
+    def load_data(self):
+        keys = [pair_key(pair) for pair in self.pairs]
+        if is_parquet_path(self.data_path):
+            df = load_parquet(self.data_path, start=self.start, end=self.end,
+                              columns=("timestamp", "side", "price", "volume", "pair"))
+        else:
+            paths = [p for p in resolve_paths(self.data_path, start=self.start, end=self.end)
+                     if log_pair_date(p)[0] in keys]
+            if not paths:
+                raise FileNotFoundError(f"No order book logs for {self.pairs} in {self.data_path!r}")
+            df = load_orderbook(paths, start=self.start, end=self.end, with_pair=True)
+
+        pair_idx = pd.Categorical(df["pair"].astype(str), categories=keys).codes.astype(np.int64)
+        keep = pair_idx >= 0
+        self.clock, clock_idx = np.unique(df["timestamp"].to_numpy()[keep], return_inverse=True)
+        return pd.DataFrame({
+            "timestamp": pair_idx[keep] * len(self.clock) + clock_idx,
+            "side": df["side"].to_numpy()[keep],
+            "price": df["price"].to_numpy()[keep],
+            "volume": df["volume"].to_numpy()[keep],
+        })
+
+    def admit(self, entry_clock, exit_clock, pair_idx, net_pnl):
+        # Which candidate positions the pool takes. Each one reserves the
+        # same risk (capital * risk_pct) from entry until exit; exits at a
+        # tick free their risk and realize PnL before entries at that tick.
+        n = len(entry_clock)
+        if self.max_pair_risk_pct is None and self.max_total_risk_pct is None:
+            return np.ones(n, dtype=bool)
+        risk = self.capital * (self.risk_pct / 100)
+        pair_limit = np.inf if self.max_pair_risk_pct is None else self.capital * (self.max_pair_risk_pct / 100)
+        total_pct = None if self.max_total_risk_pct is None else self.max_total_risk_pct / 100
+
+        times = np.concatenate([exit_clock, entry_clock])
+        kinds = np.repeat([0, 1], n)
+        ids = np.tile(np.arange(n), 2)
+        order = np.lexsort((ids, kinds, times))
+
+        admitted = [False] * n
+        open_pair = [0.0] * len(self.pairs)
+        open_total = 0.0
+        equity = float(self.capital)
+        pairs, pnls = pair_idx.tolist(), net_pnl.tolist()
+        for kind, i in zip(kinds[order].tolist(), ids[order].tolist()):
+            p = pairs[i]
+            if kind == 0:
+                if admitted[i]:
+                    open_pair[p] -= risk
+                    open_total -= risk
+                    equity += pnls[i]
+            elif open_pair[p] + risk <= pair_limit and (
+                    total_pct is None or open_total + risk <= max(equity, 0.0) * total_pct):
+                admitted[i] = True
+                open_pair[p] += risk
+                open_total += risk
+        return np.array(admitted, dtype=bool)
+
+    def simulate_trades(self, signal_df, mid_price_df):
+        n_clock = len(self.clock)
+        grid = np.full(len(self.pairs) * n_clock, np.nan)
+        grid[mid_price_df["timestamp"].to_numpy(dtype=np.int64)] = mid_price_df["mid_price"].to_numpy(dtype=float)
+        if signal_df.empty:
+            return pd.DataFrame([])
+
+        snapshot = signal_df["timestamp"].to_numpy(dtype=np.int64)
+        pair_idx = snapshot // n_clock
+        tp, sl = self.per_pair(self.TP)[pair_idx], self.per_pair(self.SL)[pair_idx]
+        entry_prices = signal_df["price"].to_numpy(dtype=float)
+        directions = signal_df["signal"].to_numpy()
+        exit_idx, is_tp, has_exit = first_passage_exits(
+            grid, snapshot + 1, entry_prices, directions, tp, sl,
+            tables=build_extreme_tables(grid), stop=(pair_idx + 1) * n_clock)
+
+        is_long = directions == "LONG"
+        exit_prices = np.where(
+            is_long,
+            np.where(is_tp, entry_prices + tp - self.slippage, entry_prices - sl - self.slippage),
+            np.where(is_tp, entry_prices - tp + self.slippage, entry_prices + sl + self.slippage),
+        )
+        has_exit &= exit_prices != 0
+        position_size = self.capital * (self.risk_pct / 100) / sl
+        gross_pnl = np.where(is_long, exit_prices - entry_prices, entry_prices - exit_prices) * position_size
+        fees = entry_prices * position_size * (self.maker_fee + self.taker_fee)
+        net_pnl = np.where(has_exit, gross_pnl - fees, 0.0)
+
+        # Positions that never exit hold their risk until the end.
+        entry_clock = snapshot % n_clock
+        exit_clock = np.where(has_exit, exit_idx % n_clock, n_clock)
+        admitted = self.admit(entry_clock, exit_clock, pair_idx, net_pnl)
+        self.rejected = int((~admitted).sum())
+        take = admitted & has_exit
+        if not take.any():
+            return pd.DataFrame([])
+
+        trade_df = pd.DataFrame({
+            "pair": np.array(self.pairs, dtype=object)[pair_idx[take]],
+            "entry_time": self.clock[entry_clock[take]],
+            "exit_time": self.clock[exit_clock[take]],
+            "entry_price": entry_prices[take],
+            "exit_price": exit_prices[take],
+            "direction": directions[take],
+            "position_size": position_size[take],
+            "gross_pnl": gross_pnl[take],
+            "fees": fees[take],
+            "net_pnl": net_pnl[take],
+        })
+        # Shared pool: equity moves as trades close, across all pairs.
+        trade_df = trade_df.sort_values(["exit_time", "entry_time"], kind="mergesort", ignore_index=True)
+        trade_df["cumulative_pnl"] = trade_df["net_pnl"].cumsum()
+        trade_df["equity"] = self.capital + trade_df["cumulative_pnl"]
+        return trade_df
+
+    def print_summary(self, trade_df):
+        if trade_df.empty:
+            print("💤 No trades were executed. Check signal logic or data range.")
+            return
+        print(trade_df.groupby("pair")["net_pnl"].agg(["count", "sum"]).rename(columns={"count": "trades"}))
+        print("🚫 Signals rejected by risk limits:", self.rejected)
+        print("🔥 Final Balance:", trade_df['equity'].iloc[-1])
+        print("📉 Max Drawdown:", (trade_df["equity"].cummax() - trade_df["equity"]).max())
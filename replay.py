@@ -0,0 +1,364 @@
+# --- replay.py ---
+# Constant-memory replay backtest. Logged snapshots (or raw book diffs fed
+# through a LocalOrderBook) flow through a generator pipeline:
+#   snapshots -> signals -> position tracking -> closed trades
+# Snapshots are read a chunk at a time and never collected, and the
+# simulator holds only the open positions: with ordered=False trades come
+# out as they close. ordered=True releases them in signal order to match
+# BacktestEngine.simulate_trades trade for trade, which also buffers every
+# trade that closed after the oldest still-open position was entered; a
+# position that stays open for long keeps those buffered until it exits.
+import heapq
+import json
+
+import numpy as np
+import pandas as pd
+
+from fixed_point import to_tick
+from loader import is_multi_path, resolve_paths
+from parquet_store import is_parquet_path
+from strategies import LiquidityWallStrategy, snapshot_mid
+from time_index import csv_byte_range, filter_time
+from wide_store import is_wide_path, open_wide
+
+CSV_COLS = ["timestamp", "side", "price", "volume"]
+
+
+def _group_rows(ts, side, price, volume):
+    # Split one chunk of long rows into (timestamp, bids, asks) runs.
+    bounds = np.flatnonzero(ts[1:] != ts[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(ts)]))
+    runs = []
+    for lo, hi in zip(starts, ends):
+        bids, asks = [], []
+        for s, p, v in zip(side[lo:hi], price[lo:hi], volume[lo:hi]):
+            if s == "bid":
+                bids.append((p, v))
+            elif s == "ask":
+                asks.append((p, v))
+        runs.append((ts[lo], bids, asks))
+    return runs
+
+
+def iter_long_chunks(chunks):
+    # Rows of one snapshot are contiguous in the logs, but a chunk boundary
+    # can fall inside a snapshot, so the trailing run is carried over.
+    pending = None
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        runs = _group_rows(chunk["timestamp"].to_numpy(), chunk["side"].to_numpy(),
+                           chunk["price"].to_numpy(dtype=float),
+                           chunk["volume"].to_numpy(dtype=float))
+        if pending is not None:
+            if runs[0][0] == pending[0]:
+                runs[0][1][:0] = pending[1]
+                runs[0][2][:0] = pending[2]
+            else:
+                yield pd.Timestamp(pending[0]), pending[1], pending[2]
+        for run in runs[:-1]:
+            yield pd.Timestamp(run[0]), run[1], run[2]
+        pending = runs[-1]
+    if pending is not None:
+        yield pd.Timestamp(pending[0]), pending[1], pending[2]
+
+
+def iter_csv_snapshots(path, start=None, end=None, chunksize=200_000):
+    # Seeks to `start` through the .tidx sidecar and stops after `end`.
+    lo, hi = csv_byte_range(path, start, end)
+    if hi == lo:
+        return
+    with open(path, "rb") as f:
+        f.seek(lo)
+        chunks = pd.read_csv(f, names=CSV_COLS, header=None, parse_dates=[0], chunksize=chunksize)
+        if start is not None or end is not None:
+            chunks = _time_bounded(chunks, start, end)
+        yield from iter_long_chunks(chunks)
+
+
+def _time_bounded(chunks, start, end):
+    for chunk in chunks:
+        if end is not None and chunk["timestamp"].iloc[0] > pd.Timestamp(end):
+            return
+        yield filter_time(chunk, start, end)
+
+
+def iter_parquet_snapshots(path, pair=None, start=None, end=None, batch_size=200_000):
+    from parquet_store import from_stored, require_single_pair, snapshot_dataset
+
+    if pair is None:
+        require_single_pair(path)
+    dataset, filt = snapshot_dataset(path, pair, start, end)
+    batches = dataset.to_batches(columns=CSV_COLS, filter=filt, batch_size=batch_size)
+    chunks = (from_stored(batch.to_pandas().astype({"timestamp": "datetime64[ns]"})) for batch in batches)
+    return iter_long_chunks(chunks)
+
+
+def iter_wide_snapshots(path, start=None, end=None, chunk_rows=50_000):
+    snapshots = open_wide(path, start, end)
+    for lo in range(0, len(snapshots), chunk_rows):
+        hi = min(lo + chunk_rows, len(snapshots))
+        ts = snapshots.time_index()[lo:hi]
+        bp, bv = np.asarray(snapshots.bid_price[lo:hi]), np.asarray(snapshots.bid_volume[lo:hi])
+        ap, av = np.asarray(snapshots.ask_price[lo:hi]), np.asarray(snapshots.ask_volume[lo:hi])
+        for i in range(hi - lo):
+            bids = [(p, v) for p, v in zip(bp[i], bv[i]) if p == p]
+            asks = [(p, v) for p, v in zip(ap[i], av[i]) if p == p]
+            yield ts[i], bids, asks
+
+
+def read_diffs(path, start=None, end=None, clock="t"):
+    # Records written by data_logger.DiffRecorder -> (timestamp, data) for
+    # iter_diff_snapshots. clock="t" uses local receive time, "x" the
+    # exchange time. With `start`, reading begins at the last snapshot or
+    # checkpoint at/before it, so the book is complete from the first
+    # emitted diff on; other checkpoints are skipped (they repeat the book).
+    if start is not None:
+        start = pd.Timestamp(start).timestamp()
+    if end is not None:
+        end = pd.Timestamp(end).timestamp()
+
+    offset = 0
+    if start is not None:
+        with open(path, "rb") as f:
+            pos = 0
+            for line in f:
+                record = json.loads(line)
+                if record["t"] > start:
+                    break
+                if record["kind"] in ("snapshot", "checkpoint"):
+                    offset = pos
+                pos += len(line)
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        first = True
+        for line in f:
+            record = json.loads(line)
+            if end is not None and record["t"] > end:
+                break
+            kind = record["kind"]
+            if kind == "checkpoint" and not first:
+                continue
+            first = False
+            data = {"reset": True} if kind == "reset" else record["data"]
+            timestamp = record[clock] if record[clock] is not None else record["t"]
+            yield pd.Timestamp(timestamp, unit="s"), data
+
+
+def iter_snapshots(path, pair=None, start=None, end=None):
+    if str(path).endswith(".jsonl"):
+        return iter_diff_snapshots(read_diffs(path, start, end), start=start)
+    if is_wide_path(path):
+        return iter_wide_snapshots(path, start, end)
+    if is_parquet_path(path):
+        return iter_parquet_snapshots(path, pair, start, end)
+    if is_multi_path(path):
+        # Daily files one after another; resolve_paths sorts them by date.
+        return (snap for file in resolve_paths(path, pair, start, end)
+                for snap in iter_csv_snapshots(file, start, end))
+    return iter_csv_snapshots(path, start, end)
+
+
+def iter_diff_snapshots(diffs, depth=10, start=None):
+    # Raw book diffs -> snapshots. Each diff is (timestamp, data) where data
+    # holds Kraken-style "b"/"a" level updates, or a full "bs"/"as" book that
+    # replaces it ({"reset": True} clears it); the book is rebuilt with a
+    # LocalOrderBook and its top `depth` levels are emitted per diff from
+    # `start` on.
+    from kraken_client import LocalOrderBook
+
+    start = pd.Timestamp(start) if start is not None else None
+    book = LocalOrderBook(depth)
+    for timestamp, data in diffs:
+        if "reset" in data:
+            book.clear()
+            continue
+        if "bs" in data or "as" in data:
+            book.clear()
+            book.update(data.get("bs", []), "b")
+            book.update(data.get("as", []), "a")
+        if "b" in data:
+            book.update(data["b"], "b")
+        if "a" in data:
+            book.update(data["a"], "a")
+        timestamp = pd.Timestamp(timestamp)
+        if start is not None and timestamp < start:
+            continue
+        bids, asks = book.get_depth(depth)
+        yield timestamp, bids, asks
+
+
+def stream_signals(snapshots, strategy):
+    # Runs a strategy's streaming path; yields (timestamp, mid, result) for
+    # every snapshot, result being (signal, price) or None when flat.
+    strategy.reset()
+    for timestamp, bids, asks in snapshots:
+        yield timestamp, snapshot_mid(bids, asks), strategy.on_snapshot(timestamp, bids, asks)
+
+
+class StreamingTradeSimulator:
+    # Tracks independent TP/SL positions against a stream of mid prices.
+    # Exit levels sit in heaps (as int half ticks, like exit_engine), so
+    # each tick costs O(log open) per exit.
+    def __init__(self, capital=20, risk_pct=100, TP=50, SL=50,
+                 maker_fee=0.0016, taker_fee=0.0026, slippage=1.0, ordered=True):
+        self.capital = capital
+        self.risk_pct = risk_pct
+        self.TP = TP
+        self.SL = SL
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.slippage = slippage
+        self.position_size = capital * (risk_pct / 100) / SL
+        self.tp_ticks = 2 * to_tick(TP)
+        self.sl_ticks = 2 * to_tick(SL)
+
+        # ordered: trades in signal order (done holds the closed ones that
+        # are waiting for earlier signals), else in exit order (closed holds
+        # the ones closed since the last emit).
+        self.ordered = ordered
+        self.next_seq = 0
+        self.next_emit = 0
+        self.open = {}
+        self.done = {}
+        self.closed = []
+        self.long_tp, self.long_sl = [], []
+        self.short_tp, self.short_sl = [], []
+        self.cumulative_pnl = 0.0
+
+    def on_tick(self, timestamp, mid):
+        # Close what this mid crosses (TP before SL), then emit in order.
+        if mid == mid:
+            half = to_tick(mid * 2)
+            self._close(self.long_tp, lambda level: level <= half, timestamp, True)
+            self._close(self.short_tp, lambda level: -level >= half, timestamp, True)
+            self._close(self.long_sl, lambda level: -level >= half, timestamp, False)
+            self._close(self.short_sl, lambda level: level <= half, timestamp, False)
+            self._compact()
+        return self._emit()
+
+    def on_signal(self, timestamp, direction, entry_price):
+        seq = self.next_seq
+        self.next_seq += 1
+        if entry_price != entry_price or direction not in ("LONG", "SHORT"):
+            if self.ordered:
+                self.done[seq] = None
+            return
+        self.open[seq] = (timestamp, direction, entry_price)
+        entry = to_tick(entry_price * 2)
+        if direction == "LONG":
+            heapq.heappush(self.long_tp, (entry + self.tp_ticks, seq))
+            heapq.heappush(self.long_sl, (-(entry - self.sl_ticks), seq))
+        else:
+            heapq.heappush(self.short_tp, (-(entry - self.tp_ticks), seq))
+            heapq.heappush(self.short_sl, (entry + self.sl_ticks, seq))
+
+    def _close(self, heap, crossed, timestamp, is_tp):
+        while heap and crossed(heap[0][0]):
+            _, seq = heapq.heappop(heap)
+            position = self.open.pop(seq, None)
+            if position is None:
+                continue
+            trade = self._trade(position, timestamp, is_tp)
+            if self.ordered:
+                self.done[seq] = trade
+            elif trade is not None:
+                self.closed.append(trade)
+
+    def _compact(self):
+        # Closing by TP leaves the SL entry behind (and vice versa); drop
+        # stale entries once they outnumber the open positions.
+        heaps = (self.long_tp, self.long_sl, self.short_tp, self.short_sl)
+        if sum(len(h) for h in heaps) <= 4 * len(self.open) + 256:
+            return
+        for heap in heaps:
+            heap[:] = [entry for entry in heap if entry[1] in self.open]
+            heapq.heapify(heap)
+
+    def _trade(self, position, exit_time, is_tp):
+        entry_time, direction, entry_price = position
+        size = self.position_size
+        if direction == "LONG":
+            exit_price = (entry_price + self.TP - self.slippage) if is_tp else (entry_price - self.SL - self.slippage)
+            pnl = (exit_price - entry_price) * size
+        else:
+            exit_price = (entry_price - self.TP + self.slippage) if is_tp else (entry_price + self.SL + self.slippage)
+            pnl = (entry_price - exit_price) * size
+        if not exit_price:
+            return None
+        fees = entry_price * size * (self.maker_fee + self.taker_fee)
+        return {
+            "entry_time": entry_time,
+            "exit_time": exit_time,
+            "entry_price": entry_price,
+            "exit_price": exit_price,
+            "direction": direction,
+            "position_size": size,
+            "gross_pnl": pnl,
+            "fees": fees,
+            "net_pnl": pnl - fees,
+        }
+
+    def _emit(self, final=False):
+        # At the end of the stream the still-open positions are dropped, as
+        # the batch engine never exits them.
+        if not self.ordered:
+            out, self.closed = self.closed, []
+            if final:
+                self.open.clear()
+            for trade in out:
+                self._account(trade)
+            return out
+        out = []
+        while self.next_emit < self.next_seq:
+            if self.next_emit in self.done:
+                trade = self.done.pop(self.next_emit)
+            elif final:
+                self.open.pop(self.next_emit, None)
+                trade = None
+            else:
+                break
+            self.next_emit += 1
+            if trade is not None:
+                out.append(self._account(trade))
+        return out
+
+    def _account(self, trade):
+        self.cumulative_pnl += trade["net_pnl"]
+        trade["cumulative_pnl"] = self.cumulative_pnl
+        trade["equity"] = self.capital + self.cumulative_pnl
+        return trade
+
+    def finish(self):
+        return self._emit(final=True)
+
+
+def replay_trades(snapshots, simulator, wall_threshold=15, proximity_ticks=20, strategy=None):
+    # Generator of closed trades, in the simulator's order (see the note at the top).
+    # strategy: any strategies.Strategy, by default the liquidity wall rule.
+    if strategy is None:
+        strategy = LiquidityWallStrategy(wall_threshold, proximity_ticks)
+    for timestamp, mid, result in stream_signals(snapshots, strategy):
+        yield from simulator.on_tick(timestamp, mid)
+        if result is not None:
+            simulator.on_signal(timestamp, *result)
+    yield from simulator.finish()
+
+
+class RunningSummary:
+    # Final balance / max drawdown / trade count without keeping the trades.
+    def __init__(self, capital):
+        self.final_equity = capital
+        self.peak = None
+        self.max_drawdown = np.nan
+        self.trades = 0
+
+    def add(self, trade):
+        equity = trade["equity"]
+        self.peak = equity if self.peak is None else max(self.peak, equity)
+        drawdown = self.peak - equity
+        self.max_drawdown = drawdown if self.trades == 0 else max(self.max_drawdown, drawdown)
+        self.final_equity = equity
+        self.trades += 1
@@ -1,16 +1,28 @@
 #from backtest_engine.base_engine import BacktestEngine
 #from backtest_engine.strategy_liquidity import liquidity_wall_strategy
+import argparse
+
 from base_engine import BacktestEngine
 from strategy_liquidity import liquidity_wall_strategy
 
 if __name__ == "__main__":
-    path = r"C:\Users\trrallele\Momentum Metropolitan\REALEARN\CRYPTO STRATEGIES IN PYTHON\GPT\kracken-gpt\l2_data_logs\XBT-USD_orderbook_2025-05-10.csv"
+    parser = argparse.ArgumentParser(description="Liquidity wall backtest over logged order book data")
+    parser.add_argument("data", nargs="?", default="l2_data_logs",
+                        help="CSV log, directory or glob of daily logs, Parquet store or wide store")
+    parser.add_argument("--pair", help="e.g. XBT/USD; required when the files hold several pairs")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    args = parser.parse_args()
+
     engine = BacktestEngine(
         strategy_fn=liquidity_wall_strategy,
-        data_path=path,
+        data_path=args.data,
         capital=20,
         risk_pct=100,
         TP=50,
-        SL=50
+        SL=50,
+        pair=args.pair,
+        start=args.start,
+        end=args.end
     )
     engine.run()
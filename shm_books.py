@@ -0,0 +1,320 @@
+# --- shm_books.py ---
+# Sharded ingest: pairs are split across worker processes, each with its own
+# websocket connection, LocalOrderBooks and FeatureEngines, so JSON parsing
+# and book upkeep for dozens of pairs stop sharing one GIL (and one core
+# with the Dash server). Every worker publishes each pair's top-N book and
+# latest features into a fixed-layout multiprocessing.shared_memory
+# segment named "<prefix>_<pair>":
+#   levels  int64                       written once at creation
+#   seq     uint64                      sequence lock: odd while writing
+#   timestamp, n_bids, n_asks
+#   bids, asks  float64 (levels, 2)     price, volume; best level first
+#   features    float64 (FEATURE_FIELDS)
+# The single writer bumps seq to odd, writes in place and bumps it back to
+# even. Readers in any process memcpy the record out of the mapping (no
+# pickling, no pipe) and retry if seq was odd or moved meanwhile. This
+# relies on stores becoming visible in program order, which holds on x86.
+import asyncio
+import multiprocessing
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+from types import MappingProxyType
+
+import numpy as np
+
+from kraken_client import KrakenClient
+
+FEATURE_FIELDS = ("mid", "spread", "microprice", "imbalance", "depth_imbalance",
+                  "bid_wall_price", "bid_wall_volume", "ask_wall_price", "ask_wall_volume")
+SIGNAL_CODES = {"LONG": 1.0, "SHORT": -1.0, None: 0.0}
+HEADER_BYTES = 8
+
+
+def segment_name(pair, prefix="kraken"):
+    return f"{prefix}_{pair.replace('/', '-')}"
+
+
+def ring_name(pair, kind, prefix="kraken"):
+    return f"{segment_name(pair, prefix)}_{kind}"
+
+
+def record_dtype(levels):
+    return np.dtype([
+        ("seq", "<u8"),
+        ("timestamp", "<f8"),
+        ("n_bids", "<i8"),
+        ("n_asks", "<i8"),
+        ("bids", "<f8", (levels, 2)),
+        ("asks", "<f8", (levels, 2)),
+        ("features", "<f8", (len(FEATURE_FIELDS),)),
+    ])
+
+
+def encode_features(record):
+    bid_wall = record["bid_wall"] or (np.nan, np.nan)
+    ask_wall = record["ask_wall"] or (np.nan, np.nan)
+    return (record["mid"], record["spread"], record["microprice"], record["imbalance"],
+            record["depth_imbalance"], *bid_wall, *ask_wall)
+
+
+def decode_features(values, timestamp):
+    (mid, spread, microprice, imbalance, depth_imbalance,
+     bid_wall_price, bid_wall_volume, ask_wall_price, ask_wall_volume) = values.tolist()
+    if mid != mid:
+        return None
+    return MappingProxyType({
+        "timestamp": timestamp,
+        "mid": mid,
+        "spread": spread,
+        "microprice": microprice,
+        "imbalance": imbalance,
+        "depth_imbalance": depth_imbalance,
+        "bid_wall": None if bid_wall_price != bid_wall_price else (bid_wall_price, bid_wall_volume),
+        "ask_wall": None if ask_wall_price != ask_wall_price else (ask_wall_price, ask_wall_volume),
+    })
+
+
+# Strategy signal changes, one ring record each (see ShmRing).
+SIGNAL_RING_FIELDS = ("timestamp", "mid", "signal", "price")
+
+
+def encode_signal(record):
+    price = record["price"]
+    return (record["timestamp"], record["mid"], SIGNAL_CODES[record["signal"]],
+            np.nan if price is None else price)
+
+
+def decode_signal(row):
+    return {**row, "signal": {1.0: "LONG", -1.0: "SHORT"}.get(row["signal"]),
+            "price": None if row["price"] != row["price"] else row["price"]}
+
+
+class ShmBook:
+    def __init__(self, segment, owner=False):
+        self.segment = segment
+        self.owner = owner
+        self.levels = int(np.ndarray((), dtype="<i8", buffer=segment.buf))
+        self.record = np.ndarray((1,), dtype=record_dtype(self.levels), buffer=segment.buf, offset=HEADER_BYTES)
+        self.seq = self.record["seq"]
+        self.bids = self.record["bids"][0]
+        self.asks = self.record["asks"][0]
+        self.features = self.record["features"][0]
+        self.version = int(self.seq[0])
+
+    @classmethod
+    def create(cls, pair, levels=10, prefix="kraken"):
+        name = segment_name(pair, prefix)
+        size = HEADER_BYTES + record_dtype(levels).itemsize
+        try:
+            segment = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a run that did not shut down cleanly.
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            segment = shared_memory.SharedMemory(name, create=True, size=size)
+        np.ndarray((), dtype="<i8", buffer=segment.buf)[...] = levels
+        book = cls(segment, owner=True)
+        book.record[0] = np.zeros((), dtype=book.record.dtype)
+        book.features[:] = np.nan
+        return book
+
+    @classmethod
+    def attach(cls, pair, prefix="kraken"):
+        segment = shared_memory.SharedMemory(segment_name(pair, prefix))
+        # Processes outside the owner's tree get their own resource tracker,
+        # which would unlink the segment when they exit.
+        if multiprocessing.parent_process() is None:
+            resource_tracker.unregister(segment._name, "shared_memory")
+        return cls(segment)
+
+    def write(self, timestamp, bids, asks, record=None):
+        # Single writer per segment.
+        levels = self.levels
+        self.version += 1
+        self.seq[0] = self.version
+        rec = self.record
+        n_bids, n_asks = min(len(bids), levels), min(len(asks), levels)
+        rec["timestamp"] = timestamp
+        rec["n_bids"] = n_bids
+        rec["n_asks"] = n_asks
+        if n_bids:
+            self.bids[:n_bids] = bids[:n_bids]
+        if n_asks:
+            self.asks[:n_asks] = asks[:n_asks]
+        # No record (e.g. a one-sided book) means no features for this version.
+        self.features[:] = encode_features(record) if record is not None else np.nan
+        self.version += 1
+        self.seq[0] = self.version
+
+    def read_record(self):
+        # (publish count, private copy of the record); (0, None) before the
+        # first write.
+        while True:
+            before = int(self.seq[0])
+            if before & 1:
+                time.sleep(0)
+                continue
+            if before == 0:
+                return 0, None
+            copy = self.record[0].copy()
+            if int(self.seq[0]) == before:
+                return before // 2, copy
+
+    def read(self):
+        # (seq, snapshot) in the same shape as client_shared.latest_snapshot,
+        # plus a "features" entry (None until the first feature record).
+        seq, rec = self.read_record()
+        if rec is None:
+            return 0, None
+        bids = tuple(map(tuple, rec["bids"][:rec["n_bids"]].tolist()))
+        asks = tuple(map(tuple, rec["asks"][:rec["n_asks"]].tolist()))
+        bid = bids[0] if bids else (None, None)
+        ask = asks[0] if asks else (None, None)
+        timestamp = float(rec["timestamp"])
+        return seq, MappingProxyType({
+            "bid_price": bid[0],
+            "bid_size": bid[1],
+            "ask_price": ask[0],
+            "ask_size": ask[1],
+            "timestamp": timestamp,
+            "bids": bids,
+            "asks": asks,
+            "features": decode_features(rec["features"], timestamp),
+        })
+
+    def read_if_newer(self, seen_seq):
+        if int(self.seq[0]) // 2 <= seen_seq:
+            return None
+        latest = self.read()
+        return latest if latest[0] > seen_seq else None
+
+    def close(self):
+        self.record = self.seq = self.bids = self.asks = self.features = None
+        self.segment.close()
+        if self.owner:
+            self.segment.unlink()
+
+
+class ShmRing:
+    # Cross-process version of client_shared.RecordStream: a single writer
+    # appends fixed float64 records (fields) to a ring in shared memory.
+    #   capacity, count  int64      count = records appended so far
+    #   slots            float64 (capacity, len(fields))
+    # The writer fills a slot and only then advances count; readers keep
+    # their own cursor and drop slots overwritten while they copied.
+    def __init__(self, segment, fields, owner=False):
+        self.segment = segment
+        self.fields = tuple(fields)
+        self.owner = owner
+        self.header = np.ndarray((2,), dtype="<i8", buffer=segment.buf)
+        self.capacity = int(self.header[0])
+        self.slots = np.ndarray((self.capacity, len(self.fields)), dtype="<f8",
+                                buffer=segment.buf, offset=self.header.nbytes)
+        self.count = int(self.header[1])
+
+    @classmethod
+    def create(cls, name, fields, capacity=4_096):
+        size = 16 + capacity * len(fields) * 8
+        try:
+            segment = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            segment = shared_memory.SharedMemory(name, create=True, size=size)
+        np.ndarray((2,), dtype="<i8", buffer=segment.buf)[:] = (capacity, 0)
+        return cls(segment, fields, owner=True)
+
+    @classmethod
+    def attach(cls, name, fields):
+        segment = shared_memory.SharedMemory(name)
+        if multiprocessing.parent_process() is None:
+            resource_tracker.unregister(segment._name, "shared_memory")
+        return cls(segment, fields)
+
+    def append(self, values):
+        self.slots[self.count % self.capacity] = values
+        self.count += 1
+        self.header[1] = self.count
+
+    def since(self, seen):
+        # (new cursor, [{field: value}, ...] after `seen` still in the ring)
+        count = int(self.header[1])
+        start = max(seen, count - self.capacity)
+        rows = np.take(self.slots, np.arange(start, count) % self.capacity, axis=0)
+        overrun = int(self.header[1]) - self.capacity - start
+        if overrun > 0:
+            rows = rows[overrun:]
+        return count, [dict(zip(self.fields, row)) for row in rows.tolist()]
+
+    def close(self):
+        self.header = self.slots = None
+        self.segment.close()
+        if self.owner:
+            self.segment.unlink()
+
+
+class ShardClient(KrakenClient):
+    # KrakenClient for one shard of pairs; publishes to shared memory only.
+    def __init__(self, pairs, uri, depth=10, prefix="kraken"):
+        super().__init__(pairs=pairs, uri=uri, depth=depth)
+        self.shm = {pair: ShmBook.attach(pair, prefix) for pair in pairs}
+
+    def publish(self, pair, timestamp, bids, asks, record):
+        self.shm[pair].write(timestamp, bids, asks, record)
+
+
+def run_shard(pairs, uri, depth, prefix):
+    asyncio.run(ShardClient(pairs, uri, depth, prefix).connect())
+
+
+def shard_pairs(pairs, shards):
+    return [pairs[i::shards] for i in range(shards) if pairs[i::shards]]
+
+
+class ShardedIngest:
+    # Owns the segments (created on construction, unlinked on stop) and one
+    # worker process per shard. Readers in this process use book(pair);
+    # other processes use ShmBook.attach(pair, prefix).
+    def __init__(self, pairs, shards=None, uri="wss://ws.kraken.com", depth=10, prefix="kraken"):
+        self.pairs = list(pairs)
+        self.uri = uri
+        self.depth = depth
+        self.prefix = prefix
+        self.shards = shard_pairs(self.pairs, shards or min(len(self.pairs), os.cpu_count() or 1))
+        self.books = {pair: ShmBook.create(pair, depth, prefix) for pair in self.pairs}
+        self.processes = []
+
+    def start(self):
+        for shard in self.shards:
+            process = multiprocessing.Process(target=run_shard, args=(shard, self.uri, self.depth, self.prefix),
+                                              name=f"ingest-{'-'.join(shard)}", daemon=True)
+            process.start()
+            self.processes.append(process)
+        return self
+
+    def book(self, pair):
+        return self.books[pair]
+
+    def latest_snapshot(self, pair):
+        return self.books[pair].read()
+
+    def snapshot_if_newer(self, pair, seen_seq):
+        return self.books[pair].read_if_newer(seen_seq)
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        self.processes = []
+        for book in self.books.values():
+            book.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,115 @@
+# --- strategies.py ---
+# One strategy object, three places to run it. A strategy has two entry
+# points that must emit the same signals:
+#   batch(df, mid_price_df) -> signal_df      vectorized over a whole range
+#       (long frame or WideSnapshots); columns timestamp, signal, price.
+#       Strategies are also callable with the same arguments, so they drop
+#       into BacktestEngine(strategy_fn=...) in place of a function.
+#   on_snapshot(timestamp, bids, asks) -> (signal, price) or None
+#       one book snapshot at a time ([(price, volume), ...] floats per
+#       side), O(depth) work and no history. Used by the replay pipeline
+#       and live by KrakenClient(strategy=...).
+# Signals are "LONG"/"SHORT"; None means flat. tests/test_strategies.py checks
+# that both paths agree on logged data.
+import numpy as np
+
+from fixed_point import VOLUME_SCALE, to_tick, to_ticks, volume_limit
+from strategy_liquidity import liquidity_wall_strategy, signal_frame
+from wide_store import WideSnapshots
+
+
+def snapshot_mid(bids, asks):
+    best_bid = max((p for p, _ in bids), default=np.nan)
+    best_ask = min((p for p, _ in asks), default=np.nan)
+    return (best_bid + best_ask) / 2
+
+
+class Strategy:
+    params = {}
+
+    def batch(self, df, mid_price_df):
+        raise NotImplementedError
+
+    def on_snapshot(self, timestamp, bids, asks):
+        raise NotImplementedError
+
+    def reset(self):
+        # Forget streaming state before a new pass over the data.
+        pass
+
+    def __call__(self, df, mid_price_df):
+        return self.batch(df, mid_price_df)
+
+    def __repr__(self):
+        args = ", ".join(f"{k}={v!r}" for k, v in self.params.items())
+        return f"{type(self).__name__}({args})"
+
+
+class LiquidityWallStrategy(Strategy):
+    # LONG when a bid level within proximity_ticks of mid holds more than
+    # wall_threshold, else SHORT for such an ask level; the bid side wins.
+    def __init__(self, wall_threshold=15, proximity_ticks=20):
+        self.params = {"wall_threshold": wall_threshold, "proximity_ticks": proximity_ticks}
+        self.reach = 2 * to_tick(proximity_ticks)
+        self.limit = int(volume_limit(wall_threshold))
+
+    def batch(self, df, mid_price_df):
+        return liquidity_wall_strategy(df, mid_price_df, **self.params)
+
+    def on_snapshot(self, timestamp, bids, asks):
+        # Same integer half ticks and lots as strategy_liquidity.
+        mid = snapshot_mid(bids, asks)
+        if mid != mid:
+            return None
+        half = to_tick(mid * 2)
+        reach = self.reach
+        largest_bid = max((to_tick(v, VOLUME_SCALE) for p, v in bids
+                           if v == v and 2 * to_tick(p) >= half - reach), default=0)
+        if largest_bid > self.limit:
+            return "LONG", mid
+        largest_ask = max((to_tick(v, VOLUME_SCALE) for p, v in asks
+                           if v == v and 2 * to_tick(p) <= half + reach), default=0)
+        if largest_ask > self.limit:
+            return "SHORT", mid
+        return None
+
+
+class ImbalanceStrategy(Strategy):
+    # Top-of-book imbalance (bid_size - ask_size) / (bid_size + ask_size)
+    # beyond +/- threshold: LONG on bid pressure, SHORT on ask pressure.
+    # Sizes are compared in lots, as in FeatureEngine.
+    def __init__(self, threshold=0.6):
+        self.params = {"threshold": threshold}
+        self.threshold = threshold
+
+    def batch(self, df, mid_price_df):
+        if isinstance(df, WideSnapshots):
+            df = df.to_long()
+        bids = df[df["side"] == "bid"].dropna(subset=["price"])
+        asks = df[df["side"] == "ask"].dropna(subset=["price"])
+        bid_size = bids.loc[bids.groupby("timestamp")["price"].idxmax()].set_index("timestamp")["volume"]
+        ask_size = asks.loc[asks.groupby("timestamp")["price"].idxmin()].set_index("timestamp")["volume"]
+
+        mids = mid_price_df.drop_duplicates("timestamp").set_index("timestamp")["mid_price"]
+        mids = mids[mids.notna()]
+        bid_lots = to_ticks(bid_size.reindex(mids.index).to_numpy(dtype=float), VOLUME_SCALE)
+        ask_lots = to_ticks(ask_size.reindex(mids.index).to_numpy(dtype=float), VOLUME_SCALE)
+        total = bid_lots + ask_lots
+        with np.errstate(divide="ignore", invalid="ignore"):
+            imbalance = np.where(total > 0, (bid_lots - ask_lots) / total, 0.0)
+        codes = np.where(imbalance > self.threshold, 1, np.where(imbalance < -self.threshold, -1, 0))
+        return signal_frame(mids.index, mids.to_numpy(dtype=float), codes)
+
+    def on_snapshot(self, timestamp, bids, asks):
+        mid = snapshot_mid(bids, asks)
+        if mid != mid:
+            return None
+        bid_lots = to_tick(max(bids)[1], VOLUME_SCALE)
+        ask_lots = to_tick(min(asks)[1], VOLUME_SCALE)
+        total = bid_lots + ask_lots
+        imbalance = (bid_lots - ask_lots) / total if total > 0 else 0.0
+        if imbalance > self.threshold:
+            return "LONG", mid
+        if imbalance < -self.threshold:
+            return "SHORT", mid
+        return None
@@ -1,24 +1,133 @@
+import numpy as np
 import pandas as pd
+from fixed_point import NO_HIGH, VOLUME_SCALE, to_tick, to_ticks, volume_limit
+from wide_store import WideSnapshots
+
+SIGNAL_COLUMNS = ["timestamp", "signal", "price"]
+
+
+def _half_ticks(mids):
+    # Mid prices as exact int64 (best_bid + best_ask) ticks, plus a mask of
+    # snapshots that actually have both sides quoted.
+    quoted = ~np.isnan(mids)
+    return to_ticks(np.where(quoted, mids, 0) * 2), quoted
+
+
+def nearby_wall_volumes(df, mid_price_df, proximity_ticks):
+    # Columnar pass over the long (timestamp, side, price, volume) frame.
+    # Returns the snapshot timestamps, their mid prices, whether a mid row
+    # exists, and the largest bid/ask volume (in lots) within each proximity
+    # of mid with shape (len(proximity_ticks), n_snapshots). Proximity tests
+    # run on integer ticks: 2 * price >= best_bid + best_ask - 2 * proximity.
+    codes, timestamps = pd.factorize(df["timestamp"], sort=True)
+    mids = mid_price_df.drop_duplicates("timestamp").set_index("timestamp")["mid_price"]
+    snap_mid = mids.reindex(timestamps).to_numpy(dtype=float)
+    has_mid = timestamps.isin(mids.index)
+    snap_half, snap_quoted = _half_ticks(snap_mid)
+
+    price = df["price"].to_numpy(dtype=float)
+    volume = df["volume"].to_numpy(dtype=float)
+    valid = (codes >= 0) & ~np.isnan(price) & ~np.isnan(volume)
+    codes = codes[valid]
+    side = df["side"].to_numpy()[valid]
+    price2 = to_ticks(price[valid]) * 2
+    lots = to_ticks(volume[valid], VOLUME_SCALE)
+    row_half = snap_half[codes]
+    is_bid = (side == "bid") & snap_quoted[codes]
+    is_ask = (side == "ask") & snap_quoted[codes]
+
+    proximity_ticks = np.atleast_1d(proximity_ticks)
+    n = len(timestamps)
+    bid_walls = np.full((len(proximity_ticks), n), NO_HIGH)
+    ask_walls = np.full((len(proximity_ticks), n), NO_HIGH)
+    for i, proximity in enumerate(proximity_ticks):
+        reach = 2 * to_tick(proximity)
+        near_bid = is_bid & (price2 >= row_half - reach)
+        near_ask = is_ask & (price2 <= row_half + reach)
+        np.maximum.at(bid_walls[i], codes[near_bid], lots[near_bid])
+        np.maximum.at(ask_walls[i], codes[near_ask], lots[near_ask])
+
+    # No nearby level counts as a wall of size 0, as in the per-snapshot loop.
+    bid_walls[bid_walls == NO_HIGH] = 0
+    ask_walls[ask_walls == NO_HIGH] = 0
+    return timestamps, snap_mid, has_mid, bid_walls, ask_walls
+
+
+def nearby_wall_volumes_wide(snapshots, mid_price_df, proximity_ticks):
+    # Same result as nearby_wall_volumes for a WideSnapshots range: the
+    # levels are already laid out per snapshot, so each side is one masked
+    # row-wise max.
+    timestamps = snapshots.time_index()
+    mids = mid_price_df.drop_duplicates("timestamp").set_index("timestamp")["mid_price"]
+    snap_mid = mids.reindex(timestamps).to_numpy(dtype=float)
+    has_mid = timestamps.isin(mids.index)
+    snap_half, snap_quoted = _half_ticks(snap_mid)
+    snap_half, snap_quoted = snap_half[:, None], snap_quoted[:, None]
+
+    sides = {}
+    for name in ("bid", "ask"):
+        price = np.asarray(getattr(snapshots, f"{name}_price"))
+        volume = np.asarray(getattr(snapshots, f"{name}_volume"))
+        present = ~np.isnan(price) & ~np.isnan(volume) & snap_quoted
+        sides[name] = (present, to_ticks(np.where(present, price, 0)) * 2,
+                       to_ticks(np.where(present, volume, 0), VOLUME_SCALE))
+
+    proximity_ticks = np.atleast_1d(proximity_ticks)
+    bid_walls = np.empty((len(proximity_ticks), len(snapshots)), dtype=np.int64)
+    ask_walls = np.empty((len(proximity_ticks), len(snapshots)), dtype=np.int64)
+    for i, proximity in enumerate(proximity_ticks):
+        reach = 2 * to_tick(proximity)
+        present, price2, lots = sides["bid"]
+        near = present & (price2 >= snap_half - reach)
+        bid_walls[i] = np.max(lots, axis=1, where=near, initial=0)
+        present, price2, lots = sides["ask"]
+        near = present & (price2 <= snap_half + reach)
+        ask_walls[i] = np.max(lots, axis=1, where=near, initial=0)
+
+    return timestamps, snap_mid, has_mid, bid_walls, ask_walls
+
+
+def wall_signal_codes(bid_walls, ask_walls, wall_threshold):
+    # +1 LONG, -1 SHORT, 0 flat; the bid wall wins when both sides qualify.
+    # Walls are in lots, so the threshold is compared in lots as well.
+    limit = volume_limit(wall_threshold)[..., None]
+    return np.where(bid_walls > limit, 1, np.where(ask_walls > limit, -1, 0))
+
+
+def signal_frame(timestamps, mids, codes):
+    if not codes.any():
+        return pd.DataFrame([], columns=SIGNAL_COLUMNS)
+    hit = codes != 0
+    return pd.DataFrame({
+        "timestamp": timestamps[hit],
+        "signal": np.where(codes[hit] > 0, "LONG", "SHORT").astype(object),
+        "price": mids[hit],
+    })
+
 
 def liquidity_wall_strategy(df, mid_price_df, wall_threshold=15, proximity_ticks=20):
-    signals = []
-    grouped = df.groupby("timestamp")
-    for timestamp, snapshot in grouped:
-        bids = snapshot[snapshot["side"] == "bid"][["price", "volume"]].values
-        asks = snapshot[snapshot["side"] == "ask"][["price", "volume"]].values
-        mid_row = mid_price_df[mid_price_df["timestamp"] == timestamp]
-        if mid_row.empty:
-            continue
-        mid = mid_row["mid_price"].values[0]
-
-        nearby_bids = [(p, v) for p, v in bids if p >= mid - proximity_ticks]
-        nearby_asks = [(p, v) for p, v in asks if p <= mid + proximity_ticks]
-        largest_bid = max(nearby_bids, key=lambda x: x[1], default=(None, 0))
-        largest_ask = max(nearby_asks, key=lambda x: x[1], default=(None, 0))
-
-        if largest_bid[1] > wall_threshold:
-            signals.append((timestamp, 'LONG', mid))
-        elif largest_ask[1] > wall_threshold:
-            signals.append((timestamp, 'SHORT', mid))
-
-    return pd.DataFrame(signals, columns=["timestamp", "signal", "price"])
+    # Scalar parameters return the usual signal frame. Array parameters score
+    # every (wall_threshold, proximity_ticks) combination in one call and
+    # return a long frame tagged with both parameter columns.
+    sweep = np.ndim(wall_threshold) > 0 or np.ndim(proximity_ticks) > 0
+    thresholds = np.atleast_1d(wall_threshold)
+    proximities = np.atleast_1d(proximity_ticks)
+
+    walls_fn = nearby_wall_volumes_wide if isinstance(df, WideSnapshots) else nearby_wall_volumes
+    timestamps, mids, has_mid, bid_walls, ask_walls = walls_fn(df, mid_price_df, proximities)
+    timestamps, mids = timestamps[has_mid], mids[has_mid]
+    bid_walls, ask_walls = bid_walls[:, has_mid], ask_walls[:, has_mid]
+
+    if not sweep:
+        codes = wall_signal_codes(bid_walls[0], ask_walls[0], thresholds[0])
+        return signal_frame(timestamps, mids, codes)
+
+    frames = []
+    for i, proximity in enumerate(proximities):
+        codes = wall_signal_codes(bid_walls[i], ask_walls[i], thresholds)
+        for j, threshold in enumerate(thresholds):
+            frame = signal_frame(timestamps, mids, codes[j])
+            frame.insert(0, "proximity_ticks", proximity)
+            frame.insert(0, "wall_threshold", threshold)
+            frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
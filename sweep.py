@@ -0,0 +1,173 @@
+# --- sweep.py ---
+# Parallel parameter sweep for the liquidity-wall backtest. Data is loaded and
+# turned into wide snapshot arrays once, placed in shared memory, and every
+# worker process attaches to the same buffers instead of reloading the CSV.
+import argparse
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from base_engine import BacktestEngine
+from exit_engine import build_extreme_tables, simulate_tp_sl_trades
+from strategy_liquidity import liquidity_wall_strategy
+from wide_store import FIELDS, WideSnapshots, long_to_wide
+
+SIGNAL_PARAMS = ("wall_threshold", "proximity_ticks")
+EXIT_PARAMS = ("TP", "SL", "risk_pct", "maker_fee", "taker_fee", "slippage")
+
+DEFAULT_GRID = {
+    "wall_threshold": [15],
+    "proximity_ticks": [20],
+    "TP": [50],
+    "SL": [50],
+    "risk_pct": [100],
+    "maker_fee": [0.0016],
+    "taker_fee": [0.0026],
+    "slippage": [1.0],
+}
+
+_worker = {}
+
+
+def share_arrays(arrays):
+    # Copy each array into a new shared memory block once; returns the
+    # blocks (kept alive by the parent) and a picklable spec for workers.
+    blocks, spec = [], {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        spec[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, spec
+
+
+def attach_arrays(spec):
+    blocks, arrays = [], {}
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return blocks, arrays
+
+
+def _init_worker(spec, capital):
+    blocks, arrays = attach_arrays(spec)
+    snapshots = WideSnapshots(arrays["timestamps"], *(arrays[name] for name in FIELDS))
+    mid_price_df = snapshots.mid_prices()
+    _worker.update(
+        blocks=blocks,
+        snapshots=snapshots,
+        mid_price_df=mid_price_df,
+        tables=build_extreme_tables(mid_price_df["mid_price"].to_numpy()),
+        capital=capital,
+    )
+
+
+def score_trades(trade_df, capital):
+    if trade_df.empty:
+        return {"final_equity": capital, "max_drawdown": 0.0, "trades": 0, "win_rate": np.nan}
+    equity = trade_df["equity"]
+    return {
+        "final_equity": equity.iloc[-1],
+        "max_drawdown": (equity.cummax() - equity).max(),
+        "trades": len(trade_df),
+        "win_rate": (trade_df["net_pnl"] > 0).mean(),
+    }
+
+
+def _run_group(task):
+    # One signal computation per (wall_threshold, proximity_ticks), reused
+    # for every exit/fee combination in the group.
+    signal_params, exit_combos = task
+    w = _worker
+    signal_df = liquidity_wall_strategy(w["snapshots"], w["mid_price_df"], **signal_params)
+    results = []
+    for exit_params in exit_combos:
+        trade_df = simulate_tp_sl_trades(signal_df, w["mid_price_df"], w["capital"],
+                                         tables=w["tables"], **exit_params)
+        results.append({**signal_params, **exit_params, **score_trades(trade_df, w["capital"])})
+    return results
+
+
+def grid_combos(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def random_combos(grid, n_iter, seed=None):
+    combos = grid_combos(grid)
+    if n_iter >= len(combos):
+        return combos
+    return random.Random(seed).sample(combos, n_iter)
+
+
+def run_sweep(data_path, grid=None, n_iter=None, capital=20, workers=None, seed=None,
+              pair=None, start=None, end=None):
+    # Evaluates the grid (or n_iter random points of it) on all cores and
+    # returns a results table ranked by final equity.
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    combos = grid_combos(grid) if n_iter is None else random_combos(grid, n_iter, seed)
+
+    # Loading only: the sweep never reads mid prices or signals back, so
+    # there is nothing to put in the frame cache.
+    engine = BacktestEngine(None, data_path, capital=capital, pair=pair, start=start, end=end, cache=False)
+    data = engine.load_data()
+    snapshots = data if isinstance(data, WideSnapshots) else long_to_wide(data, levels=None)
+    arrays = {"timestamps": np.asarray(snapshots.timestamps)}
+    arrays.update({name: np.asarray(getattr(snapshots, name)) for name in FIELDS})
+
+    groups = {}
+    for combo in combos:
+        key = tuple(combo[p] for p in SIGNAL_PARAMS)
+        groups.setdefault(key, []).append({p: combo[p] for p in EXIT_PARAMS})
+    tasks = [(dict(zip(SIGNAL_PARAMS, key)), exits) for key, exits in groups.items()]
+
+    blocks, spec = share_arrays(arrays)
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 initializer=_init_worker, initargs=(spec, capital)) as pool:
+            rows = [row for group in pool.map(_run_group, tasks) for row in group]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    results = pd.DataFrame(rows)
+    return results.sort_values(["final_equity", "max_drawdown"], ascending=[False, True],
+                               ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep for the liquidity wall backtest")
+    parser.add_argument("data_path", help="CSV log, Parquet store or wide snapshot store")
+    parser.add_argument("--pair")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--capital", type=float, default=20)
+    for name in SIGNAL_PARAMS + EXIT_PARAMS:
+        flag = "--" + name.lower().replace("_", "-")
+        parser.add_argument(flag, dest=name, type=float, nargs="+", default=DEFAULT_GRID[name])
+    parser.add_argument("--random", type=int, metavar="N", help="sample N random grid points instead of all")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="write the full ranked table to this CSV")
+    args = parser.parse_args()
+
+    grid = {name: getattr(args, name) for name in SIGNAL_PARAMS + EXIT_PARAMS}
+    results = run_sweep(args.data_path, grid, n_iter=args.random, capital=args.capital,
+                        workers=args.workers, seed=args.seed, pair=args.pair,
+                        start=args.start, end=args.end)
+    if args.out:
+        results.to_csv(args.out, index=False)
+    print(results.head(args.top).to_string())
+
+
+if __name__ == "__main__":
+    main()
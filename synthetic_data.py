@@ -0,0 +1,103 @@
+# --- synthetic_data.py ---
+# Deterministic synthetic L2 logs in the data_logger format, for benchmarks
+# and for running the backtests without a recorded day. One
+# <PAIR>_orderbook_<date>.csv per day (timestamp, side, price, volume rows,
+# best level first, no header) plus its .tidx sidecar.
+#   volatility      std of the mid's log return per snapshot
+#   wall_frequency  chance per snapshot and side that one of the logged
+#                   levels holds a wall of wall_size volume
+# The same seed always writes the same files; each day draws from its own
+# stream, so day 3 does not depend on how many days are generated.
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from time_index import build_csv_index
+
+TICK = 0.1
+
+
+def synthetic_day(date, levels=10, interval=1.0, hours=24.0, start_mid=100_000.0,
+                  volatility=5e-5, wall_frequency=0.02, wall_size=(15.0, 60.0), seed=0):
+    # (long frame for one day, closing mid to carry into the next day)
+    if interval < 1:
+        raise ValueError("data_logger stamps whole seconds; interval must be >= 1")
+    rng = np.random.default_rng([seed, pd.Timestamp(date).toordinal()])
+    n = round(hours * 3600 / interval)
+    stamps = pd.Timestamp(date) + pd.to_timedelta(np.arange(n) * interval, unit="s")
+    # Logged at whole seconds, as data_logger does.
+    stamps = stamps.floor("s").strftime("%Y-%m-%d %H:%M:%S").to_numpy()
+
+    mids = start_mid * np.exp(np.cumsum(rng.normal(0.0, volatility, n)))
+    best_bid = np.floor(mids / TICK) * TICK
+    best_ask = best_bid + rng.geometric(0.6, n) * TICK
+
+    # Gaps of at least one tick between levels, so books never cross.
+    def offsets():
+        gaps = rng.geometric(0.4, (n, levels - 1))
+        return np.concatenate([np.zeros((n, 1)), np.cumsum(gaps, axis=1)], axis=1) * TICK
+
+    bid_prices = best_bid[:, None] - offsets()
+    ask_prices = best_ask[:, None] + offsets()
+
+    volumes = rng.exponential(2.0, (2, n, levels))
+    walls = rng.random((2, n)) < wall_frequency
+    side_idx, row_idx = np.nonzero(walls)
+    level_idx = rng.integers(0, levels, len(row_idx))
+    volumes[side_idx, row_idx, level_idx] = rng.uniform(*wall_size, len(row_idx))
+
+    prices = np.stack([bid_prices, ask_prices], axis=1).round(1)
+    volumes = volumes.transpose(1, 0, 2).round(8)
+    df = pd.DataFrame({
+        "timestamp": np.repeat(stamps, 2 * levels),
+        "side": np.tile(np.repeat(["bid", "ask"], levels), n),
+        "price": prices.reshape(-1),
+        "volume": volumes.reshape(-1),
+    })
+    return df, float(mids[-1]) if n else start_mid
+
+
+def generate(out_dir, days=1, pair="XBT/USD", start_date="2025-05-10", levels=10, interval=1.0,
+             hours=24.0, start_mid=100_000.0, volatility=5e-5, wall_frequency=0.02,
+             wall_size=(15.0, 60.0), seed=0):
+    # Writes the daily logs (replacing any existing ones) and returns their paths.
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    mid = start_mid
+    for date in pd.date_range(start_date, periods=days, freq="D"):
+        df, mid = synthetic_day(date, levels, interval, hours, mid, volatility,
+                                wall_frequency, wall_size, seed)
+        path = os.path.join(out_dir, f"{pair.replace('/', '-')}_orderbook_{date:%Y-%m-%d}.csv")
+        df.to_csv(path, header=False, index=False)
+        build_csv_index(path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic order book logs in the data_logger format")
+    parser.add_argument("out_dir", nargs="?", default="synthetic_logs")
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--pair", default="XBT/USD")
+    parser.add_argument("--start-date", default="2025-05-10")
+    parser.add_argument("--levels", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between snapshots")
+    parser.add_argument("--hours", type=float, default=24.0, help="hours logged per day")
+    parser.add_argument("--start-mid", type=float, default=100_000.0)
+    parser.add_argument("--volatility", type=float, default=5e-5, help="log-return std per snapshot")
+    parser.add_argument("--wall-frequency", type=float, default=0.02, help="wall chance per snapshot and side")
+    parser.add_argument("--wall-size", type=float, nargs=2, default=(15.0, 60.0), metavar=("MIN", "MAX"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate(args.out_dir, args.days, args.pair, args.start_date, args.levels, args.interval,
+                     args.hours, args.start_mid, args.volatility, args.wall_frequency,
+                     tuple(args.wall_size), args.seed)
+    for path in paths:
+        print(f"🧪 Wrote {path} ({os.path.getsize(path) / 2**20:,.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# --- tests/conftest.py ---
+# The modules live flat in the repo root.
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_data import generate  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Caches and logs written relative to the cwd stay out of the repo.
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def logs(tmp_path):
+    # Two 20-minute days of XBT/USD logs with .tidx sidecars.
+    out_dir = tmp_path / "logs"
+    generate(str(out_dir), days=2, hours=1 / 3, seed=1)
+    return str(out_dir)
+
+
+@pytest.fixture
+def parquet_logs(tmp_path):
+    # Snapshot store with XBT/USD and ETH/USD over the same 6 minutes.
+    from parquet_store import ParquetSnapshotWriter
+    from synthetic_data import synthetic_day
+
+    root = str(tmp_path / "parquet")
+    writer = ParquetSnapshotWriter(root, flush_rows=2_000)
+    for pair, seed, mid in (("XBT/USD", 1, 100_000.0), ("ETH/USD", 2, 20_000.0)):
+        df, _ = synthetic_day("2025-05-10", hours=0.1, start_mid=mid, seed=seed)
+        for timestamp, rows in df.groupby("timestamp", sort=True):
+            levels = {side: list(zip(g["price"], g["volume"])) for side, g in rows.groupby("side")}
+            writer.append(pair, pd.Timestamp(timestamp).to_pydatetime(), levels["bid"], levels["ask"])
+    writer.close()
+    return root
@@ -0,0 +1,66 @@
+# --- tests/test_bars.py ---
+import pandas as pd
+
+import bars
+from bars import BarEngine, compute_bars
+from frame_cache import FrameCache
+from loader import parse_orderbook_csv
+from synthetic_data import synthetic_day
+
+
+def log_bytes(seed):
+    df, _ = synthetic_day("2025-05-10", hours=0.25, seed=seed)
+    return df.to_csv(header=False, index=False).encode()
+
+
+def expected_bars(data, freq):
+    # Bars over every complete row of data, computed in one pass.
+    return compute_bars(parse_orderbook_csv(data[:data.rfind(b"\n") + 1]), freq)
+
+
+def test_appended_log_bars_match_full_recompute(tmp_path):
+    data = log_bytes(seed=3)
+    path = tmp_path / "XBT-USD_orderbook_2025-05-10.csv"
+    engine = BarEngine(str(path), cache=FrameCache(str(tmp_path / "cache")))
+    written = 0
+    # Cuts fall mid-row, as when reading a log data_logger is appending to.
+    for cut in (len(data) // 7, len(data) // 7 + 5, len(data) // 2 + 13, len(data)):
+        with open(path, "ab") as f:
+            f.write(data[written:cut])
+        written = cut
+        for freq in ("1min", "10s"):
+            pd.testing.assert_frame_equal(engine.bars(freq), expected_bars(data[:cut], freq))
+
+
+def test_cached_partials_are_extended_not_reparsed(tmp_path, monkeypatch):
+    data = log_bytes(seed=3)
+    path = tmp_path / "XBT-USD_orderbook_2025-05-10.csv"
+    cache = FrameCache(str(tmp_path / "cache"))
+    half = data.rfind(b"\n", 0, len(data) // 2) + 1
+    path.write_bytes(data[:half])
+    BarEngine(str(path), cache=cache).bars("1min")
+
+    path.write_bytes(data)
+    parsed = []
+
+    def parse(chunk):
+        parsed.append(len(chunk))
+        return parse_orderbook_csv(chunk)
+
+    monkeypatch.setattr(bars, "parse_orderbook_csv", parse)
+    # A new engine (e.g. the next process) picks up the partials from the cache.
+    pd.testing.assert_frame_equal(BarEngine(str(path), cache=cache).bars("1min"), expected_bars(data, "1min"))
+    # Only the last cached bar (one minute of the log) and the appended half are read.
+    assert sum(parsed) < len(data) - half + len(data) // 10
+
+
+def test_rewritten_log_is_recomputed(tmp_path):
+    path = tmp_path / "XBT-USD_orderbook_2025-05-10.csv"
+    cache = FrameCache(str(tmp_path / "cache"))
+    old = log_bytes(seed=3)
+    path.write_bytes(old[:len(old) // 2])
+    BarEngine(str(path), cache=cache).bars("1min")
+
+    new = log_bytes(seed=4)
+    path.write_bytes(new)
+    pd.testing.assert_frame_equal(BarEngine(str(path), cache=cache).bars("1min"), expected_bars(new, "1min"))
@@ -0,0 +1,54 @@
+# --- tests/test_bench_ingest.py ---
+import asyncio
+import json
+import socket
+
+import pytest
+import websockets
+
+from bench_ingest import run
+from kraken_stub_server import KrakenStubServer
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.parametrize("depth", [10, 25])
+def test_client_depth_follows_server(depth):
+    result = run(rate=2_000, duration=0.5, pairs=["XBT/USD"], depth=depth, port=free_port(), warmup=0.3)
+    assert result["messages"] > 100
+    assert result["resyncs"] == 0
+    assert "send_to_publish_us" in result
+
+
+def test_resubscribe_keeps_channel_ids():
+    server = KrakenStubServer(port=free_port(), rate=100)
+    server.start()
+
+    async def statuses():
+        async with websockets.connect(server.uri) as ws:
+            ids = []
+
+            async def send(event, pairs):
+                await ws.send(json.dumps({"event": event, "pair": pairs, "subscription": {"name": "book"}}))
+
+            async def subscribed():
+                while True:
+                    msg = json.loads(await ws.recv())
+                    if isinstance(msg, dict) and msg.get("status") == "subscribed":
+                        return msg["pair"], msg["channelID"]
+
+            await send("subscribe", ["XBT/USD", "ETH/USD"])
+            ids += [await subscribed(), await subscribed()]
+            await send("unsubscribe", ["XBT/USD"])
+            await send("subscribe", ["XBT/USD"])
+            ids.append(await subscribed())
+            return ids
+
+    try:
+        assert asyncio.run(statuses()) == [("XBT/USD", 1), ("ETH/USD", 2), ("XBT/USD", 1)]
+    finally:
+        server.stop()
@@ -0,0 +1,108 @@
+# --- tests/test_client_shared.py ---
+import sys
+import threading
+from types import MappingProxyType
+
+import pytest
+
+import client_shared
+from client_shared import RecordStream, SnapshotChannel, channel, latest_snapshot
+
+
+@pytest.fixture
+def switch_often():
+    # Hand the GIL over far more often than usual so reader and writer
+    # interleave between almost every bytecode.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def snapshot(n):
+    # Every field derives from n, so a torn snapshot would not agree with itself.
+    return MappingProxyType({
+        "bid_price": float(n),
+        "ask_price": float(n) + 0.5,
+        "timestamp": n,
+        "bids": tuple((float(n) - i, 1.0) for i in range(10)),
+        "asks": tuple((float(n) + 0.5 + i, 1.0) for i in range(10)),
+    })
+
+
+def test_publish_numbers_snapshots_in_order():
+    ch = SnapshotChannel()
+    assert ch.read() == (0, None)
+    for n in range(1, 6):
+        assert ch.publish(snapshot(n)) == n
+        seq, data = ch.read()
+        assert seq == n and data["timestamp"] == n
+
+
+def test_readers_never_see_torn_snapshots_or_seq_going_back(switch_often):
+    ch = SnapshotChannel()
+    writes = 20_000
+    done = threading.Event()
+    errors = []
+
+    def read():
+        last = 0
+        while not done.is_set() or last < writes:
+            seq, data = ch.read()
+            if seq < last:
+                errors.append(f"seq went back {last} -> {seq}")
+            if seq:
+                if data["timestamp"] != seq or data["bids"][0][0] != seq or data["asks"][9][0] != seq + 9.5:
+                    errors.append(f"torn snapshot at {seq}")
+            last = seq
+            if errors:
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    for n in range(1, writes + 1):
+        ch.publish(snapshot(n))
+    done.set()
+    for reader in readers:
+        reader.join(10)
+
+    assert not any(reader.is_alive() for reader in readers)
+    assert errors == []
+    assert ch.read()[0] == writes
+
+
+def test_client_publish_is_visible_through_channel(monkeypatch):
+    from kraken_client import KrakenClient
+
+    monkeypatch.setattr(client_shared, "channels", {})
+    client = KrakenClient(pairs=["XBT/USD"])
+    assert channel("XBT/USD") is client.channels["XBT/USD"]
+    client.handle([0, {"bs": [["100.0", "1.0", "0"]], "as": [["100.1", "2.0", "0"]]}, "book-10", "XBT/USD"])
+    client.handle([0, {"b": [["100.05", "3.0", "1"]]}, "book-10", "XBT/USD"])
+
+    seq, data = latest_snapshot("XBT/USD")
+    assert seq == 2
+    assert (data["bid_price"], data["ask_price"]) == (100.05, 100.1)
+    assert data["bids"] == ((100.05, 3.0), (100.0, 1.0))
+    with pytest.raises(TypeError):
+        data["bid_price"] = 0.0
+
+
+def test_record_stream_reader_sees_every_record_once(switch_often):
+    stream = RecordStream(capacity=64)
+    writes = 20_000
+    seen, cursor = [], 0
+
+    writer = threading.Thread(target=lambda: [stream.publish(n) for n in range(writes)])
+    writer.start()
+    while writer.is_alive() or cursor < writes:
+        cursor, records = stream.since(cursor)
+        seen.extend(records)
+    writer.join()
+
+    # Lapped records are lost, but what arrives is in order and never repeated.
+    assert seen == sorted(set(seen))
+    assert seen[-1] == writes - 1
+    assert stream.since(writes - 10) == (writes, list(range(writes - 10, writes)))
+    assert stream.since(0) == (writes, list(range(writes - 64, writes)))
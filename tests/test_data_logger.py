@@ -0,0 +1,64 @@
+# --- tests/test_data_logger.py ---
+import json
+import threading
+
+from loader import read_orderbook_csv
+
+
+def test_start_logger_logs_every_pair(tmp_path, monkeypatch):
+    import data_logger
+
+    monkeypatch.setattr(data_logger, "SAVE_DIR", str(tmp_path))
+    books = {"XBT/USD": {"bids": [(99_999.0, 1.0)], "asks": [(100_001.0, 2.0)]},
+             "ETH/USD": {"bids": [(1_999.0, 3.0)], "asks": [(2_001.0, 4.0)]}}
+    calls, done = [], threading.Event()
+
+    def latest_snapshot(pair):
+        if len(calls) == 2:
+            # Park the daemon logger thread so it cannot write into later tests.
+            done.set()
+            threading.Event().wait()
+        calls.append(pair)
+        return 1, books[pair]
+
+    monkeypatch.setattr(data_logger, "latest_snapshot", latest_snapshot)
+    data_logger.start_logger(interval=0.01, pairs=list(books))
+    assert done.wait(5)
+
+    assert calls == ["XBT/USD", "ETH/USD"]
+    for pair, book in books.items():
+        df = read_orderbook_csv(data_logger.get_log_path(pair))
+        assert list(zip(df["side"], df["price"])) == [("bid", book["bids"][0][0]), ("ask", book["asks"][0][0])]
+
+
+def test_diff_recorder_closes_while_records_arrive(tmp_path, monkeypatch):
+    import data_logger
+
+    monkeypatch.setattr(data_logger, "DIFF_DIR", str(tmp_path / "diffs"))
+    recorder = data_logger.DiffRecorder(batch_size=50, flush_interval=0.01)
+    stop = threading.Event()
+
+    def produce():
+        i = 0
+        while not stop.is_set():
+            recorder.record("XBT/USD", 1_746_835_200.0 + i * 1e-3, "diff", {"b": [["100.0", str(i), "0"]]})
+            i += 1
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while recorder.written < 500:
+            stop.wait(0.01)
+        closer = threading.Thread(target=recorder.close, daemon=True)
+        closer.start()
+        closer.join(5)
+        assert not closer.is_alive()
+    finally:
+        stop.set()
+        producer.join(5)
+
+    assert recorder.queue.empty()
+    with open(data_logger.get_diff_path("XBT/USD", 1_746_835_200.0)) as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == recorder.written
+    assert [r["data"]["b"][0][1] for r in records] == [str(i) for i in range(len(records))]
@@ -0,0 +1,107 @@
+# --- tests/test_exit_engine.py ---
+import numpy as np
+import pandas as pd
+import pytest
+
+from base_engine import BacktestEngine
+from exit_engine import simulate_tp_sl_trades
+from loader import load_orderbook
+from strategy_liquidity import liquidity_wall_strategy
+
+FEES = dict(maker_fee=0.0016, taker_fee=0.0026, slippage=1.0)
+
+
+def loop_simulate_trades(signal_df, mid_price_df, capital, risk_pct, TP, SL, maker_fee, taker_fee, slippage):
+    # The iterrows loop simulate_tp_sl_trades replaced, except that the
+    # crossings are rounded to the price scale: in raw floats a mid exactly
+    # on entry +/- TP can fall either side of it, the tick version is exact.
+    trades = []
+    for _, signal in signal_df.iterrows():
+        ts, direction, entry_price = signal["timestamp"], signal["signal"], signal["price"]
+        position_size = capital * (risk_pct / 100) / SL
+        future = mid_price_df[mid_price_df["timestamp"] > ts]
+        if future.empty:
+            break
+
+        exit_price, pnl, exit_time = None, 0, None
+        for _, frow in future.iterrows():
+            price = frow["mid_price"]
+            if direction == "LONG":
+                if round(price - (entry_price + TP), 5) >= 0:
+                    exit_price = entry_price + TP - slippage
+                elif round(price - (entry_price - SL), 5) <= 0:
+                    exit_price = entry_price - SL - slippage
+            elif direction == "SHORT":
+                if round(price - (entry_price - TP), 5) <= 0:
+                    exit_price = entry_price - TP + slippage
+                elif round(price - (entry_price + SL), 5) >= 0:
+                    exit_price = entry_price + SL + slippage
+            if exit_price is not None:
+                pnl = (exit_price - entry_price if direction == "LONG" else entry_price - exit_price) * position_size
+                exit_time = frow["timestamp"]
+                break
+
+        if exit_price:
+            fees = entry_price * position_size * (maker_fee + taker_fee)
+            trades.append({
+                "entry_time": ts, "exit_time": exit_time, "entry_price": entry_price,
+                "exit_price": exit_price, "direction": direction, "position_size": position_size,
+                "gross_pnl": pnl, "fees": fees, "net_pnl": pnl - fees,
+            })
+
+    trade_df = pd.DataFrame(trades)
+    if not trade_df.empty:
+        trade_df["cumulative_pnl"] = trade_df["net_pnl"].cumsum()
+        trade_df["equity"] = capital + trade_df["cumulative_pnl"]
+    return trade_df
+
+
+def assert_parity(signal_df, mid_price_df, TP, SL, capital=20, risk_pct=100):
+    expected = loop_simulate_trades(signal_df, mid_price_df, capital, risk_pct, TP, SL, **FEES)
+    actual = simulate_tp_sl_trades(signal_df, mid_price_df, capital, risk_pct, TP, SL, **FEES)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    return actual
+
+
+T = pd.date_range("2025-05-10", periods=8, freq="s")
+MIDS = pd.DataFrame({"timestamp": T, "mid_price": [100.0, 101.0, 103.0, 97.0, 100.0, 106.0, 94.0, 100.0]})
+
+
+def signals(*rows):
+    return pd.DataFrame([(T[i], side, price) for i, side, price in rows], columns=["timestamp", "signal", "price"])
+
+
+def test_matches_loop_on_hand_built_mids():
+    trades = assert_parity(signals(
+        (0, "LONG", 100.0),    # 106 >= 105 at T5 -> TP
+        (1, "SHORT", 101.0),   # mid exactly on SL (106 at T5) -> SL
+        (2, "LONG", 103.0),    # 97 <= 98 at T3 -> SL
+        (3, "SHORT", 103.0),   # its own tick (97) does not count; 94 <= 98 at T6 -> TP
+        (6, "SHORT", 100.0),   # only T7 left, which stays inside both levels -> never exits
+        (6, "LONG", 94.0),     # TP on the last bar
+    ), MIDS, TP=5, SL=5)
+    assert list(trades["exit_time"]) == [T[5], T[5], T[3], T[6], T[7]]
+
+
+def test_signal_on_the_last_bar_stops_the_search():
+    # The loop stopped at the first signal without later ticks, dropping
+    # everything after it too.
+    trades = assert_parity(signals((0, "LONG", 100.0), (7, "LONG", 100.0), (7, "SHORT", 100.0)), MIDS, TP=5, SL=5)
+    assert len(trades) == 1
+    assert simulate_tp_sl_trades(signals((7, "LONG", 100.0)), MIDS, 20, 100, 5, 5, **FEES).empty
+
+
+def test_take_profit_wins_when_both_cross_on_the_same_tick():
+    # With overlapping levels (TP below SL for a long) a mid can cross both
+    # at once; TP is checked first.
+    trades = assert_parity(signals((0, "LONG", 102.5), (5, "SHORT", 92.5)), MIDS, TP=-2, SL=1)
+    assert list(trades["exit_price"]) == [102.5 + -2 - 1.0, 92.5 - -2 + 1.0]
+
+
+@pytest.mark.parametrize("TP,SL", [(5, 5), (20, 10)])
+def test_matches_loop_on_synthetic_logs(logs, TP, SL):
+    df = load_orderbook(logs)
+    mid_price_df = BacktestEngine(None, None).compute_mid_prices(df)
+    trades = assert_parity(liquidity_wall_strategy(df, mid_price_df), mid_price_df, TP, SL)
+    assert len(trades) > 10
+    assert np.isin(["LONG", "SHORT"], trades["direction"]).all()
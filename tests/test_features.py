@@ -0,0 +1,60 @@
+# --- tests/test_features.py ---
+import pytest
+
+import client_shared
+from features import FeatureEngine
+from kraken_client import LocalOrderBook
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(client_shared, "feature_streams", {})
+    return FeatureEngine("XBT/USD", wall_threshold=15, proximity_ticks=20)
+
+
+@pytest.fixture
+def book(engine):
+    book = LocalOrderBook(listener=engine)
+    book.update([["100.0", "3.0"], ["99.9", "1.0"], ["95.0", "20.0"], ["90.0", "15.0"]], "b")
+    book.update([["100.2", "1.0"], ["100.3", "2.0"], ["120.1", "16.0"], ["120.2", "50.0"]], "a")
+    return book
+
+
+def test_features_of_a_hand_built_book(engine, book):
+    record = engine.publish(book, 1.0)
+
+    # mid 100.1; top sizes 3 (bid) vs 1 (ask); depth 39 vs 69.
+    assert record["mid"] == pytest.approx(100.1)
+    assert record["spread"] == pytest.approx(0.2)
+    assert record["microprice"] == pytest.approx((100.0 * 1 + 100.2 * 3) / 4)
+    assert record["imbalance"] == pytest.approx((3 - 1) / 4)
+    assert record["depth_imbalance"] == pytest.approx((39 - 69) / 108)
+    # 15.0 is not above the threshold; 120.1 is exactly 20 from mid, 120.2 past it.
+    assert record["bid_wall"] == (95.0, 20.0)
+    assert record["ask_wall"] == (120.1, 16.0)
+    assert client_shared.feature_stream("XBT/USD").latest() == (1, record)
+
+
+def test_features_follow_updates_and_deletes(engine, book):
+    book.update([["100.0", "0"]], "b")
+    book.update([["100.2", "4.0"], ["120.1", "10.0"]], "a")
+    record = engine.publish(book, 2.0)
+
+    # Best bid 99.9 x 1 against 100.2 x 4: mid 100.05, walls within 119.95.
+    assert record["mid"] == pytest.approx(100.05)
+    assert record["microprice"] == pytest.approx((99.9 * 4 + 100.2 * 1) / 5)
+    assert record["imbalance"] == pytest.approx((1 - 4) / 5)
+    assert record["depth_imbalance"] == pytest.approx((36 - 66) / 102)
+    assert record["bid_wall"] == (95.0, 20.0)
+    assert record["ask_wall"] is None
+
+
+def test_one_sided_or_cleared_book_publishes_nothing(engine, book):
+    book.update([["100.2", "0"], ["100.3", "0"], ["120.1", "0"], ["120.2", "0"]], "a")
+    assert engine.publish(book, 3.0) is None
+    book.clear()
+    assert engine.totals == {"b": 0, "a": 0}
+    assert engine.walls == {"b": {}, "a": {}}
+    book.update([["50.0", "1.0"]], "b")
+    book.update([["50.5", "1.0"]], "a")
+    assert engine.publish(book, 4.0)["depth_imbalance"] == 0.0
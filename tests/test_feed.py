@@ -0,0 +1,79 @@
+# --- tests/test_feed.py ---
+import asyncio
+import threading
+
+from feed import Feed
+
+
+def run_loop_thread():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    return loop, thread
+
+
+def stop_loop_thread(loop, thread):
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def test_stalled_subscriber_loop_stays_bounded():
+    feed = Feed()
+    loop, thread = run_loop_thread()
+    stalled, release = threading.Event(), threading.Event()
+
+    async def subscribe():
+        return feed.subscribe(maxsize=16)
+
+    def stall():
+        stalled.set()
+        release.wait(5)
+
+    try:
+        subscription = asyncio.run_coroutine_threadsafe(subscribe(), loop).result(5)
+        loop.call_soon_threadsafe(stall)
+        assert stalled.wait(5)
+        for i in range(10_000):
+            feed.publish("XBT/USD", "book", i)
+        # One pending wake-up at most, however many updates were published.
+        wakes = [h for h in loop._ready if getattr(h, "_callback", None) == subscription.wake]
+        assert len(wakes) <= 1
+        assert subscription.qsize() == 16
+        assert subscription.dropped == 10_000 - 16
+        release.set()
+
+        async def drain():
+            subscription.close()
+            return [data async for _, _, data in subscription]
+
+        assert asyncio.run_coroutine_threadsafe(drain(), loop).result(5) == list(range(10_000 - 16, 10_000))
+    finally:
+        release.set()
+        stop_loop_thread(loop, thread)
+
+
+def test_conflate_keeps_newest_per_key():
+    async def main():
+        feed = Feed()
+        subscription = feed.subscribe(policy="conflate")
+        for i in range(5):
+            feed.publish("XBT/USD", "book", i)
+            feed.publish("ETH/USD", "book", -i)
+        subscription.close()
+        return [(pair, data) async for pair, _, data in subscription]
+
+    assert asyncio.run(main()) == [("XBT/USD", 4), ("ETH/USD", -4)]
+
+
+def test_closed_loop_unsubscribes():
+    feed = Feed()
+    loop, thread = run_loop_thread()
+
+    async def subscribe():
+        return feed.subscribe()
+
+    asyncio.run_coroutine_threadsafe(subscribe(), loop).result(5)
+    stop_loop_thread(loop, thread)
+    feed.publish("XBT/USD", "book", 1)
+    assert feed.subscribers == ()
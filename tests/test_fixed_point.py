@@ -0,0 +1,20 @@
+# --- tests/test_fixed_point.py ---
+import pytest
+
+from fixed_point import format_price, parse_price, parse_volume, volume_limit
+
+
+def test_parse_round_trips():
+    assert parse_price("5541.3") == 554130000
+    assert parse_price("5541.30000") == 554130000
+    assert parse_price("5541.3000000") == 554130000
+    assert format_price(parse_price("0.00012")) == "0.00012"
+    assert parse_volume("1.23456789") == 123456789
+    assert int(volume_limit(0.29)) == 29000000
+
+
+def test_parse_rejects_digits_past_the_scale():
+    with pytest.raises(ValueError):
+        parse_price("0.00001234")
+    with pytest.raises(ValueError):
+        parse_volume("0.000000001")
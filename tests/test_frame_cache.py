@@ -0,0 +1,41 @@
+# --- tests/test_frame_cache.py ---
+import importlib
+import sys
+
+from frame_cache import callable_key
+
+STRATEGY = '''
+def threshold():
+    return {threshold}
+
+
+def strategy(df, mid_price_df):
+    return mid_price_df[mid_price_df["mid_price"] > threshold()]
+'''
+
+
+def write_module(tmp_path, threshold):
+    (tmp_path / "edited_strategy.py").write_text(STRATEGY.format(threshold=threshold))
+
+
+def test_editing_a_helper_changes_the_key(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    write_module(tmp_path, 1)
+    module = importlib.import_module("edited_strategy")
+    try:
+        before = callable_key(module.strategy)
+        assert callable_key(module.strategy) == before
+        write_module(tmp_path, 100)
+        module = importlib.reload(module)
+        assert callable_key(module.strategy) != before
+    finally:
+        sys.modules.pop("edited_strategy", None)
+
+
+def test_cache_version_changes_the_key():
+    def strategy(df, mid_price_df):
+        return mid_price_df
+
+    before = callable_key(strategy)
+    strategy.cache_version = 2
+    assert callable_key(strategy) != before
@@ -0,0 +1,132 @@
+# --- tests/test_kraken_client.py ---
+import asyncio
+import socket
+import zlib
+
+from kraken_client import KrakenClient, LocalOrderBook
+from kraken_stub_server import KrakenStubServer
+
+# The v1 book checksum example layout from Kraken's docs: ten asks from
+# 0.05005 up and ten bids from 0.05000 down, 0.00000500 each.
+DOC_ASKS = [[f"0.0{5005 + 5 * i}", "0.00000500"] for i in range(10)]
+DOC_BIDS = [[f"0.0{5000 - 5 * i}", "0.00000500"] for i in range(10)]
+# Asks ascending then bids descending, price and volume without "." and
+# leading zeros.
+DOC_STRING = ("5005500" "5010500" "5015500" "5020500" "5025500" "5030500" "5035500" "5040500" "5045500" "5050500"
+              "5000500" "4995500" "4990500" "4985500" "4980500" "4975500" "4970500" "4965500" "4960500" "4955500")
+
+
+def book_message(pair, data):
+    return [0, data, "book-10", pair]
+
+
+def test_book_keeps_both_sides_best_first():
+    book = LocalOrderBook()
+    book.update([["99.9", "1.0", "0"], ["100.0", "2.0", "0"], ["99.95", "3.0", "0"]], "b")
+    book.update([["100.2", "1.0", "0"], ["100.1", "2.0", "0"], ["100.15", "3.0", "0"]], "a")
+    assert book.get_depth() == ([(100.0, 2.0), (99.95, 3.0), (99.9, 1.0)],
+                                [(100.1, 2.0), (100.15, 3.0), (100.2, 1.0)])
+    assert book.top() == ((100.0, 2.0), (100.1, 2.0))
+
+
+def test_zero_volume_deletes_and_updates_replace():
+    book = LocalOrderBook()
+    book.update([["100.0", "2.0", "0"], ["99.9", "1.0", "0"]], "b")
+    # The delete may use a different text for the same price.
+    book.update([["100.00000", "0.00000000", "1"], ["99.9", "4.5", "1"]], "b")
+    # Deleting a level that is not there is a no-op.
+    book.update([["98.0", "0.00000000", "1"]], "b")
+    assert book.get_depth() == ([(99.9, 4.5)], [])
+    assert list(book.fragments["b"]) == list(book.bids)
+    book.update([["99.9", "0", "2"]], "b")
+    assert book.top() == ((None, None), (None, None))
+
+
+def test_book_truncates_to_its_depth():
+    book = LocalOrderBook(3)
+    book.update([[f"{100 - i}.0", "1.0", "0"] for i in range(5)], "b")
+    book.update([[f"{101 + i}.0", "1.0", "0"] for i in range(5)][::-1], "a")
+    assert [p for p, _ in book.get_depth()[0]] == [100.0, 99.0, 98.0]
+    assert [p for p, _ in book.get_depth()[1]] == [101.0, 102.0, 103.0]
+    # A better level pushes the worst one out, fragments included.
+    book.update([["100.5", "1.0", "1"]], "b")
+    assert [p for p, _ in book.get_depth()[0]] == [100.5, 100.0, 99.0]
+    assert len(book.fragments["b"]) == 3
+
+
+def test_get_depth_limits_levels_and_returns_floats():
+    book = LocalOrderBook()
+    book.update([["100.12345", "0.00000001", "0"], ["100.1", "1.5", "0"]], "b")
+    bids, asks = book.get_depth(1)
+    assert bids == [(100.12345, 1e-08)] and asks == []
+    assert all(isinstance(x, float) for x in bids[0])
+    book.clear()
+    assert book.get_depth() == ([], []) and not book.fragments["b"]
+
+
+def test_unparseable_level_resyncs_only_its_pair():
+    client = KrakenClient(pairs=["XBT/USD", "SHIB/USD"])
+    client.handle(book_message("XBT/USD", {"bs": [["100.0", "1.0", "0"]], "as": [["100.1", "2.0", "0"]]}))
+    client.handle(book_message("SHIB/USD", {"bs": [["0.0000123", "1.0", "0"]], "as": [["0.0000124", "2.0", "0"]]}))
+
+    assert client.resync_queue == ["SHIB/USD"]
+    assert client.resyncing == {"SHIB/USD"}
+    assert client.books["SHIB/USD"].get_depth() == ([], [])
+    client.handle(book_message("XBT/USD", {"b": [["100.05", "3.0", "1"]]}))
+    assert client.books["XBT/USD"].get_depth() == ([(100.05, 3.0), (100.0, 1.0)], [(100.1, 2.0)])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_checksum_matches_kraken_string_building():
+    book = LocalOrderBook(25)
+    # Sent out of order and with levels past the top ten, which do not count.
+    book.update(DOC_BIDS[::-1] + [["0.04900", "1.00000000"]], "b")
+    book.update(DOC_ASKS[::-1] + [["0.06000", "1.00000000"]], "a")
+    assert book.checksum() == zlib.crc32(DOC_STRING.encode())
+
+
+def test_checksum_follows_updates_and_deletes():
+    book = LocalOrderBook(10)
+    book.update([["100.10000", "1.50000000"], ["100.20000", "0.00010000"]], "a")
+    book.update([["100.00000", "2.00000000"], ["99.90000", "3.00000000"]], "b")
+    book.update([["100.10000", "0.00000000"]], "a")
+    book.update([["99.90000", "3.25000000"]], "b")
+    expected = "10020000" "10000" + "10000000" "200000000" + "9990000" "325000000"
+    assert book.checksum() == zlib.crc32(expected.encode())
+
+
+class ResyncRecordingClient(KrakenClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.resubscribed = []
+
+    async def resubscribe(self, ws, pair):
+        self.resubscribed.append(pair)
+        await super().resubscribe(ws, pair)
+
+
+def test_only_the_drifted_pair_resubscribes():
+    server = KrakenStubServer(port=free_port(), rate=2_000, drop_every=50, drop_pairs=["ETH/USD"])
+    server.start()
+    client = ResyncRecordingClient(pairs=["XBT/USD", "ETH/USD"], uri=server.uri)
+
+    async def run():
+        try:
+            await asyncio.wait_for(client.connect(), 1.5)
+        except asyncio.TimeoutError:
+            pass
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.stop()
+
+    assert client.checksum_failures["XBT/USD"] == 0
+    assert client.checksum_failures["ETH/USD"] > 0
+    assert set(client.resubscribed) == {"ETH/USD"}
+    assert len(client.resubscribed) == client.checksum_failures["ETH/USD"]
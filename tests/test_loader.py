@@ -0,0 +1,46 @@
+# --- tests/test_loader.py ---
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+from loader import load_orderbook, read_orderbook_csv
+from synthetic_data import generate
+
+
+def sequential_load(paths, ticks=False):
+    return pd.concat([read_orderbook_csv(p, ticks=ticks, use_threads=False) for p in paths],
+                     ignore_index=True)
+
+
+@pytest.mark.parametrize("workers", [1, 2, 4])
+@pytest.mark.parametrize("ticks", [False, True])
+def test_parallel_glob_load_matches_sequential_concat(tmp_path, workers, ticks):
+    paths = generate(str(tmp_path / "logs"), days=4, hours=0.05, seed=3)
+    expected = sequential_load(paths, ticks)
+
+    loaded = load_orderbook(str(tmp_path / "logs" / "*.csv"), workers=workers, ticks=ticks)
+    pd.testing.assert_frame_equal(loaded, expected)
+    # Listing order doesn't matter: files are put in date order first.
+    shuffled = load_orderbook(paths[::-1], workers=workers, ticks=ticks)
+    pd.testing.assert_frame_equal(shuffled, expected)
+
+
+def test_parallel_load_of_several_pairs_interleaves_by_time(tmp_path):
+    out_dir = str(tmp_path / "logs")
+    generate(out_dir, days=2, hours=0.05, seed=1)
+    generate(out_dir, days=2, pair="ETH/USD", hours=0.05, start_mid=2_000.0, seed=2)
+    paths = sorted(glob.glob(os.path.join(out_dir, "*.csv")))
+
+    frames = []
+    for path in paths:
+        frame = read_orderbook_csv(path, use_threads=False)
+        frame["pair"] = os.path.basename(path).split("_")[0]
+        frames.append(frame)
+    expected = pd.concat(frames, ignore_index=True).sort_values("timestamp", kind="mergesort",
+                                                                ignore_index=True)
+
+    loaded = load_orderbook(out_dir, workers=4)
+    assert loaded["timestamp"].is_monotonic_increasing
+    pd.testing.assert_frame_equal(loaded.astype({"pair": object}), expected)
@@ -0,0 +1,58 @@
+# --- tests/test_metrics.py ---
+import re
+
+import pytest
+
+import metrics
+
+# name{label="value",...} value, per the Prometheus text exposition format.
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="[^"]*",?)*\})? \S+$')
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(metrics, "registry", {})
+
+
+def test_render_counter_gauge_and_histogram():
+    metrics.counter("updates_total", "Book updates", {"pair": "XBT/USD"}).inc(3)
+    metrics.counter("updates_total", "Book updates", {"pair": "ETH/USD"}).inc()
+    metrics.gauge("queue_depth", "Queued snapshots", fn=lambda: 7)
+    latency = metrics.histogram("apply_seconds", "Apply latency", buckets=(0.001, 0.01))
+    for value in (0.0005, 0.001, 0.005, 0.5):
+        latency.observe(value)
+
+    assert metrics.render() == "\n".join([
+        "# HELP apply_seconds Apply latency",
+        "# TYPE apply_seconds histogram",
+        'apply_seconds_bucket{le="0.001"} 2',
+        'apply_seconds_bucket{le="0.01"} 3',
+        'apply_seconds_bucket{le="+Inf"} 4',
+        "apply_seconds_count 4",
+        "apply_seconds_sum 0.5065",
+        "# HELP queue_depth Queued snapshots",
+        "# TYPE queue_depth gauge",
+        "queue_depth 7",
+        "# HELP updates_total Book updates",
+        "# TYPE updates_total counter",
+        'updates_total{pair="ETH/USD"} 1',
+        'updates_total{pair="XBT/USD"} 3',
+    ]) + "\n"
+
+
+def test_every_line_is_a_comment_or_a_well_formed_sample():
+    metrics.histogram("stage_seconds", "Stage time", {"stage": "load"}).observe(0.2)
+    metrics.histogram("stage_seconds", "Stage time", {"stage": "signals"}).observe(3e-6)
+    metrics.gauge("drawdown", "Max drawdown").set(-0.25)
+    text = metrics.render()
+
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    # One HELP/TYPE pair per metric name, however many label sets it has.
+    assert lines.count("# TYPE stage_seconds histogram") == 1
+    for line in lines:
+        assert line.startswith("# ") or SAMPLE.match(line), line
+    buckets = [line for line in lines if line.startswith('stage_seconds_bucket{stage="load"')]
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts) and counts[-1] == 1
+    assert buckets[-1] == 'stage_seconds_bucket{stage="load",le="+Inf"} 1'
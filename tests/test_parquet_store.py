@@ -0,0 +1,27 @@
+# --- tests/test_parquet_store.py ---
+import pandas as pd
+import pytest
+
+from base_engine import BacktestEngine
+from parquet_store import load_parquet
+from replay import iter_snapshots
+from strategy_liquidity import liquidity_wall_strategy
+
+START, END = "2025-05-10 00:01:30", "2025-05-10 00:03:00"
+
+
+def test_time_filter_matches_full_load(parquet_logs):
+    full = load_parquet(parquet_logs, pair="XBT/USD")
+    window = load_parquet(parquet_logs, pair="XBT/USD", start=START, end=END)
+    expected = full[(full["timestamp"] >= START) & (full["timestamp"] <= END)].reset_index(drop=True)
+    assert len(window) and window["timestamp"].min() == pd.Timestamp(START)
+    pd.testing.assert_frame_equal(window, expected)
+
+
+def test_multi_pair_store_needs_a_pair(parquet_logs):
+    with pytest.raises(ValueError, match="several pairs"):
+        BacktestEngine(liquidity_wall_strategy, parquet_logs, cache=False).load_data()
+    both = load_parquet(parquet_logs, columns=("timestamp", "side", "price", "volume", "pair"))
+    assert set(both["pair"]) == {"XBT-USD", "ETH-USD"}
+    with pytest.raises(ValueError, match="several pairs"):
+        next(iter_snapshots(parquet_logs))
@@ -0,0 +1,48 @@
+# --- tests/test_portfolio.py ---
+import numpy as np
+import pandas as pd
+
+from base_engine import BacktestEngine
+from portfolio import PortfolioBacktest
+from strategy_liquidity import liquidity_wall_strategy
+
+START, END = "2025-05-10 00:01:00", "2025-05-10 00:05:00"
+
+
+def run_trades(engine):
+    mid_price_df, signal_df = engine.prepare()
+    return engine.simulate_trades(signal_df, mid_price_df)
+
+
+def test_windowed_parquet_portfolio_matches_single_pairs(parquet_logs):
+    pairs = ["XBT/USD", "ETH/USD"]
+    portfolio = PortfolioBacktest(liquidity_wall_strategy, parquet_logs, pairs, TP=5, SL=5,
+                                  start=START, end=END)
+    trades = run_trades(portfolio)
+    assert set(trades["pair"]) == set(pairs)
+    assert trades["entry_time"].min() >= pd.Timestamp(START)
+
+    for pair in pairs:
+        single = run_trades(BacktestEngine(liquidity_wall_strategy, parquet_logs, capital=100, risk_pct=10,
+                                           TP=5, SL=5, pair=pair, start=START, end=END, cache=False))
+        ours = trades[trades["pair"] == pair].sort_values("entry_time", kind="mergesort")
+        single = single.sort_values("entry_time", kind="mergesort")
+        np.testing.assert_array_equal(ours["entry_time"].to_numpy(), single["entry_time"].to_numpy())
+        np.testing.assert_allclose(ours["net_pnl"].to_numpy(), single["net_pnl"].to_numpy())
+
+
+def admit(max_pair_risk_pct, max_total_risk_pct, net_pnl):
+    # Three sequential XBT/USD positions; the first loses net_pnl[0].
+    engine = PortfolioBacktest(liquidity_wall_strategy, ".", ["XBT/USD"], capital=100, risk_pct=10,
+                               max_pair_risk_pct=max_pair_risk_pct, max_total_risk_pct=max_total_risk_pct)
+    return engine.admit(np.array([0, 2, 4]), np.array([1, 3, 5]), np.zeros(3, dtype=np.int64),
+                        np.array(net_pnl, dtype=float))
+
+
+def test_admit_after_equity_wipeout_without_total_limit():
+    assert admit(10, None, [-150.0, 1.0, 1.0]).all()
+
+
+def test_admit_total_limit_rejects_once_equity_is_gone():
+    assert admit(None, 50, [-150.0, 1.0, 1.0]).tolist() == [True, False, False]
+    assert admit(None, 50, [-50.0, 1.0, 1.0]).all()
@@ -0,0 +1,139 @@
+# --- tests/test_replay.py ---
+import numpy as np
+import pandas as pd
+import pytest
+
+from base_engine import BacktestEngine
+from replay import StreamingTradeSimulator, iter_diff_snapshots, iter_snapshots, read_diffs, replay_trades
+from strategies import ImbalanceStrategy, LiquidityWallStrategy
+from strategy_liquidity import liquidity_wall_strategy
+
+TRADE_COLUMNS = ["entry_time", "exit_time", "entry_price", "exit_price", "direction", "net_pnl", "equity"]
+
+
+def batch_trades(engine):
+    mid_price_df, signal_df = engine.prepare()
+    return engine.simulate_trades(signal_df, mid_price_df)
+
+
+@pytest.mark.parametrize("strategy", [LiquidityWallStrategy(15, 20), ImbalanceStrategy(0.6)], ids=repr)
+def test_streaming_trades_match_batch(logs, strategy):
+    engine = BacktestEngine(strategy, logs, TP=5, SL=5, cache=False)
+    batch = batch_trades(engine)
+    simulator = StreamingTradeSimulator(engine.capital, engine.risk_pct, engine.TP, engine.SL)
+    stream = pd.DataFrame(list(replay_trades(iter_snapshots(logs), simulator, strategy=strategy)))
+
+    assert len(batch) > 10
+    stream["entry_time"] = pd.to_datetime(stream["entry_time"])
+    stream["exit_time"] = pd.to_datetime(stream["exit_time"])
+    pd.testing.assert_frame_equal(stream[TRADE_COLUMNS], batch[TRADE_COLUMNS].reset_index(drop=True),
+                                  check_dtype=False)
+
+
+def test_exit_order_stream_has_the_batch_trades(logs):
+    strategy = LiquidityWallStrategy(15, 20)
+    engine = BacktestEngine(strategy, logs, TP=5, SL=5, cache=False)
+    batch = batch_trades(engine)
+    simulator = StreamingTradeSimulator(engine.capital, engine.risk_pct, engine.TP, engine.SL, ordered=False)
+    stream = pd.DataFrame(list(replay_trades(iter_snapshots(logs), simulator, strategy=strategy)))
+
+    assert stream["exit_time"].is_monotonic_increasing
+    assert np.isclose(stream["equity"].iloc[-1], batch["equity"].iloc[-1])
+    columns = ["entry_time", "exit_time", "entry_price", "exit_price", "direction", "net_pnl"]
+    stream["entry_time"] = pd.to_datetime(stream["entry_time"])
+    stream["exit_time"] = pd.to_datetime(stream["exit_time"])
+    pd.testing.assert_frame_equal(stream[columns].sort_values(columns[:2], kind="stable").reset_index(drop=True),
+                                  batch[columns].sort_values(columns[:2], kind="stable").reset_index(drop=True),
+                                  check_dtype=False)
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_long_open_position_buffers_only_in_signal_order(ordered):
+    simulator = StreamingTradeSimulator(TP=1, SL=1, slippage=0, ordered=ordered)
+    # Never closes: its TP is 100 and its SL 98, the mid stays at 99.
+    simulator.on_signal(0, "LONG", 99.0)
+    emitted = []
+    for t in range(1, 1_001):
+        # Closes on the next tick at its TP of 99.
+        simulator.on_signal(t, "SHORT", 100.0)
+        emitted += simulator.on_tick(t + 0.5, 99.0)
+
+    if ordered:
+        # Every trade waits behind the first position.
+        assert (len(emitted), len(simulator.done)) == (0, 1_000)
+    else:
+        assert (len(emitted), len(simulator.done), len(simulator.closed)) == (1_000, 0, 0)
+    emitted += simulator.finish()
+    assert len(emitted) == 1_000
+    assert not simulator.open
+
+
+def test_run_streaming_summary_matches_run(logs):
+    strategy = LiquidityWallStrategy(15, 20)
+    engine = BacktestEngine(strategy, logs, TP=5, SL=5, start="2025-05-10 00:05", cache=False)
+    batch = batch_trades(engine)
+    summary = engine.run_streaming()
+    assert summary.trades == len(batch)
+    assert np.isclose(summary.final_equity, batch["equity"].iloc[-1])
+
+
+def test_run_streaming_needs_a_strategy_object(logs):
+    with pytest.raises(TypeError):
+        BacktestEngine(liquidity_wall_strategy, logs, cache=False).run_streaming()
+
+
+T0 = pd.Timestamp("2025-05-10").timestamp()
+# (offset from T0, kind, payload) as KrakenClient hands them to DiffRecorder.
+BOOK_MESSAGES = [
+    (0, "snapshot", {"bs": [["100.0", "1.0", "0"], ["99.9", "2.0", "0"]],
+                     "as": [["100.1", "1.5", "0"], ["100.2", "3.0", "0"]]}),
+    (1, "diff", {"b": [["100.0", "0.00000000", "1"]], "a": [["100.15", "0.5", "1"]]}),
+    (3, "diff", {"b": [["99.95", "4.0", "3"]]}),
+    (4, "reset", {}),
+    (5, "snapshot", {"bs": [["98.0", "1.0", "5"]], "as": [["98.5", "2.0", "5"]]}),
+    (6, "diff", {"a": [["98.4", "1.25", "6"], ["98.5", "0.00000000", "6"]], "c": "0"}),
+]
+
+
+@pytest.fixture
+def diff_log(tmp_path, monkeypatch):
+    # BOOK_MESSAGES recorded by DiffRecorder, with a checkpoint at T0 + 2;
+    # returns (path, [(timestamp, bids, asks)] of the live book per message).
+    import data_logger
+    from kraken_client import LocalOrderBook
+
+    monkeypatch.setattr(data_logger, "DIFF_DIR", str(tmp_path / "diffs"))
+    recorder = data_logger.DiffRecorder(flush_interval=0.01)
+    book = LocalOrderBook(10)
+    expected = []
+    for offset, kind, payload in BOOK_MESSAGES:
+        if offset == 3:
+            recorder.maybe_checkpoint("XBT/USD", book, T0 + 2)
+        recorder.record("XBT/USD", T0 + offset, kind, payload)
+        if kind == "reset":
+            book.clear()
+            continue
+        if kind == "snapshot":
+            book.clear()
+        for side in ("b", "a"):
+            book.update(payload.get(side + "s", []) + payload.get(side, []), side)
+        expected.append((pd.Timestamp(T0 + offset, unit="s"), *book.get_depth(10)))
+    recorder.close()
+    return data_logger.get_diff_path("XBT/USD", T0), expected
+
+
+def test_diff_replay_rebuilds_the_book(diff_log):
+    path, expected = diff_log
+    assert list(iter_diff_snapshots(read_diffs(path))) == expected
+    assert list(iter_snapshots(path)) == expected
+
+
+def test_diff_replay_from_checkpoint(diff_log):
+    path, expected = diff_log
+    start = pd.Timestamp(T0 + 3, unit="s")
+    diffs = list(read_diffs(path, start=start))
+    # Starts at the checkpoint, not the opening snapshot.
+    assert diffs[0][0] == pd.Timestamp(T0 + 2, unit="s")
+    assert list(iter_diff_snapshots(diffs, start=start)) == expected[2:]
+    end = pd.Timestamp(T0 + 5, unit="s")
+    assert list(iter_snapshots(path, start=start, end=end)) == expected[2:4]
@@ -0,0 +1,35 @@
+# --- tests/test_shm_books.py ---
+import os
+
+import pytest
+
+from shm_books import ShmBook
+
+RECORD = {"mid": 100.05, "spread": 0.1, "microprice": 100.04, "imbalance": 0.2, "depth_imbalance": -0.1,
+          "bid_wall": (99.0, 20.0), "ask_wall": None}
+
+
+@pytest.fixture
+def book():
+    book = ShmBook.create("XBT/USD", levels=3, prefix=f"test{os.getpid()}")
+    yield book
+    book.close()
+
+
+def test_write_and_read_round_trip(book):
+    book.write(1.5, [(100.0, 1.0), (99.9, 2.0)], [(100.1, 3.0)], RECORD)
+    seq, snapshot = book.read()
+    assert seq == 1
+    assert snapshot["bids"] == ((100.0, 1.0), (99.9, 2.0))
+    assert snapshot["asks"] == ((100.1, 3.0),)
+    assert snapshot["features"]["mid"] == RECORD["mid"]
+    assert snapshot["features"]["bid_wall"] == (99.0, 20.0)
+    assert book.read_if_newer(seq) is None
+
+
+def test_write_without_record_clears_features(book):
+    book.write(1.0, [(100.0, 1.0)], [(100.1, 3.0)], RECORD)
+    book.write(2.0, [(100.0, 1.0)], [], None)
+    seq, snapshot = book.read()
+    assert seq == 2
+    assert snapshot["features"] is None
@@ -0,0 +1,47 @@
+# --- tests/test_strategies.py ---
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+from base_engine import BacktestEngine
+from replay import iter_snapshots, stream_signals
+from strategies import ImbalanceStrategy, LiquidityWallStrategy
+from strategy_liquidity import SIGNAL_COLUMNS
+from wide_store import convert_csv_to_wide
+
+STRATEGIES = [LiquidityWallStrategy(15, 20), LiquidityWallStrategy(30, 5), ImbalanceStrategy(0.6)]
+
+
+def stream_signal_frame(strategy, snapshots):
+    rows = [(timestamp, *result) for timestamp, _, result in stream_signals(snapshots, strategy)
+            if result is not None]
+    return pd.DataFrame(rows, columns=SIGNAL_COLUMNS)
+
+
+def batch_signal_frame(strategy, data_path, start=None, end=None):
+    engine = BacktestEngine(strategy, data_path, start=start, end=end, cache=False)
+    df = engine.load_data()
+    return strategy.batch(df, engine.compute_mid_prices(df))
+
+
+def assert_same_signals(batch, stream):
+    assert len(stream) > 0
+    batch = batch.assign(timestamp=pd.to_datetime(batch["timestamp"])).reset_index(drop=True)
+    stream = stream.assign(timestamp=pd.to_datetime(stream["timestamp"]))
+    pd.testing.assert_frame_equal(batch[SIGNAL_COLUMNS], stream, check_dtype=False)
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES, ids=repr)
+def test_streaming_matches_batch(logs, strategy):
+    assert_same_signals(batch_signal_frame(strategy, logs), stream_signal_frame(strategy, iter_snapshots(logs)))
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES, ids=repr)
+def test_streaming_matches_batch_on_wide_store_window(logs, strategy):
+    wide = os.path.join(os.path.dirname(logs), "wide")
+    convert_csv_to_wide(sorted(glob.glob(os.path.join(logs, "*.csv"))), wide)
+    start, end = "2025-05-10 00:05:00", "2025-05-11 00:10:00"
+    assert_same_signals(batch_signal_frame(strategy, wide, start, end),
+                        stream_signal_frame(strategy, iter_snapshots(logs, start=start, end=end)))
@@ -0,0 +1,88 @@
+# --- tests/test_strategy_liquidity.py ---
+import pandas as pd
+import pytest
+
+from base_engine import BacktestEngine
+from loader import load_orderbook
+from strategy_liquidity import liquidity_wall_strategy
+
+
+def loop_liquidity_wall_strategy(df, mid_price_df, wall_threshold=15, proximity_ticks=20):
+    # The per-snapshot loop the vectorized strategy replaced, except that
+    # the proximity test is rounded to the price scale: in raw floats a
+    # level exactly on the boundary (mid 99809.7, proximity 1, bid 99808.7)
+    # falls either side of it, while the vectorized tick arithmetic is exact.
+    signals = []
+    for timestamp, snapshot in df.groupby("timestamp"):
+        bids = snapshot[snapshot["side"] == "bid"][["price", "volume"]].values
+        asks = snapshot[snapshot["side"] == "ask"][["price", "volume"]].values
+        mid_row = mid_price_df[mid_price_df["timestamp"] == timestamp]
+        if mid_row.empty:
+            continue
+        mid = mid_row["mid_price"].values[0]
+
+        nearby_bids = [(p, v) for p, v in bids if round(p - (mid - proximity_ticks), 5) >= 0]
+        nearby_asks = [(p, v) for p, v in asks if round(p - (mid + proximity_ticks), 5) <= 0]
+        largest_bid = max(nearby_bids, key=lambda x: x[1], default=(None, 0))
+        largest_ask = max(nearby_asks, key=lambda x: x[1], default=(None, 0))
+
+        if largest_bid[1] > wall_threshold:
+            signals.append((timestamp, "LONG", mid))
+        elif largest_ask[1] > wall_threshold:
+            signals.append((timestamp, "SHORT", mid))
+    return pd.DataFrame(signals, columns=["timestamp", "signal", "price"])
+
+
+def assert_parity(df, wall_threshold, proximity_ticks, mid_price_df=None):
+    if mid_price_df is None:
+        mid_price_df = BacktestEngine(None, None).compute_mid_prices(df)
+    expected = loop_liquidity_wall_strategy(df, mid_price_df, wall_threshold, proximity_ticks)
+    actual = liquidity_wall_strategy(df, mid_price_df, wall_threshold, proximity_ticks)
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected, check_dtype=False)
+    return actual
+
+
+@pytest.mark.parametrize("wall_threshold,proximity_ticks", [(15, 20), (30, 5), (5, 1), (5, 0.5)])
+def test_matches_loop_on_synthetic_logs(logs, wall_threshold, proximity_ticks):
+    # Ten minutes: the reference loop is quadratic in snapshots.
+    signals = assert_parity(load_orderbook(logs, end="2025-05-10 00:10"), wall_threshold, proximity_ticks)
+    assert signals["signal"].nunique() == 2
+
+
+def snapshot(timestamp, bids, asks):
+    rows = [(timestamp, "bid", p, v) for p, v in bids] + [(timestamp, "ask", p, v) for p, v in asks]
+    return pd.DataFrame(rows, columns=["timestamp", "side", "price", "volume"])
+
+
+def test_matches_loop_on_edge_cases():
+    t = pd.date_range("2025-05-10", periods=8, freq="s")
+    df = pd.concat([
+        # First snapshot: a bid wall exactly at mid - proximity counts.
+        snapshot(t[0], [(99.5, 1.0), (80.0, 40.0)], [(100.5, 1.0)]),
+        # Just past the proximity: no wall.
+        snapshot(t[1], [(99.5, 1.0), (79.9, 40.0)], [(100.5, 1.0)]),
+        # Volume equal to the threshold is not a wall.
+        snapshot(t[2], [(99.5, 15.0)], [(100.5, 15.0)]),
+        # Both sides qualify: the bid wins.
+        snapshot(t[3], [(99.5, 20.0)], [(100.5, 50.0)]),
+        # Empty bid side: no mid, no signal despite the ask wall.
+        snapshot(t[4], [], [(100.5, 50.0)]),
+        # Empty ask side.
+        snapshot(t[5], [(99.5, 50.0)], []),
+        # Ask wall exactly at mid + proximity.
+        snapshot(t[6], [(99.5, 1.0)], [(100.5, 1.0), (120.0, 16.0)]),
+        # Two levels tied at the largest volume.
+        snapshot(t[7], [(99.5, 16.0), (99.0, 16.0)], [(100.5, 16.0)]),
+    ], ignore_index=True)
+
+    signals = assert_parity(df, 15, 20)
+    assert list(zip(signals["timestamp"], signals["signal"])) == [
+        (t[0], "LONG"), (t[3], "LONG"), (t[6], "SHORT"), (t[7], "LONG")]
+
+
+def test_snapshots_without_a_mid_row_are_skipped():
+    t = pd.date_range("2025-05-10", periods=3, freq="s")
+    df = pd.concat([snapshot(ts, [(99.5, 20.0)], [(100.5, 1.0)]) for ts in t], ignore_index=True)
+    mid_price_df = BacktestEngine(None, None).compute_mid_prices(df).iloc[1:]
+    signals = assert_parity(df, 15, 20, mid_price_df)
+    assert list(signals["timestamp"]) == list(t[1:])
@@ -0,0 +1,49 @@
+# --- tests/test_sweep.py ---
+import contextlib
+import functools
+import io
+import os
+
+import numpy as np
+
+from base_engine import BacktestEngine
+from strategy_liquidity import liquidity_wall_strategy
+from sweep import EXIT_PARAMS, run_sweep, score_trades
+
+GRID = {
+    "wall_threshold": [15, 30],
+    "proximity_ticks": [5, 20],
+    "TP": [5, 10],
+    "SL": [5],
+    "slippage": [0.5],
+}
+
+
+def single_run(data_path, row, capital):
+    strategy = functools.partial(liquidity_wall_strategy, wall_threshold=row["wall_threshold"],
+                                 proximity_ticks=row["proximity_ticks"])
+    engine = BacktestEngine(strategy, data_path, capital=capital, cache=False,
+                            **{name: row[name] for name in EXIT_PARAMS})
+    with contextlib.redirect_stdout(io.StringIO()):
+        mid_price_df, signal_df = engine.prepare()
+    return score_trades(engine.simulate_trades(signal_df, mid_price_df), capital)
+
+
+def test_sweep_rows_match_single_runs(logs, workdir):
+    results = run_sweep(logs, GRID, capital=20, workers=2)
+
+    assert len(results) == 2 * 2 * 2
+    assert results["final_equity"].is_monotonic_decreasing
+    assert not os.path.exists(workdir / ".backtest_cache")
+    assert results["trades"].gt(0).all()
+    for _, row in results.iterrows():
+        expected = single_run(logs, row, 20)
+        assert row["trades"] == expected["trades"]
+        for name in ("final_equity", "max_drawdown", "win_rate"):
+            assert np.isclose(row[name], expected[name]), name
+
+
+def test_random_sweep_samples_the_grid(logs):
+    results = run_sweep(logs, GRID, n_iter=3, capital=20, workers=1, seed=7)
+    assert len(results) == 3
+    assert results[["wall_threshold", "proximity_ticks", "TP"]].drop_duplicates().shape[0] == 3
@@ -0,0 +1,52 @@
+# --- tests/test_synthetic_data.py ---
+import os
+
+import pytest
+
+from synthetic_data import generate, synthetic_day
+
+
+def read_bytes(paths):
+    # Each log and its .tidx sidecar, keyed by file name.
+    files = {}
+    for path in paths:
+        for name in (path, path + ".tidx"):
+            with open(name, "rb") as f:
+                files[os.path.basename(name)] = f.read()
+    return files
+
+
+def test_same_seed_writes_identical_files(tmp_path):
+    first = generate(str(tmp_path / "a"), days=2, hours=0.05, seed=5)
+    second = generate(str(tmp_path / "b"), days=2, hours=0.05, seed=5)
+    assert read_bytes(first) == read_bytes(second)
+    assert len(read_bytes(first)) == 4
+
+
+def test_regenerating_replaces_the_logs(tmp_path):
+    out_dir = str(tmp_path / "logs")
+    paths = generate(out_dir, days=2, hours=0.05, seed=5)
+    expected = read_bytes(paths)
+    generate(out_dir, days=2, hours=0.05, seed=6)
+    generate(out_dir, days=2, hours=0.05, seed=5)
+    assert read_bytes(paths) == expected
+
+
+def test_other_seed_writes_other_files(tmp_path):
+    first = generate(str(tmp_path / "a"), days=1, hours=0.05, seed=5)
+    second = generate(str(tmp_path / "b"), days=1, hours=0.05, seed=6)
+    assert read_bytes(first) != read_bytes(second)
+
+
+def test_days_do_not_depend_on_how_many_are_generated(tmp_path):
+    short = generate(str(tmp_path / "a"), days=2, hours=0.05, seed=5)
+    long = generate(str(tmp_path / "b"), days=3, hours=0.05, seed=5)
+    assert read_bytes(short) == read_bytes(long[:2])
+
+
+def test_synthetic_day_is_deterministic():
+    df, mid = synthetic_day("2025-05-10", hours=0.05, seed=9)
+    again, again_mid = synthetic_day("2025-05-10", hours=0.05, seed=9)
+    assert df.equals(again) and mid == again_mid
+    with pytest.raises(ValueError):
+        synthetic_day("2025-05-10", interval=0.5)
@@ -0,0 +1,55 @@
+# --- tests/test_time_index.py ---
+import os
+
+import pandas as pd
+
+from loader import load_orderbook, read_orderbook_csv
+from synthetic_data import synthetic_day
+from time_index import append_index, index_path, load_index
+
+
+def write_rows(path, df):
+    with open(path, "a", newline="") as f:
+        df.to_csv(f, header=False, index=False)
+
+
+def test_windowed_load_matches_full_load(logs):
+    full = load_orderbook(logs)
+    start, end = "2025-05-10 00:05:00", "2025-05-11 00:02:30"
+    window = load_orderbook(logs, start=start, end=end)
+    expected = full[(full["timestamp"] >= start) & (full["timestamp"] <= end)].reset_index(drop=True)
+    pd.testing.assert_frame_equal(window, expected)
+
+
+def test_sidecar_started_on_existing_log_is_rebuilt(tmp_path):
+    df, _ = synthetic_day("2025-05-10", hours=0.1)
+    path = str(tmp_path / "XBT-USD_orderbook_2025-05-10.csv")
+    stamps = df["timestamp"].unique()
+    old, new = df[df["timestamp"] < stamps[-1]], df[df["timestamp"] == stamps[-1]]
+    write_rows(path, old)
+    # A logger upgraded mid-day appends the first sidecar entry at the end.
+    append_index(path, stamps[-1], os.path.getsize(path))
+    write_rows(path, new)
+
+    assert load_index(path)["offset"][0] == 0
+    window = read_orderbook_csv(path, start=stamps[10], end=stamps[-1])
+    assert len(window) == len(df[df["timestamp"] >= stamps[10]])
+
+
+def test_write_snapshot_indexes_log_without_sidecar(tmp_path, monkeypatch):
+    import data_logger
+
+    df, _ = synthetic_day("2025-05-10", hours=0.1)
+    monkeypatch.setattr(data_logger, "SAVE_DIR", str(tmp_path))
+    path = data_logger.get_log_path()
+    write_rows(path, df)
+    book = {"bids": [(99_999.0, 1.0)], "asks": [(100_001.0, 2.0)]}
+    monkeypatch.setattr(data_logger, "latest_snapshot", lambda pair: (1, book))
+
+    data_logger.write_snapshot()
+
+    index = load_index(path)
+    assert os.path.exists(index_path(path))
+    assert index["offset"][0] == 0
+    assert len(index) == df["timestamp"].nunique() + 1
+    assert len(read_orderbook_csv(path, start=df["timestamp"].iloc[0])) == len(df) + 2
@@ -0,0 +1,63 @@
+# --- tests/test_wide_store.py ---
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from loader import load_orderbook
+from wide_store import convert_csv_to_wide, open_wide
+
+
+@pytest.fixture
+def wide(logs, tmp_path):
+    out_dir = str(tmp_path / "wide")
+    convert_csv_to_wide(sorted(glob.glob(os.path.join(logs, "*.csv"))), out_dir, levels=None)
+    return out_dir
+
+
+def expected_window(logs, start, end):
+    full = load_orderbook(logs)
+    window = full[(full["timestamp"] >= start) & (full["timestamp"] <= end)]
+    return window.astype({"side": object}).reset_index(drop=True)
+
+
+def test_slice_includes_snapshots_on_both_bounds(logs, wide):
+    stamps = open_wide(wide).time_index()
+    start, end = stamps[10], stamps[-5]
+    window = open_wide(wide, start=start, end=end)
+
+    assert window.time_index()[0] == start
+    assert window.time_index()[-1] == end
+    assert len(window) == len(stamps) - 10 - 4
+    pd.testing.assert_frame_equal(window.to_long(), expected_window(logs, start, end), check_dtype=False)
+
+
+def test_slice_on_first_and_last_snapshot(wide):
+    stamps = open_wide(wide).time_index()
+    assert len(open_wide(wide, start=stamps[0], end=stamps[-1])) == len(stamps)
+    assert len(open_wide(wide, start=stamps[-1])) == 1
+    assert len(open_wide(wide, end=stamps[0])) == 1
+    single = open_wide(wide, start=stamps[7], end=stamps[7])
+    assert list(single.time_index()) == [stamps[7]]
+
+
+def test_slice_between_snapshots_and_outside_the_store(wide):
+    stamps = open_wide(wide).time_index()
+    nudge = pd.Timedelta(1, "ns")
+    window = open_wide(wide, start=stamps[3] + nudge, end=stamps[8] - nudge)
+    assert list(window.time_index()) == list(stamps[4:8])
+    assert len(open_wide(wide, start=stamps[5] + nudge, end=stamps[6] - nudge)) == 0
+    assert len(open_wide(wide, end=stamps[0] - nudge)) == 0
+    assert len(open_wide(wide, start=stamps[-1] + nudge)) == 0
+
+
+def test_sliced_mid_prices_match_full_store(wide):
+    full = open_wide(wide)
+    stamps = full.time_index()
+    window = open_wide(wide, start=stamps[100], end=stamps[200])
+    expected = full.mid_prices().iloc[100:201].reset_index(drop=True)
+    pd.testing.assert_frame_equal(window.mid_prices(), expected)
+    # Slices stay views of the memory-mapped files.
+    assert isinstance(window.bid_price, np.memmap)
@@ -0,0 +1,92 @@
+# --- time_index.py ---
+# Sidecar time index for the long-format CSV logs: <log>.csv.tidx holds one
+# (timestamp ns, byte offset) int64 pair per snapshot, appended by the
+# logger as it writes. A start/end load binary-searches the index and reads
+# only that byte range instead of parsing the whole daily file. Logs are
+# appended in time order, which is what makes the offsets monotonic.
+import os
+
+import numpy as np
+import pandas as pd
+
+CSV_COLS = ["timestamp", "side", "price", "volume"]
+INDEX_SUFFIX = ".tidx"
+ENTRY = np.dtype([("ts", "<i8"), ("offset", "<i8")])
+
+
+def index_path(csv_path):
+    return str(csv_path) + INDEX_SUFFIX
+
+
+def append_index(csv_path, timestamp, offset):
+    entry = np.array([(pd.Timestamp(timestamp).value, offset)], dtype=ENTRY)
+    with open(index_path(csv_path), "ab") as f:
+        f.write(entry.tobytes())
+
+
+def build_csv_index(csv_path):
+    # Index for a log written before the sidecar existed: the offset of the
+    # first row of every new timestamp.
+    stamps, offsets = [], []
+    last = None
+    offset = 0
+    with open(csv_path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Still being written.
+                break
+            ts = line[:line.find(b",")]
+            if ts != last:
+                stamps.append(ts.decode())
+                offsets.append(offset)
+                last = ts
+            offset += len(line)
+    index = np.empty(len(stamps), dtype=ENTRY)
+    index["ts"] = pd.to_datetime(pd.Series(stamps, dtype=object)).to_numpy("datetime64[ns]").view("i8")
+    index["offset"] = offsets
+    try:
+        index.tofile(index_path(csv_path))
+    except OSError:
+        pass
+    return index
+
+
+def load_index(csv_path):
+    path = index_path(csv_path)
+    if os.path.exists(path):
+        index = np.fromfile(path, dtype=ENTRY)
+        # An index pointing past the end belongs to an older version of the
+        # file; one that does not start at the first row was begun on a log
+        # that already had rows, and seeking through it would skip them.
+        if len(index) == 0 or (index["offset"][0] == 0
+                               and index["offset"][-1] < os.path.getsize(csv_path)):
+            return index
+    return build_csv_index(csv_path)
+
+
+def csv_byte_range(csv_path, start=None, end=None):
+    # [lo, hi) byte range covering every snapshot in [start, end]; O(log n)
+    # over the index. Rows appended after the last index entry are covered
+    # by reading to EOF, so callers still filter rows by time.
+    size = os.path.getsize(csv_path)
+    if start is None and end is None:
+        return 0, size
+    index = load_index(csv_path)
+    ts, offsets = index["ts"], index["offset"]
+    lo, hi = 0, size
+    if start is not None and len(index):
+        i = np.searchsorted(ts, pd.Timestamp(start).value, side="left")
+        lo = int(offsets[min(i, len(index) - 1)])
+    if end is not None:
+        j = np.searchsorted(ts, pd.Timestamp(end).value, side="right")
+        hi = int(offsets[j]) if j < len(index) else size
+    return lo, max(lo, hi)
+
+
+def filter_time(df, start=None, end=None):
+    if start is not None:
+        df = df[df["timestamp"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["timestamp"] <= pd.Timestamp(end)]
+    return df.reset_index(drop=True)
+
@@ -0,0 +1,179 @@
+# --- wide_store.py ---
+# Fixed-width snapshot layout: one row per snapshot, N levels per side.
+#   <dir>/meta.json                {"levels": N}
+#   <dir>/timestamps.i8            int64 ns since epoch, (T,)
+#   <dir>/{bid,ask}_{price,volume}.f8   float64, (T, N), NaN = empty level
+# The files are raw little-endian arrays, so they can be appended to and are
+# opened with np.memmap: slicing a time range reads only the pages touched.
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ("bid_price", "bid_volume", "ask_price", "ask_volume")
+
+
+def is_wide_path(path):
+    if isinstance(path, (list, tuple)):
+        return False
+    return os.path.isfile(os.path.join(path, "meta.json"))
+
+
+class WideSnapshots:
+    def __init__(self, timestamps, bid_price, bid_volume, ask_price, ask_volume):
+        self.timestamps = timestamps
+        self.bid_price = bid_price
+        self.bid_volume = bid_volume
+        self.ask_price = ask_price
+        self.ask_volume = ask_volume
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def levels(self):
+        return self.bid_price.shape[1]
+
+    def time_index(self):
+        return pd.DatetimeIndex(self.timestamps.view("datetime64[ns]"))
+
+    def slice(self, start=None, end=None):
+        # Binary search on the (memory-mapped) timestamps; returns views.
+        lo, hi = 0, len(self)
+        if start is not None:
+            lo = np.searchsorted(self.timestamps, pd.Timestamp(start).value, side="left")
+        if end is not None:
+            hi = np.searchsorted(self.timestamps, pd.Timestamp(end).value, side="right")
+        return WideSnapshots(*(getattr(self, name)[lo:hi] for name in ("timestamps",) + FIELDS))
+
+    def mid_prices(self):
+        # Same frame as BacktestEngine.compute_mid_prices on the long format.
+        best_bid = np.fmax.reduce(self.bid_price, axis=1) if self.levels else np.full(len(self), np.nan)
+        best_ask = np.fmin.reduce(self.ask_price, axis=1) if self.levels else np.full(len(self), np.nan)
+        mid_price_df = pd.DataFrame({
+            "timestamp": self.time_index(),
+            "best_bid": best_bid,
+            "best_ask": best_ask,
+        })
+        mid_price_df["mid_price"] = (mid_price_df["best_bid"] + mid_price_df["best_ask"]) / 2
+        return mid_price_df
+
+    def to_long(self):
+        # Long (timestamp, side, price, volume) rows for code that still
+        # expects the CSV layout; bids then asks within each snapshot.
+        n, levels = len(self), self.levels
+        ts = np.repeat(self.time_index().values, 2 * levels)
+        side = np.tile(np.repeat(np.array(["bid", "ask"], dtype=object), levels), n)
+        price = np.hstack([self.bid_price, self.ask_price]).ravel()
+        volume = np.hstack([self.bid_volume, self.ask_volume]).ravel()
+        keep = ~np.isnan(price)
+        return pd.DataFrame({
+            "timestamp": ts[keep],
+            "side": side[keep],
+            "price": price[keep],
+            "volume": volume[keep],
+        })
+
+
+def open_wide(path, start=None, end=None):
+    with open(os.path.join(path, "meta.json")) as f:
+        levels = json.load(f)["levels"]
+
+    def _map(name, dtype, width):
+        file_path = os.path.join(path, name)
+        count = os.path.getsize(file_path) // (np.dtype(dtype).itemsize * width)
+        if count == 0:
+            return np.empty((0, width) if width > 1 else 0, dtype=dtype)
+        shape = (count, width) if width > 1 else (count,)
+        return np.memmap(file_path, dtype=dtype, mode="r", shape=shape)
+
+    timestamps = _map("timestamps.i8", "<i8", 1)
+    # A writer may be mid-append; only expose rows present in every file.
+    arrays = [_map(f"{name}.f8", "<f8", levels) for name in FIELDS]
+    count = min([len(timestamps)] + [len(a) for a in arrays])
+    snapshots = WideSnapshots(timestamps[:count], *(a[:count] for a in arrays))
+    return snapshots.slice(start, end)
+
+
+class WideSnapshotWriter:
+    def __init__(self, path, levels=10, flush_rows=600):
+        self.path = path
+        self.levels = levels
+        self.flush_rows = flush_rows
+        self.rows = []
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            with open(meta_path, "w") as f:
+                json.dump({"levels": levels}, f)
+
+    def append(self, pair, timestamp, bids, asks):
+        # Same call shape as ParquetSnapshotWriter.append; one store per pair.
+        row = np.full((4, self.levels), np.nan)
+        for i, (price, volume) in enumerate(bids[:self.levels]):
+            row[0, i], row[1, i] = price, volume
+        for i, (price, volume) in enumerate(asks[:self.levels]):
+            row[2, i], row[3, i] = price, volume
+        with self.lock:
+            self.rows.append((pd.Timestamp(timestamp).value, row))
+            due = len(self.rows) >= self.flush_rows
+        if due:
+            self.flush()
+
+    def write_arrays(self, timestamps, bid_price, bid_volume, ask_price, ask_volume):
+        # Timestamps go last so readers never see a row without its levels.
+        arrays = dict(zip(FIELDS, (bid_price, bid_volume, ask_price, ask_volume)))
+        for name in FIELDS:
+            with open(os.path.join(self.path, f"{name}.f8"), "ab") as f:
+                f.write(np.ascontiguousarray(arrays[name], dtype="<f8").tobytes())
+        with open(os.path.join(self.path, "timestamps.i8"), "ab") as f:
+            f.write(np.ascontiguousarray(timestamps, dtype="<i8").tobytes())
+
+    def flush(self):
+        with self.lock:
+            rows, self.rows = self.rows, []
+            if not rows:
+                return
+            timestamps = np.array([ts for ts, _ in rows], dtype="<i8")
+            block = np.stack([row for _, row in rows])
+            self.write_arrays(timestamps, block[:, 0], block[:, 1], block[:, 2], block[:, 3])
+
+    def close(self):
+        self.flush()
+
+
+def long_to_wide(df, levels=10):
+    # Pivot the long format into (T, levels) matrices. Rows keep their
+    # logged order within each (timestamp, side); extra levels are dropped.
+    # levels=None keeps every row, so the result is lossless.
+    df = df.sort_values("timestamp", kind="mergesort")
+    codes, timestamps = pd.factorize(df["timestamp"], sort=True)
+    side = df["side"].to_numpy()
+    level = df.groupby([codes, side], sort=False).cumcount().to_numpy()
+    if levels is None:
+        levels = int(level.max()) + 1 if len(level) else 0
+    keep = level < levels
+
+    out = {name: np.full((len(timestamps), levels), np.nan) for name in FIELDS}
+    for side_name in ("bid", "ask"):
+        rows = keep & (side == side_name)
+        out[f"{side_name}_price"][codes[rows], level[rows]] = df["price"].to_numpy(dtype=float)[rows]
+        out[f"{side_name}_volume"][codes[rows], level[rows]] = df["volume"].to_numpy(dtype=float)[rows]
+    ts = pd.DatetimeIndex(timestamps).as_unit("ns").asi8
+    return WideSnapshots(ts, *(out[name] for name in FIELDS))
+
+
+def write_wide(path, snapshots):
+    writer = WideSnapshotWriter(path, levels=snapshots.levels)
+    writer.write_arrays(snapshots.timestamps, *(getattr(snapshots, name) for name in FIELDS))
+
+
+def convert_csv_to_wide(csv_paths, out_dir, levels=10):
+    # One-off conversion of daily CSV logs (in time order) into a wide store.
+    cols = ["timestamp", "side", "price", "volume"]
+    for csv_path in csv_paths:
+        df = pd.read_csv(csv_path, names=cols, header=None, parse_dates=[0])
+        write_wide(out_dir, long_to_wide(df, levels=levels))